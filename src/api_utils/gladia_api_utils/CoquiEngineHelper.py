@@ -1,17 +1,139 @@
 import os
 import pathlib
 import sys
-import wave
-from io import BytesIO
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from logging import getLogger
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import ffmpeg
 import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
 from gladia_api_utils.model_management import download_model
+from starlette.concurrency import run_in_threadpool
 from stt import Model
 
 logger = getLogger(__name__)
 
+# sample rate expected by the coqui models
+SAMPLE_RATE = 16000
+
+# number of processes decoding the segments of a long audio in parallel,
+# each one keeping its own engine in memory
+STT_WORKERS = int(os.getenv("GLADIA_STT_WORKERS", min(os.cpu_count() or 1, 4)))
+
+# engine of the current segment decoding process
+worker_engine = None
+
+
+def decode_audio(
+    audio: Union[bytes, str], sample_rate: int = SAMPLE_RATE
+) -> np.ndarray:
+    """
+    Decode audio of any format and resample it to mono at the given sample rate.
+    ffmpeg writes raw samples to its output pipe which are read directly into
+    an int16 buffer, without going through a wav container.
+
+    Args:
+        audio (Union[bytes, str]): audio to decode, or path to it (read directly by ffmpeg)
+        sample_rate (int): sample rate of the output (default: 16000)
+
+    Returns:
+        np.ndarray: mono int16 audio
+
+    Raises:
+        SystemError: if audio decoding fails
+    """
+
+    from_file = isinstance(audio, str) and os.path.isfile(audio)
+
+    try:
+        out, _ = (
+            ffmpeg.input(audio if from_file else "pipe:0")
+            .output(
+                "pipe:1",
+                f="s16le",
+                acodec="pcm_s16le",
+                ac=1,
+                ar=sample_rate,
+                loglevel="error",
+                hide_banner=None,
+            )
+            .run(
+                input=None if from_file else audio,
+                capture_stdout=True,
+                capture_stderr=True,
+            )
+        )
+    except ffmpeg.Error as error:
+        raise SystemError(error.stderr)
+
+    return np.frombuffer(out, np.int16)
+
+
+def get_model_path_prefix(caller_file: str, model_uri: str) -> str:
+    """
+    Get the directory of the files of a model from the path of the application using it.
+
+    Args:
+        caller_file (str): path of the module using the model
+        model_uri (str): model uri
+
+    Returns:
+        str: directory of the model files
+    """
+
+    # the main path of the application calling this Helper by default /app/apis/"
+    app_prefix = str(pathlib.Path(caller_file).parents[0].absolute())
+    app_prefix = "/".join(app_prefix[1:].split("/")[:3])
+
+    return os.path.join(
+        os.getenv("GLADIA_TMP_MODEL_PATH", "/tmp/gladia/models"),
+        app_prefix,
+        "audio",
+        "text",
+        model_uri,
+    )
+
+
+def download_model_files(
+    model_uri: str, model: str, scorer: str, model_path_prefix: str
+) -> Tuple[str, str]:
+    """
+    Download the model and scorer files if they aren't already.
+
+    Args:
+        model_uri (str): model uri
+        model (str): model file name
+        scorer (str): scorer file name
+        model_path_prefix (str): directory of the model files
+
+    Returns:
+        Tuple[str, str]: paths to the model and to the scorer
+    """
+
+    logger.debug(f"model_path_prefix: {model_path_prefix}")
+
+    model_url = f"https://coqui.gateway.scarf.sh/{model_uri}"
+
+    logger.debug(f"Downloading model from {model_url} to {model_path_prefix}")
+
+    model_path = download_model(
+        url=f"{model_url}/{model}",
+        output_path=os.path.join(model_path_prefix, "model"),
+        uncompress_after_download=False,
+    )
+
+    scorer_path = download_model(
+        url=f"{model_url}/{scorer}",
+        output_path=os.path.join(model_path_prefix, "scorer"),
+        uncompress_after_download=False,
+    )
+
+    return model_path, scorer_path
+
 
 class SpeechToTextEngine:
     """
@@ -31,6 +153,7 @@ class SpeechToTextEngine:
         model_uri: str = "english/coqui/v1.0.0-huge-vocab",
         model: str = "model.tflite",
         scorer: str = "huge-vocabulary.scorer",
+        model_path_prefix: Optional[str] = None,
     ):
         """
         Initialize the engine
@@ -39,93 +162,606 @@ class SpeechToTextEngine:
             model_uri (str): model uri
             model (str): model file name
             scorer (str): scorer file name
+            model_path_prefix (Optional[str]): directory of the model files, deduced from the caller path if None (default: None)
 
         Returns:
             SpeechToTextEngine: speech to text engine instance
         """
 
-        # the main path of the application calling this Helper by default /app/apis/"
-        app_prefix = str(
-            pathlib.Path(sys._getframe(1).f_globals["__file__"]).parents[0].absolute()
+        if model_path_prefix is None:
+            model_path_prefix = get_model_path_prefix(
+                sys._getframe(1).f_globals["__file__"], model_uri
+            )
+
+        self.model_path_prefix = model_path_prefix
+
+        model_path, scorer_path = download_model_files(
+            model_uri, model, scorer, model_path_prefix
         )
-        app_prefix = "/".join(app_prefix[1:].split("/")[:3])
-
-        model_path_prefix = os.path.join(
-            os.getenv("GLADIA_TMP_MODEL_PATH", "/tmp/gladia/models"),
-            app_prefix,
-            "audio",
-            "text",
-            model_uri,
+
+        self.model = Model(model_path)
+        self.model.enableExternalScorer(scorer_path)
+
+    def normalize_audio(self, audio: Union[bytes, str]) -> np.ndarray:
+        """
+        Decode and resample audio to the sample rate of the model
+
+        Args:
+            audio (Union[bytes, str]): audio (or path to the audio) to normalize
+
+        Returns:
+            np.ndarray: normalized mono int16 audio
+        """
+
+        return decode_audio(audio, sample_rate=self.model.sampleRate())
+
+    def transcribe(self, audio: Union[bytes, str]) -> Tuple[str, Dict[str, float]]:
+        """
+        Run the model on audio and measure the duration of each stage
+
+        Args:
+            audio (Union[bytes, str]): audio (or path to the audio) to run the model on
+
+        Returns:
+            Tuple[str, Dict[str, float]]: transcription and duration of each stage in milliseconds
+        """
+
+        start = time.perf_counter()
+        audio = self.normalize_audio(audio)
+        decoded = time.perf_counter()
+        result = self.model.stt(audio)
+        transcribed = time.perf_counter()
+
+        timings = {
+            "audio_duration": len(audio) / self.model.sampleRate() * 1000,
+            "decoding": (decoded - start) * 1000,
+            "inference": (transcribed - decoded) * 1000,
+        }
+
+        logger.debug(f"Coqui STT timings: {timings}")
+
+        return result, timings
+
+    def run(self, audio: Union[bytes, str]) -> str:
+        """
+        Run the model on audio
+
+        Args:
+            audio (Union[bytes, str]): audio (or path to the audio) to run the model on
+
+        Returns:
+            str: transcription
+        """
+
+        result, _ = self.transcribe(audio)
+
+        return result
+
+
+def get_frame_energies(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """
+    Compute the energy in dBFS of consecutive frames of int16 audio.
+
+    Args:
+        audio (np.ndarray): mono int16 audio
+        frame_length (int): number of samples per frame
+
+    Returns:
+        np.ndarray: energy of each frame, the last incomplete frame being padded with silence
+    """
+
+    frames_count = max(int(np.ceil(len(audio) / frame_length)), 1)
+    frames = np.zeros(frames_count * frame_length, dtype=np.float32)
+    frames[: len(audio)] = audio.astype(np.float32) / 32768.0
+    frames = frames.reshape(frames_count, frame_length)
+
+    rms = np.sqrt(np.mean(frames**2, axis=1))
+
+    return 20 * np.log10(np.maximum(rms, 1e-5))
+
+
+def split_on_silences(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    threshold_db: float = 12.0,
+    dynamic_range_db: float = 30.0,
+    min_silence_ms: int = 400,
+    min_speech_ms: int = 200,
+    max_segment_ms: int = 30000,
+    padding_ms: int = 150,
+) -> List[Tuple[int, int]]:
+    """
+    Split audio into speech segments on its silences with an energy based voice activity detection.
+    A frame is speech if its energy is threshold_db above the noise floor (the 10th percentile of the frames energies)
+    or less than dynamic_range_db below the loudest frame.
+    Segments longer than max_segment_ms are split on their quietest frame.
+
+    Args:
+        audio (np.ndarray): mono int16 audio
+        sample_rate (int): sample rate of the audio (default: 16000)
+        frame_ms (int): duration of the analysis frames (default: 30)
+        threshold_db (float): energy above the noise floor to consider a frame as speech (default: 12.0)
+        dynamic_range_db (float): maximum energy below the loudest frame to consider a frame as speech (default: 30.0)
+        min_silence_ms (int): minimum duration of a silence splitting two segments (default: 400)
+        min_speech_ms (int): minimum duration of a segment, shorter ones being dropped as noise (default: 200)
+        max_segment_ms (int): maximum duration of a segment (default: 30000)
+        padding_ms (int): duration of audio kept around each segment (default: 150)
+
+    Returns:
+        List[Tuple[int, int]]: (start, end) sample indices of the segments
+    """
+
+    frame_length = sample_rate * frame_ms // 1000
+    energies = get_frame_energies(audio, frame_length)
+
+    # the noise floor is above the silences when they are less than 10% of the audio,
+    # so the threshold is also kept below the loudest frames to not drop all the speech
+    threshold = min(
+        np.percentile(energies, 10) + threshold_db, energies.max() - dynamic_range_db
+    )
+    threshold = max(threshold, -60.0)
+    is_speech = energies > threshold
+
+    min_silence = max(min_silence_ms // frame_ms, 1)
+    max_frames = max(max_segment_ms // frame_ms, 1)
+
+    # group the speech frames separated by less than min_silence frames
+    segments = list()
+    start, silence = None, 0
+    for index, speech in enumerate(is_speech):
+        if speech:
+            if start is None:
+                start = index
+            silence = 0
+        elif start is not None:
+            silence += 1
+            if silence >= min_silence:
+                segments.append((start, index - silence + 1))
+                start, silence = None, 0
+
+    if start is not None:
+        segments.append((start, len(is_speech) - silence))
+
+    # split the segments too long for a single decoding on their quietest frame
+    bounded_segments = list()
+    while segments:
+        start, end = segments.pop(0)
+        if end - start <= max_frames:
+            bounded_segments.append((start, end))
+            continue
+
+        split = (
+            start
+            + max_frames // 2
+            + int(np.argmin(energies[start + max_frames // 2 : start + max_frames]))
         )
+        bounded_segments.append((start, split))
+        segments.insert(0, (split, end))
+
+    padding = sample_rate * padding_ms // 1000
+    min_speech = max(min_speech_ms // frame_ms, 1)
+
+    # the padding of two consecutive segments never overlaps
+    # so that no word is transcribed twice
+    samples = list()
+    for start, end in bounded_segments:
+        if end - start < min_speech:
+            continue
+
+        start = max(start * frame_length - padding, samples[-1][1] if samples else 0)
+        end = min(end * frame_length + padding, len(audio))
+        samples.append((start, end))
+
+    return samples
+
+
+def _init_worker(engine_kwargs: Dict[str, Any]) -> None:
+    """
+    Load the engine of a segment decoding process.
+
+    Args:
+        engine_kwargs (Dict[str, Any]): arguments of the SpeechToTextEngine
+
+    Returns:
+        None
+    """
+
+    global worker_engine
+
+    worker_engine = SpeechToTextEngine(**engine_kwargs)
+
+
+def _transcribe_segment(audio: np.ndarray) -> str:
+    """
+    Transcribe a segment with the engine of the current decoding process.
+
+    Args:
+        audio (np.ndarray): mono int16 audio at the model sample rate
+
+    Returns:
+        str: transcription of the segment
+    """
 
-        logger.debug(f"model_path_prefix: {model_path_prefix}")
+    return worker_engine.model.stt(audio)
 
-        model_url = f"https://coqui.gateway.scarf.sh/{model_uri}"
 
-        logger.debug(f"Downloading model from {model_url} to {model_path_prefix}")
+class SpeechToTextPool:
+    """
+    Pool of resident speech to text engines transcribing long audio
+    segment by segment, the segments being decoded in parallel processes.
+
+    Args:
+        workers (int): number of decoding processes, the segments are decoded in the current process if <= 1
+        engine_kwargs (Dict[str, Any]): arguments of the SpeechToTextEngine
+    """
+
+    def __init__(self, workers: int = STT_WORKERS, **engine_kwargs) -> None:
+        """
+        Initialize the pool, loading its engines
+
+        Args:
+            workers (int): number of decoding processes, the segments are decoded in the current process if <= 1 (default: GLADIA_STT_WORKERS or min(cpus, 4))
+            engine_kwargs (Dict[str, Any]): arguments of the SpeechToTextEngine
+
+        Returns:
+            None
+        """
+
+        self.engine = None
+        self.executor = None
+
+        # the engines can't deduce the model path from their caller so resolve it here
+        if engine_kwargs.get("model_path_prefix") is None:
+            engine_kwargs["model_path_prefix"] = get_model_path_prefix(
+                sys._getframe(1).f_globals["__file__"],
+                engine_kwargs.get("model_uri", "english/coqui/v1.0.0-huge-vocab"),
+            )
 
-        model_path = download_model(
-            url=f"{model_url}/{model}",
-            output_path=os.path.join(model_path_prefix, "model"),
-            uncompress_after_download=False,
+        if workers <= 1:
+            self.engine = SpeechToTextEngine(**engine_kwargs)
+            return
+
+        # download the files once instead of in each process
+        download_model_files(
+            engine_kwargs.get("model_uri", "english/coqui/v1.0.0-huge-vocab"),
+            engine_kwargs.get("model", "model.tflite"),
+            engine_kwargs.get("scorer", "huge-vocabulary.scorer"),
+            engine_kwargs["model_path_prefix"],
         )
 
-        scorer_path = download_model(
-            url=f"{model_url}/{scorer}",
-            output_path=os.path.join(model_path_prefix, "scorer"),
-            uncompress_after_download=False,
+        # spawn instead of fork, the server process has threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(engine_kwargs,),
         )
 
-        self.model = Model(model_path)
-        self.model.enableExternalScorer(scorer_path)
+    def transcribe_segments(self, segments: List[np.ndarray]) -> List[str]:
+        """
+        Transcribe segments of audio, in parallel if the pool has processes.
+
+        Args:
+            segments (List[np.ndarray]): mono int16 segments at the model sample rate
+
+        Returns:
+            List[str]: transcription of each segment
+        """
+
+        if self.executor is None:
+            return [self.engine.model.stt(segment) for segment in segments]
+
+        return list(self.executor.map(_transcribe_segment, segments))
+
+    def transcribe(
+        self, audio: Union[bytes, str]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """
+        Split audio on its silences and transcribe its speech segments.
+
+        Args:
+            audio (Union[bytes, str]): audio (or path to the audio) to transcribe
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, float]]: the segments with their start, end (in seconds) and transcription,
+            and the duration of each stage in milliseconds
+        """
+
+        start = time.perf_counter()
+        audio = decode_audio(audio, sample_rate=SAMPLE_RATE)
+        decoded = time.perf_counter()
+        boundaries = split_on_silences(audio, sample_rate=SAMPLE_RATE)
+        segmented = time.perf_counter()
+        texts = self.transcribe_segments(
+            [
+                audio[segment_start:segment_end]
+                for segment_start, segment_end in boundaries
+            ]
+        )
+        transcribed = time.perf_counter()
+
+        segments = [
+            {
+                "start": round(segment_start / SAMPLE_RATE, 3),
+                "end": round(segment_end / SAMPLE_RATE, 3),
+                "text": text,
+            }
+            for (segment_start, segment_end), text in zip(boundaries, texts)
+            if text
+        ]
 
-    def normalize_audio(self, audio: bytes) -> bytes:
+        timings = {
+            "audio_duration": len(audio) / SAMPLE_RATE * 1000,
+            "decoding": (decoded - start) * 1000,
+            "segmentation": (segmented - decoded) * 1000,
+            "inference": (transcribed - segmented) * 1000,
+        }
+
+        logger.debug(f"Coqui STT timings for {len(boundaries)} segments: {timings}")
+
+        return segments, timings
+
+
+class StreamingAudioDecoder:
+    """
+    Decode a stream of audio chunks to mono int16 audio as they arrive.
+    Raw pcm at the output sample rate is used as is, any other input is
+    decoded by a long running ffmpeg process fed through its stdin.
+
+    Args:
+        audio_format (str): "pcm" for raw int16 mono chunks, or any format ffmpeg can read from a stream (ogg/webm opus...)
+        input_sample_rate (int): sample rate of the pcm chunks
+        sample_rate (int): sample rate of the output
+    """
+
+    def __init__(
+        self,
+        audio_format: str = "pcm",
+        input_sample_rate: int = SAMPLE_RATE,
+        sample_rate: int = SAMPLE_RATE,
+    ) -> None:
         """
-        Normalize audio to [-1, 1]
+        Initialize the decoder, starting ffmpeg if needed
 
         Args:
-            audio (bytes): audio to normalize
+            audio_format (str): "pcm" for raw int16 mono chunks, or any format ffmpeg can read from a stream (default: "pcm")
+            input_sample_rate (int): sample rate of the pcm chunks (default: 16000)
+            sample_rate (int): sample rate of the output (default: 16000)
 
         Returns:
-            bytes: normalized audio
+            None
+        """
+
+        self.buffer = bytearray()
+        self.lock = threading.Lock()
+        self.process = None
+
+        if audio_format == "pcm" and input_sample_rate == sample_rate:
+            return
 
-        Raises:
-            Exception: if audio normalization fails
+        if audio_format == "pcm":
+            stream = ffmpeg.input("pipe:0", f="s16le", ac=1, ar=input_sample_rate)
+        else:
+            stream = ffmpeg.input("pipe:0")
+
+        self.process = stream.output(
+            "pipe:1",
+            f="s16le",
+            acodec="pcm_s16le",
+            ac=1,
+            ar=sample_rate,
+            loglevel="error",
+            hide_banner=None,
+        ).run_async(pipe_stdin=True, pipe_stdout=True)
+
+        # ffmpeg only outputs once it has read enough input,
+        # so its output is read in the background not to block the writes
+        self.reader = threading.Thread(target=self._read_output, daemon=True)
+        self.reader.start()
+
+    def _read_output(self) -> None:
         """
+        Move the output of ffmpeg to the buffer until ffmpeg exits.
 
-        out, err = (
-            ffmpeg.input("pipe:0")
-            .output(
-                "pipe:1",
-                f="WAV",
-                acodec="pcm_s16le",
-                ac=1,
-                ar="16k",
-                loglevel="error",
-                hide_banner=None,
-            )
-            .run(input=audio, capture_stdout=True, capture_stderr=True)
+        Returns:
+            None
+        """
+
+        for chunk in iter(lambda: self.process.stdout.read1(4096), b""):
+            with self.lock:
+                self.buffer.extend(chunk)
+
+    def _drain(self) -> np.ndarray:
+        """
+        Take the complete samples out of the buffer.
+
+        Returns:
+            np.ndarray: the decoded int16 samples
+        """
+
+        with self.lock:
+            length = len(self.buffer) - len(self.buffer) % 2
+            samples = np.frombuffer(bytes(self.buffer[:length]), np.int16)
+            del self.buffer[:length]
+
+        return samples
+
+    def write(self, chunk: bytes) -> np.ndarray:
+        """
+        Decode a chunk of audio.
+
+        Args:
+            chunk (bytes): chunk of audio
+
+        Returns:
+            np.ndarray: the int16 samples decoded so far and not returned yet
+        """
+
+        if self.process is None:
+            self.buffer.extend(chunk)
+        else:
+            self.process.stdin.write(chunk)
+            self.process.stdin.flush()
+
+        return self._drain()
+
+    def close(self) -> np.ndarray:
+        """
+        Flush the decoder.
+
+        Returns:
+            np.ndarray: the remaining int16 samples
+        """
+
+        if self.process is not None:
+            self.process.stdin.close()
+            self.reader.join()
+            self.process.wait()
+
+        return self._drain()
+
+
+class SpeechToTextStream:
+    """
+    Incremental transcription of a stream of audio chunks with a coqui streaming context.
+
+    Args:
+        engine (SpeechToTextEngine): engine whose model transcribes the stream
+        audio_format (str): "pcm" for raw int16 mono chunks, or any format ffmpeg can read from a stream (ogg/webm opus...)
+        sample_rate (int): sample rate of the pcm chunks
+    """
+
+    def __init__(
+        self,
+        engine: SpeechToTextEngine,
+        audio_format: str = "pcm",
+        sample_rate: int = SAMPLE_RATE,
+    ) -> None:
+        """
+        Initialize the stream
+
+        Args:
+            engine (SpeechToTextEngine): engine whose model transcribes the stream
+            audio_format (str): "pcm" for raw int16 mono chunks, or any format ffmpeg can read from a stream (default: "pcm")
+            sample_rate (int): sample rate of the pcm chunks (default: 16000)
+
+        Returns:
+            None
+        """
+
+        self.sample_rate = engine.model.sampleRate()
+        self.decoder = StreamingAudioDecoder(
+            audio_format, input_sample_rate=sample_rate, sample_rate=self.sample_rate
         )
-        if err:
-            raise SystemError(err)
-        return out
+        self.stream = engine.model.createStream()
+        self.samples = 0
 
-    def run(self, audio: bytes) -> str:
+    def feed(self, chunk: bytes) -> None:
         """
-        Run the model on audio
+        Feed a chunk of audio to the stream.
 
         Args:
-            audio (bytes): audio to run the model on
+            chunk (bytes): chunk of audio
 
         Returns:
-            str: transcription
+            None
         """
 
-        audio = self.normalize_audio(audio)
-        audio = BytesIO(audio)
+        samples = self.decoder.write(chunk)
+        if len(samples):
+            self.stream.feedAudioContent(samples)
+            self.samples += len(samples)
 
-        with wave.Wave_read(audio) as wav:
-            audio = np.frombuffer(wav.readframes(wav.getnframes()), np.int16)
-        result = self.model.stt(audio)
+    def intermediate(self) -> str:
+        """
+        Decode the audio fed so far, the stream staying open.
 
-        return result
+        Returns:
+            str: the partial transcription
+        """
+
+        return self.stream.intermediateDecode()
+
+    def finish(self) -> str:
+        """
+        Flush the audio and close the stream.
+
+        Returns:
+            str: the final transcription
+        """
+
+        samples = self.decoder.close()
+        if len(samples):
+            self.stream.feedAudioContent(samples)
+            self.samples += len(samples)
+
+        return self.stream.finishStream()
+
+    def abort(self) -> None:
+        """
+        Close the stream without decoding it.
+
+        Returns:
+            None
+        """
+
+        self.decoder.close()
+        self.stream.freeStream()
+
+
+async def transcribe_websocket(
+    websocket: WebSocket,
+    engine: SpeechToTextEngine,
+    audio_format: str = "pcm",
+    sample_rate: int = SAMPLE_RATE,
+    partial_interval_ms: int = 500,
+) -> None:
+    """
+    Transcribe the audio chunks received as binary messages on a websocket.
+    A partial transcript ({"type": "partial", "text": ...}) is sent each time partial_interval_ms of new audio
+    has been received, the final one ({"type": "final", "text": ...}) once the client sends the "EOS" text message.
+
+    Args:
+        websocket (WebSocket): accepted websocket
+        engine (SpeechToTextEngine): engine whose model transcribes the stream
+        audio_format (str): "pcm" for raw int16 mono chunks, or any format ffmpeg can read from a stream (default: "pcm")
+        sample_rate (int): sample rate of the pcm chunks (default: 16000)
+        partial_interval_ms (int): duration of audio between two partial transcripts (default: 500)
+
+    Returns:
+        None
+    """
+
+    # the decoding is blocking so it runs in the threadpool not to block the event loop
+    stream = await run_in_threadpool(
+        SpeechToTextStream, engine, audio_format, sample_rate
+    )
+    partial_interval = stream.sample_rate * partial_interval_ms // 1000
+    last_partial = 0
+
+    try:
+        while True:
+            message = await websocket.receive()
+
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes"):
+                await run_in_threadpool(stream.feed, message["bytes"])
+
+                if stream.samples - last_partial >= partial_interval:
+                    last_partial = stream.samples
+                    text = await run_in_threadpool(stream.intermediate)
+                    await websocket.send_json({"type": "partial", "text": text})
+
+            elif message.get("text") == "EOS":
+                break
+
+        text = await run_in_threadpool(stream.finish)
+        await websocket.send_json({"type": "final", "text": text})
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.debug("Transcription stream closed by the client")
+        await run_in_threadpool(stream.abort)
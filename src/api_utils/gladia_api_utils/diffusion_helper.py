@@ -0,0 +1,191 @@
+import math
+import os
+from logging import getLogger
+from typing import Any, Dict, List, Optional
+
+import torch
+from diffusers import (
+    DDIMScheduler,
+    DPMSolverMultistepScheduler,
+    EulerAncestralDiscreteScheduler,
+    EulerDiscreteScheduler,
+    LMSDiscreteScheduler,
+    PNDMScheduler,
+    StableDiffusionInpaintPipeline,
+    StableDiffusionPipeline,
+)
+from PIL import Image
+
+from . import SECRETS
+from .model_management import load_resident_model
+
+logger = getLogger(__name__)
+
+STABLE_DIFFUSION_MODEL_ID = "CompVis/stable-diffusion-v1-4"
+
+# attention slicing computes the attention in several steps,
+# lowering the peak memory for a small slowdown
+ATTENTION_SLICING = (
+    os.getenv("GLADIA_STABLE_DIFFUSION_ATTENTION_SLICING", "true").lower() == "true"
+)
+
+SCHEDULERS = {
+    "pndm": PNDMScheduler,
+    "ddim": DDIMScheduler,
+    "lms": LMSDiscreteScheduler,
+    "euler": EulerDiscreteScheduler,
+    "euler_a": EulerAncestralDiscreteScheduler,
+    "dpm": DPMSolverMultistepScheduler,
+}
+
+PIPELINES = {
+    "text-to-image": StableDiffusionPipeline,
+    "inpainting": StableDiffusionInpaintPipeline,
+}
+
+
+def get_device() -> str:
+    """
+    Get the device to run the stable diffusion pipelines on.
+
+    Returns:
+        str: "cuda" if available, "cpu" otherwise
+    """
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def load_components(model_id: str, device: str) -> Dict[str, Any]:
+    """
+    Load the modules of a stable diffusion model (unet, vae, text encoder, tokenizer, safety checker...).
+    Half precision is only used on GPU, CPU kernels being much slower (or missing) in float16.
+
+    Args:
+        model_id (str): huggingface id of the model
+        device (str): device to load the modules on
+
+    Returns:
+        Dict[str, Any]: the modules, to be passed to the pipelines constructors
+    """
+
+    if device == "cuda":
+        options = {"revision": "fp16", "torch_dtype": torch.float16}
+    else:
+        options = {"torch_dtype": torch.float32}
+
+    pipe = StableDiffusionPipeline.from_pretrained(
+        model_id,
+        use_auth_token=SECRETS["HUGGINGFACE_ACCESS_TOKEN"],
+        **options,
+    ).to(device)
+
+    # the attention processors are set on the shared unet,
+    # so every pipeline built from these components uses them
+    if ATTENTION_SLICING:
+        pipe.enable_attention_slicing()
+
+    return pipe.components
+
+
+def get_components(
+    model_id: str = STABLE_DIFFUSION_MODEL_ID, device: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get the modules of a stable diffusion model, loaded only once per process.
+
+    Args:
+        model_id (str): huggingface id of the model (default: CompVis/stable-diffusion-v1-4)
+        device (Optional[str]): device to load the modules on, see get_device if None (default: None)
+
+    Returns:
+        Dict[str, Any]: the modules, to be passed to the pipelines constructors
+    """
+
+    device = get_device() if device is None else device
+
+    return load_resident_model(
+        f"stable-diffusion-{model_id}-{device}",
+        lambda: load_components(model_id, device),
+    )
+
+
+def get_pipeline(
+    task: str,
+    scheduler: str = "pndm",
+    model_id: str = STABLE_DIFFUSION_MODEL_ID,
+    device: Optional[str] = None,
+) -> Any:
+    """
+    Build a stable diffusion pipeline on top of the shared modules.
+    Building a pipeline doesn't load any weight, only the scheduler is created for each call
+    since it keeps the state of the current generation.
+
+    Args:
+        task (str): pipeline to build, one of PIPELINES ("text-to-image" or "inpainting")
+        scheduler (str): scheduler to use, one of SCHEDULERS (default: "pndm")
+        model_id (str): huggingface id of the model (default: CompVis/stable-diffusion-v1-4)
+        device (Optional[str]): device to run the pipeline on, see get_device if None (default: None)
+
+    Returns:
+        Any: the diffusers pipeline
+    """
+
+    if task not in PIPELINES:
+        raise ValueError(
+            f"Unknown stable diffusion task {task}, should be one of {list(PIPELINES)}"
+        )
+
+    if scheduler not in SCHEDULERS:
+        raise ValueError(
+            f"Unknown scheduler {scheduler}, should be one of {list(SCHEDULERS)}"
+        )
+
+    components = dict(get_components(model_id, device))
+    components["scheduler"] = SCHEDULERS[scheduler].from_config(
+        components["scheduler"].config
+    )
+
+    return PIPELINES[task](**components)
+
+
+def get_generator(seed: int, device: Optional[str] = None) -> torch.Generator:
+    """
+    Get a seeded random generator for a pipeline.
+
+    Args:
+        seed (int): seed of the generator
+        device (Optional[str]): device of the generator, see get_device if None (default: None)
+
+    Returns:
+        torch.Generator: the seeded generator
+    """
+
+    device = get_device() if device is None else device
+
+    return torch.Generator(device=device).manual_seed(seed)
+
+
+def image_grid(images: List[Image.Image]) -> Image.Image:
+    """
+    Paste images of the same size on a grid as square as possible.
+
+    Args:
+        images (List[Image.Image]): images to paste
+
+    Returns:
+        Image.Image: the grid, or the image itself if there is only one
+    """
+
+    if len(images) == 1:
+        return images[0]
+
+    columns = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+    width, height = images[0].size
+
+    grid = Image.new("RGB", size=(columns * width, rows * height))
+
+    for index, image in enumerate(images):
+        grid.paste(image, box=(index % columns * width, index // columns * height))
+
+    return grid
@@ -0,0 +1,350 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .triton_helper import TritonClient, check_if_model_needs_to_be_preloaded
+
+logger = getLogger(__name__)
+
+# number of embeddings kept in memory by the embedding cache
+EMBEDDING_CACHE_SIZE = int(os.getenv("GLADIA_EMBEDDING_CACHE_SIZE", 100000))
+
+# sqlite database persisting the embedding cache, disabled if empty
+EMBEDDING_CACHE_PATH = os.getenv("GLADIA_EMBEDDING_CACHE_PATH", "")
+
+
+def text_hash(text: str) -> str:
+    """
+    Hash a text for the embedding cache.
+
+    Args:
+        text (str): text to hash
+
+    Returns:
+        str: sha256 of the text
+    """
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache(object):
+    """
+    Cache of the text embeddings, keyed by (model, text hash).
+    The embeddings are kept in a bounded in-memory LRU and optionally persisted in a sqlite database.
+
+    Args:
+        max_size (int): maximum number of embeddings kept in memory
+        path (str): path to the sqlite database, no persistence if empty
+    """
+
+    def __init__(
+        self,
+        max_size: int = EMBEDDING_CACHE_SIZE,
+        path: str = EMBEDDING_CACHE_PATH,
+    ) -> None:
+        """
+        Constructor for EmbeddingCache.
+
+        Args:
+            max_size (int): maximum number of embeddings kept in memory (default: GLADIA_EMBEDDING_CACHE_SIZE or 100000)
+            path (str): path to the sqlite database, no persistence if empty (default: GLADIA_EMBEDDING_CACHE_PATH)
+
+        Returns:
+            None
+        """
+
+        self.max_size = max_size
+        self.embeddings = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self.database = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+            self.database = sqlite3.connect(path, check_same_thread=False)
+            self.database.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT, hash TEXT, embedding BLOB, PRIMARY KEY (model, hash))"
+            )
+            self.database.commit()
+
+    def get(self, key: Tuple[str, str]) -> Optional[np.ndarray]:
+        """
+        Get the embedding of a text.
+
+        Args:
+            key (Tuple[str, str]): (model, text hash)
+
+        Returns:
+            Optional[np.ndarray]: the embedding, None if the text was never embedded by the model
+        """
+
+        with self.lock:
+            if key in self.embeddings:
+                self.embeddings.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self.embeddings[key]
+
+            embedding = None
+            if self.database is not None:
+                row = self.database.execute(
+                    "SELECT embedding FROM embeddings WHERE model = ? AND hash = ?",
+                    key,
+                ).fetchone()
+                embedding = np.frombuffer(row[0], dtype=np.float32) if row else None
+
+            if embedding is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["disk_hits"] += 1
+            self._remember(key, embedding)
+
+            return embedding
+
+    def set(self, items: Dict[Tuple[str, str], np.ndarray]) -> None:
+        """
+        Store the embeddings of texts.
+
+        Args:
+            items (Dict[Tuple[str, str], np.ndarray]): embedding of each (model, text hash)
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            for key, embedding in items.items():
+                self._remember(key, embedding)
+
+            if self.database is not None and items:
+                self.database.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                    [
+                        (*key, embedding.astype(np.float32).tobytes())
+                        for key, embedding in items.items()
+                    ],
+                )
+                self.database.commit()
+
+    def _remember(self, key: Tuple[str, str], embedding: np.ndarray) -> None:
+        """
+        Keep an embedding in memory, evicting the least recently used ones.
+
+        Args:
+            key (Tuple[str, str]): (model, text hash)
+            embedding (np.ndarray): embedding of the text
+
+        Returns:
+            None
+        """
+
+        self.embeddings[key] = embedding
+        self.embeddings.move_to_end(key)
+
+        while len(self.embeddings) > self.max_size:
+            self.embeddings.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get the hit and miss counts of the cache and its hit rate.
+
+        Returns:
+            Dict[str, float]: the counts and the hit rate
+        """
+
+        with self.lock:
+            stats = dict(self.stats)
+
+        lookups = sum(stats.values())
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+
+        return stats
+
+
+class EmbeddingService(object):
+    """
+    Sentence embedding model served by Triton. The texts to embed are sent in a single inference,
+    the ones found in the embedding cache are not embedded again.
+
+    Args:
+        model_name (str): name of the triton model
+        sub_parts (List[str]): triton models the model depends on
+        current_path (str): directory of the model, where its .git_path is
+        cache (Optional[EmbeddingCache]): embedding cache consulted before embedding a text
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        sub_parts: List[str],
+        current_path: str,
+        cache: Optional[EmbeddingCache] = None,
+    ) -> None:
+        """
+        Constructor for EmbeddingService.
+
+        Args:
+            model_name (str): name of the triton model
+            sub_parts (List[str]): triton models the model depends on
+            current_path (str): directory of the model, where its .git_path is
+            cache (Optional[EmbeddingCache]): embedding cache consulted before embedding a text (default: None)
+
+        Returns:
+            None
+        """
+
+        self.model_name = model_name
+        self.cache = cache
+
+        self.client = TritonClient(
+            model_name=model_name,
+            sub_parts=sub_parts,
+            output_name="output",
+            current_path=current_path,
+            preload_model=check_if_model_needs_to_be_preloaded(model_name),
+        )
+
+        # the inputs are registered on the client
+        self.lock = threading.Lock()
+
+        # whether the triton model embeds several texts per inference,
+        # turned off the first time a batch doesn't get one embedding per text
+        self.batching = True
+
+    def run(self, texts: List[str]) -> np.ndarray:
+        """
+        Send texts to the triton model in a single inference.
+
+        Args:
+            texts (List[str]): texts to embed
+
+        Returns:
+            np.ndarray: the output of the model, as float32
+        """
+
+        batch = np.array([text.encode("utf-8") for text in texts], dtype=np.object_)
+
+        with self.lock:
+            self.client.set_input(name="TEXT", shape=batch.shape, datatype="BYTES")
+            embeddings = self.client(batch)[0]
+
+        return np.array(embeddings, dtype=np.float32)
+
+    def infer(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in a single inference, or in one inference per text
+        if the triton model doesn't return one embedding per text of a batch.
+
+        Args:
+            texts (List[str]): texts to embed
+
+        Returns:
+            np.ndarray: embeddings of the texts, one row per text
+
+        Raises:
+            RuntimeError: if the model doesn't return an embedding for a text (if it failed to load for instance)
+        """
+
+        def is_valid(embeddings: np.ndarray, count: int) -> bool:
+            return (
+                embeddings.ndim == 2
+                and embeddings.shape[0] == count
+                and embeddings.shape[1] > 0
+            )
+
+        if self.batching and len(texts) > 1:
+            embeddings = self.run(texts)
+            if is_valid(embeddings, len(texts)):
+                return embeddings
+
+            # the triton client answers [[]] when the model can't be loaded
+            if embeddings.size == 0:
+                raise RuntimeError(f"{self.model_name} returned no embedding")
+
+            logger.warning(
+                f"{self.model_name} returned embeddings of shape {embeddings.shape} for {len(texts)} texts, "
+                "embedding the texts one at a time"
+            )
+            self.batching = False
+
+        embeddings = []
+        for text in texts:
+            embedding = self.run([text])
+
+            # nothing is cached for a text without embedding, so it is embedded again next time
+            if not is_valid(embedding, 1):
+                raise RuntimeError(
+                    f"{self.model_name} returned an embedding of shape {embedding.shape} for a text"
+                )
+
+            embeddings.append(embedding)
+
+        return np.concatenate(embeddings)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, the repeated and already embedded ones being only embedded once.
+
+        Args:
+            texts (List[str]): texts to embed
+
+        Returns:
+            np.ndarray: embeddings of the texts, one row per text
+        """
+
+        keys = [(self.model_name, text_hash(text)) for text in texts]
+
+        embeddings = dict()
+        for key in set(keys):
+            embedding = self.cache.get(key) if self.cache is not None else None
+            if embedding is not None:
+                embeddings[key] = embedding
+
+        to_embed = {
+            key: text for key, text in zip(keys, texts) if key not in embeddings
+        }
+
+        logger.debug(f"Embedding {len(to_embed)} of {len(texts)} texts")
+
+        if to_embed:
+            new_embeddings = dict(
+                zip(to_embed.keys(), self.infer(list(to_embed.values())))
+            )
+
+            if self.cache is not None:
+                self.cache.set(new_embeddings)
+                logger.debug(f"Embedding cache: {self.cache.get_stats()}")
+
+            embeddings.update(new_embeddings)
+
+        return np.stack([embeddings[key] for key in keys])
+
+
+def cosine_similarity_matrix(
+    embeddings_1: np.ndarray, embeddings_2: np.ndarray
+) -> np.ndarray:
+    """
+    Compute the cosine similarity of every pair of embeddings.
+
+    Args:
+        embeddings_1 (np.ndarray): first embeddings, one row per text
+        embeddings_2 (np.ndarray): second embeddings, one row per text
+
+    Returns:
+        np.ndarray: similarity of each first embedding (rows) with each second embedding (columns)
+    """
+
+    def normalize(embeddings: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    return normalize(embeddings_1) @ normalize(embeddings_2).T
@@ -0,0 +1,1109 @@
+import inspect
+import json
+import os
+import threading
+from collections import deque
+from logging import getLogger
+from typing import Any, Iterator, List, Optional, Tuple
+
+import torch
+from torch.nn.utils.rnn import pad_sequence
+from transformers import (
+    AutoConfig,
+    AutoModelForCausalLM,
+    AutoModelForSeq2SeqLM,
+    AutoTokenizer,
+)
+from transformers.modeling_outputs import BaseModelOutput
+
+logger = getLogger(__name__)
+
+# maximum number of requests decoded together by a model
+GENERATION_MAX_BATCH_SIZE = int(os.getenv("GLADIA_GENERATION_MAX_BATCH_SIZE", 16))
+
+# maximum number of tokens (prompts and generated tokens) kept in the KV cache of a model,
+# the requests exceeding it wait for running ones to finish
+GENERATION_MAX_BATCH_TOKENS = int(os.getenv("GLADIA_GENERATION_MAX_BATCH_TOKENS", 8192))
+
+
+def truncate_at_stop(text: str, stop: List[str]) -> str:
+    """
+    Truncate a text before the first stop sequence it contains.
+
+    Args:
+        text (str): text to truncate
+        stop (List[str]): stop sequences
+
+    Returns:
+        str: the text before the first stop sequence
+    """
+
+    positions = [text.find(sequence) for sequence in stop if sequence in text]
+
+    return text[: min(positions)] if positions else text
+
+
+def sample_token(
+    logits: torch.Tensor, temperature: float, top_k: int = 0, top_p: float = 1.0
+) -> int:
+    """
+    Choose the next token from the logits of a sequence.
+
+    Args:
+        logits (torch.Tensor): logits of the next token
+        temperature (float): sampling temperature, greedy decoding if 0
+        top_k (int): only sample from the k most likely tokens, all the tokens if 0 (default: 0)
+        top_p (float): only sample from the most likely tokens whose probabilities sum to top_p (default: 1.0)
+
+    Returns:
+        int: the next token
+    """
+
+    if temperature <= 0:
+        return int(logits.argmax())
+
+    logits = logits / temperature
+
+    if top_k > 0:
+        kth_logit = torch.topk(logits, min(top_k, logits.shape[-1])).values[-1]
+        logits[logits < kth_logit] = -float("inf")
+
+    if top_p < 1.0:
+        sorted_logits, sorted_indices = torch.sort(logits, descending=True)
+        cumulated_probabilities = torch.softmax(sorted_logits, dim=-1).cumsum(dim=-1)
+        # the token crossing top_p is kept
+        removed = cumulated_probabilities > top_p
+        removed[1:] = removed[:-1].clone()
+        removed[0] = False
+        logits[sorted_indices[removed]] = -float("inf")
+
+    return int(torch.multinomial(torch.softmax(logits, dim=-1), num_samples=1))
+
+
+def select_cache(past, indices: torch.Tensor, batch_size: int):
+    """
+    Keep the sequences at the given indices in a KV cache.
+
+    Args:
+        past (Any): KV cache returned by the model, a Cache object or nested tuples of tensors
+        indices (torch.Tensor): indices of the sequences to keep
+        batch_size (int): number of sequences in the cache
+
+    Returns:
+        Any: the KV cache of the kept sequences
+    """
+
+    if hasattr(past, "batch_select_indices"):
+        past.batch_select_indices(indices)
+        return past
+
+    if isinstance(past, torch.Tensor):
+        if past.shape[0] == batch_size:
+            return past.index_select(0, indices)
+
+        # some models (bloom) fold the attention heads into the batch dimension
+        folded = past.view(batch_size, -1, *past.shape[1:])
+        return folded.index_select(0, indices).flatten(0, 1)
+
+    return type(past)(select_cache(item, indices, batch_size) for item in past)
+
+
+def pad_tensor(
+    tensor: torch.Tensor, dim: int, length: int, left: bool = True
+) -> torch.Tensor:
+    """
+    Pad a tensor with zeros along a dimension.
+
+    Args:
+        tensor (torch.Tensor): tensor to pad
+        dim (int): dimension to pad
+        length (int): size of the dimension after padding
+        left (bool): pad before the values if True, after them otherwise (default: True)
+
+    Returns:
+        torch.Tensor: the padded tensor
+    """
+
+    missing = length - tensor.shape[dim]
+
+    if missing <= 0:
+        return tensor
+
+    shape = list(tensor.shape)
+    shape[dim] = missing
+    padding = tensor.new_zeros(shape)
+
+    return torch.cat([padding, tensor] if left else [tensor, padding], dim=dim)
+
+
+def cache_tensors(past) -> List[torch.Tensor]:
+    """
+    List the keys and values of a KV cache, layer by layer.
+
+    Args:
+        past (Any): KV cache returned by the model, a Cache object or nested tuples of tensors
+
+    Returns:
+        List[torch.Tensor]: the keys and values
+    """
+
+    if hasattr(past, "self_attention_cache"):
+        return cache_tensors(past.self_attention_cache) + cache_tensors(
+            past.cross_attention_cache
+        )
+
+    if hasattr(past, "layers"):
+        return [
+            tensor for layer in past.layers for tensor in (layer.keys, layer.values)
+        ]
+
+    if hasattr(past, "to_legacy_cache"):
+        past = past.to_legacy_cache()
+
+    return [tensor for layer in past for tensor in layer]
+
+
+def replace_cache_tensors(past, tensors: List[torch.Tensor]):
+    """
+    Replace the keys and values of a KV cache, Cache objects being updated in place.
+
+    Args:
+        past (Any): KV cache returned by the model, a Cache object or nested tuples of tensors
+        tensors (List[torch.Tensor]): the new keys and values, in the order of cache_tensors
+
+    Returns:
+        Any: the KV cache with the new keys and values
+    """
+
+    if hasattr(past, "self_attention_cache"):
+        count = len(cache_tensors(past.self_attention_cache))
+        past.self_attention_cache = replace_cache_tensors(
+            past.self_attention_cache, tensors[:count]
+        )
+        past.cross_attention_cache = replace_cache_tensors(
+            past.cross_attention_cache, tensors[count:]
+        )
+        return past
+
+    if hasattr(past, "layers"):
+        for index, layer in enumerate(past.layers):
+            layer.keys, layer.values = tensors[2 * index], tensors[2 * index + 1]
+        return past
+
+    legacy = past.to_legacy_cache() if hasattr(past, "to_legacy_cache") else past
+    remaining = iter(tensors)
+    legacy = type(legacy)(tuple(next(remaining) for _ in layer) for layer in legacy)
+
+    if hasattr(past, "to_legacy_cache"):
+        return type(past).from_legacy_cache(legacy)
+
+    return legacy
+
+
+def concat_cache(past, new_past, sequence_dims: List[Optional[int]]):
+    """
+    Append the sequences of a KV cache to the ones of another cache of the same model.
+    The self-attention keys and values are left padded to the same length, like the sequences;
+    the cross-attention ones are right padded, like the encoder states.
+
+    Args:
+        past (Any): KV cache of the first sequences
+        new_past (Any): KV cache of the appended sequences
+        sequence_dims (List[Optional[int]]): sequence dimension of each self-attention tensor of the cache, None for the cross-attention ones
+
+    Returns:
+        Any: the KV cache of all the sequences
+    """
+
+    tensors = []
+
+    for tensor, new_tensor, dim in zip(
+        cache_tensors(past), cache_tensors(new_past), sequence_dims
+    ):
+        left = dim is not None
+
+        if dim is None:
+            # only the length of the encoder states can differ
+            dim = next(
+                (
+                    dim
+                    for dim in range(1, tensor.dim())
+                    if tensor.shape[dim] != new_tensor.shape[dim]
+                ),
+                1,
+            )
+
+        length = max(tensor.shape[dim], new_tensor.shape[dim])
+        tensors.append(
+            torch.cat(
+                [
+                    pad_tensor(tensor, dim, length, left),
+                    pad_tensor(new_tensor, dim, length, left),
+                ]
+            )
+        )
+
+    return replace_cache_tensors(past, tensors)
+
+
+def trim_cache(past, padding: int, sequence_dims: List[Optional[int]]):
+    """
+    Remove the first positions of the self-attention keys and values of a KV cache.
+
+    Args:
+        past (Any): KV cache returned by the model, a Cache object or nested tuples of tensors
+        padding (int): number of positions to remove
+        sequence_dims (List[Optional[int]]): sequence dimension of each self-attention tensor of the cache, None for the cross-attention ones
+
+    Returns:
+        Any: the trimmed KV cache
+    """
+
+    tensors = [
+        tensor
+        if dim is None
+        else tensor.narrow(dim, padding, tensor.shape[dim] - padding)
+        for tensor, dim in zip(cache_tensors(past), sequence_dims)
+    ]
+
+    return replace_cache_tensors(past, tensors)
+
+
+class GenerationRequest(object):
+    """
+    Generation submitted to a ContinuousBatchingScheduler.
+    Iterating over it yields the generated text as the tokens are produced.
+
+    Args:
+        input_ids (List[int]): tokens of the prompt
+        max_new_tokens (int): maximum number of generated tokens
+        temperature (float): sampling temperature, greedy decoding if 0
+        top_k (int): only sample from the k most likely tokens, all the tokens if 0
+        top_p (float): only sample from the most likely tokens whose probabilities sum to top_p
+        stop (List[str]): stop sequences
+    """
+
+    def __init__(
+        self,
+        input_ids: List[int],
+        max_new_tokens: int,
+        temperature: float,
+        top_k: int,
+        top_p: float,
+        stop: List[str],
+    ) -> None:
+        """
+        Constructor for GenerationRequest.
+
+        Args:
+            input_ids (List[int]): tokens of the prompt
+            max_new_tokens (int): maximum number of generated tokens
+            temperature (float): sampling temperature, greedy decoding if 0
+            top_k (int): only sample from the k most likely tokens, all the tokens if 0
+            top_p (float): only sample from the most likely tokens whose probabilities sum to top_p
+            stop (List[str]): stop sequences
+
+        Returns:
+            None
+        """
+
+        self.input_ids = list(input_ids)
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.top_k = top_k
+        self.top_p = top_p
+        self.stop = stop
+
+        self.tokens: List[int] = []
+        self.text = ""
+        # tokens decoded for the previous piece of text, and the first token not sent yet
+        self.prefix_offset = 0
+        self.read_offset = 0
+        self.encoder_state = None
+        self.cancelled = False
+
+        self.pieces = deque()
+        self.condition = threading.Condition()
+        self.done = False
+        self.error = None
+
+    @property
+    def size(self) -> int:
+        """
+        Maximum number of tokens of the request in the KV cache.
+
+        Returns:
+            int: the number of tokens
+        """
+
+        return len(self.input_ids) + self.max_new_tokens + 1
+
+    def push(self, piece: str) -> None:
+        """
+        Add a piece of generated text.
+
+        Args:
+            piece (str): the piece of text
+
+        Returns:
+            None
+        """
+
+        with self.condition:
+            self.pieces.append(piece)
+            self.condition.notify_all()
+
+    def finish(self, error: Optional[Exception] = None) -> None:
+        """
+        Mark the generation as finished.
+
+        Args:
+            error (Optional[Exception]): error that ended the generation (default: None)
+
+        Returns:
+            None
+        """
+
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def cancel(self) -> None:
+        """
+        Stop the generation at the next token, e.g. when the client is gone.
+
+        Returns:
+            None
+        """
+
+        self.cancelled = True
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterate over the generated text as it is produced.
+
+        Returns:
+            Iterator[str]: the pieces of generated text
+        """
+
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pieces or self.done)
+
+                if self.pieces:
+                    piece = self.pieces.popleft()
+                elif self.error is not None:
+                    raise self.error
+                else:
+                    return
+
+            yield piece
+
+    def result(self) -> str:
+        """
+        Wait for the end of the generation.
+
+        Returns:
+            str: the generated text, before the first stop sequence
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.done)
+
+        if self.error is not None:
+            raise self.error
+
+        return truncate_at_stop(self.text, self.stop)
+
+
+class ContinuousBatchingScheduler(object):
+    """
+    Decode loop running in its own thread, generating the tokens of all the requests
+    submitted to a model together.
+
+    The waiting requests join the running batch between two tokens and the finished ones
+    leave it right away, so concurrent requests share each forward pass instead of waiting
+    for each other. Joining requests are prefilled on their own and their KV cache is
+    appended to the one of the batch, both being left padded to the same length; leaving
+    requests are removed from the KV cache. Nothing is recomputed for the running requests.
+
+    Args:
+        model (PreTrainedModel): causal or encoder-decoder language model
+        tokenizer (PreTrainedTokenizer): tokenizer of the model
+        device (str): device of the model
+        max_batch_size (int): maximum number of requests decoded together
+        max_batch_tokens (int): maximum number of tokens in the KV cache
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        device: str,
+        max_batch_size: int = GENERATION_MAX_BATCH_SIZE,
+        max_batch_tokens: int = GENERATION_MAX_BATCH_TOKENS,
+    ) -> None:
+        """
+        Constructor for ContinuousBatchingScheduler.
+
+        Args:
+            model (PreTrainedModel): causal or encoder-decoder language model
+            tokenizer (PreTrainedTokenizer): tokenizer of the model
+            device (str): device of the model
+            max_batch_size (int): maximum number of requests decoded together (default: GLADIA_GENERATION_MAX_BATCH_SIZE or 16)
+            max_batch_tokens (int): maximum number of tokens in the KV cache (default: GLADIA_GENERATION_MAX_BATCH_TOKENS or 8192)
+
+        Returns:
+            None
+        """
+
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+
+        self.is_encoder_decoder = model.config.is_encoder_decoder
+        self.pad_token_id = (
+            tokenizer.pad_token_id
+            if tokenizer.pad_token_id is not None
+            else tokenizer.eos_token_id
+        )
+        self.eos_token_ids = {tokenizer.eos_token_id, model.config.eos_token_id} - {
+            None
+        }
+
+        # left padding shifts the positions of the tokens,
+        # the models with absolute positions need them explicitly
+        self.use_position_ids = (
+            not self.is_encoder_decoder
+            and "position_ids" in inspect.signature(model.forward).parameters
+        )
+
+        self.waiting = deque()
+        self.condition = threading.Condition()
+        self.thread = None
+
+        # sequence dimension of each tensor of the KV cache, known after the first decoded token
+        self.sequence_dims: Optional[List[Optional[int]]] = None
+
+        self.active: List[GenerationRequest] = []
+        self._reset_batch()
+
+    def _reset_batch(self) -> None:
+        """
+        Forget the state of the running batch.
+
+        Returns:
+            None
+        """
+
+        self.past = None
+        self.attention_mask = None
+        self.encoder_hidden_states = None
+        self.encoder_attention_mask = None
+
+    def submit(
+        self,
+        input_ids: List[int],
+        max_new_tokens: int = 50,
+        temperature: float = 0.0,
+        top_k: int = 0,
+        top_p: float = 1.0,
+        stop: Optional[List[str]] = None,
+    ) -> GenerationRequest:
+        """
+        Submit a generation, started as soon as there is room in the running batch.
+
+        Args:
+            input_ids (List[int]): tokens of the prompt
+            max_new_tokens (int): maximum number of generated tokens (default: 50)
+            temperature (float): sampling temperature, greedy decoding if 0 (default: 0.0)
+            top_k (int): only sample from the k most likely tokens, all the tokens if 0 (default: 0)
+            top_p (float): only sample from the most likely tokens whose probabilities sum to top_p (default: 1.0)
+            stop (Optional[List[str]]): stop sequences (default: None)
+
+        Returns:
+            GenerationRequest: the request, to wait for or iterate over
+        """
+
+        request = GenerationRequest(
+            input_ids, max_new_tokens, temperature, top_k, top_p, stop or []
+        )
+
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+            self.waiting.append(request)
+            self.condition.notify()
+
+        return request
+
+    def _run(self) -> None:
+        """
+        Decode loop: admit the waiting requests, compute the next token of every request
+        of the batch and retire the finished ones.
+
+        Returns:
+            None
+        """
+
+        # no_grad is thread local
+        with torch.no_grad():
+            while True:
+                admitted = self._admit()
+                running = self.active[: len(self.active) - len(admitted)]
+
+                try:
+                    logits = []
+
+                    if running:
+                        logits.append(self._decode(running))
+
+                    if admitted:
+                        logits.append(self._prefill(admitted))
+
+                    self._step(torch.cat(logits))
+
+                except Exception as error:
+                    logger.exception("Generation batch failed")
+
+                    for request in self.active:
+                        request.finish(error)
+
+                    self.active = []
+                    self._reset_batch()
+
+    def _admit(self) -> List[GenerationRequest]:
+        """
+        Move waiting requests to the running batch, while the batch limits allow it.
+        Block while there is nothing to generate.
+
+        Returns:
+            List[GenerationRequest]: the admitted requests
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.active or self.waiting)
+
+            admitted = []
+            batch_tokens = sum(request.size for request in self.active)
+
+            while (
+                self.waiting
+                and len(self.active) + len(admitted) < self.max_batch_size
+                # a request larger than the limit still runs, alone
+                and (
+                    not (self.active or admitted)
+                    or batch_tokens + self.waiting[0].size <= self.max_batch_tokens
+                )
+            ):
+                request = self.waiting.popleft()
+                admitted.append(request)
+                batch_tokens += request.size
+
+        self.active.extend(admitted)
+
+        return admitted
+
+    def _forward(
+        self,
+        input_ids: torch.Tensor,
+        attention_mask: torch.Tensor,
+        past=None,
+        encoder_hidden_states: Optional[torch.Tensor] = None,
+        encoder_attention_mask: Optional[torch.Tensor] = None,
+    ) -> Tuple[torch.Tensor, Any]:
+        """
+        Run the model on the next tokens of sequences.
+
+        Args:
+            input_ids (torch.Tensor): next tokens of each sequence
+            attention_mask (torch.Tensor): attention mask of the sequences, including the next tokens
+            past (Any): KV cache of the previous tokens of the sequences (default: None)
+            encoder_hidden_states (Optional[torch.Tensor]): encoder states of the sequences, for encoder-decoder models (default: None)
+            encoder_attention_mask (Optional[torch.Tensor]): attention mask of the encoder states (default: None)
+
+        Returns:
+            Tuple[torch.Tensor, Any]: logits of the token following each sequence and the updated KV cache
+        """
+
+        inputs = {"past_key_values": past, "use_cache": True}
+
+        if self.is_encoder_decoder:
+            inputs.update(
+                {
+                    "encoder_outputs": BaseModelOutput(
+                        last_hidden_state=encoder_hidden_states
+                    ),
+                    "attention_mask": encoder_attention_mask,
+                    "decoder_input_ids": input_ids,
+                    "decoder_attention_mask": attention_mask,
+                }
+            )
+        else:
+            inputs.update({"input_ids": input_ids, "attention_mask": attention_mask})
+
+            if self.use_position_ids:
+                position_ids = (attention_mask.cumsum(dim=-1) - 1).clamp(min=0)
+                inputs["position_ids"] = position_ids[:, -input_ids.shape[1] :]
+
+        outputs = self.model(**inputs)
+
+        return outputs.logits[:, -1, :].float(), outputs.past_key_values
+
+    def _encode(self, requests: List[GenerationRequest]) -> None:
+        """
+        Run the encoder on the prompts of new requests, once for their whole generation.
+
+        Args:
+            requests (List[GenerationRequest]): the new requests
+
+        Returns:
+            None
+        """
+
+        inputs = self.tokenizer.pad(
+            {"input_ids": [request.input_ids for request in requests]},
+            return_tensors="pt",
+        ).to(self.device)
+
+        hidden_states = self.model.get_encoder()(**inputs).last_hidden_state
+
+        for request, states in zip(requests, hidden_states):
+            request.encoder_state = states[: len(request.input_ids)]
+
+    def _prefill(self, admitted: List[GenerationRequest]) -> torch.Tensor:
+        """
+        Prefill the prompts of the requests joining the batch and add them to its KV cache.
+
+        Args:
+            admitted (List[GenerationRequest]): the requests which joined the batch
+
+        Returns:
+            torch.Tensor: logits of the first token of each joining request
+        """
+
+        encoder_hidden_states, encoder_attention_mask = None, None
+
+        if self.is_encoder_decoder:
+            self._encode(admitted)
+
+            states = [request.encoder_state for request in admitted]
+            encoder_hidden_states = pad_sequence(states, batch_first=True)
+            encoder_attention_mask = pad_sequence(
+                [torch.ones(len(state), dtype=torch.long) for state in states],
+                batch_first=True,
+            ).to(self.device)
+
+            sequences = [[self.model.config.decoder_start_token_id]] * len(admitted)
+        else:
+            sequences = [request.input_ids for request in admitted]
+
+        length = max(len(sequence) for sequence in sequences)
+        input_ids = torch.full((len(sequences), length), self.pad_token_id)
+        attention_mask = torch.zeros((len(sequences), length), dtype=torch.long)
+
+        for index, sequence in enumerate(sequences):
+            input_ids[index, length - len(sequence) :] = torch.tensor(sequence)
+            attention_mask[index, length - len(sequence) :] = 1
+
+        attention_mask = attention_mask.to(self.device)
+
+        logger.debug(f"Prefilling {len(sequences)} sequences of up to {length} tokens")
+
+        logits, past = self._forward(
+            input_ids.to(self.device),
+            attention_mask,
+            encoder_hidden_states=encoder_hidden_states,
+            encoder_attention_mask=encoder_attention_mask,
+        )
+
+        if self.past is None:
+            self.past = past
+            self.attention_mask = attention_mask
+            self.encoder_hidden_states = encoder_hidden_states
+            self.encoder_attention_mask = encoder_attention_mask
+        else:
+            self._merge(
+                past, attention_mask, encoder_hidden_states, encoder_attention_mask
+            )
+
+        return logits
+
+    def _merge(
+        self,
+        past,
+        attention_mask: torch.Tensor,
+        encoder_hidden_states: Optional[torch.Tensor],
+        encoder_attention_mask: Optional[torch.Tensor],
+    ) -> None:
+        """
+        Append prefilled sequences to the running batch.
+
+        Args:
+            past (Any): KV cache of the prefilled sequences
+            attention_mask (torch.Tensor): attention mask of the prefilled sequences
+            encoder_hidden_states (Optional[torch.Tensor]): encoder states of the prefilled sequences, for encoder-decoder models
+            encoder_attention_mask (Optional[torch.Tensor]): attention mask of the encoder states
+
+        Returns:
+            None
+        """
+
+        # the positions padded in every running sequence, left by the longest finished ones, are dropped
+        padding = int(self.attention_mask.any(dim=0).int().argmax())
+
+        if padding:
+            self.past = trim_cache(self.past, padding, self.sequence_dims)
+            self.attention_mask = self.attention_mask[:, padding:]
+
+        self.past = concat_cache(self.past, past, self.sequence_dims)
+
+        length = max(self.attention_mask.shape[1], attention_mask.shape[1])
+        self.attention_mask = torch.cat(
+            [
+                pad_tensor(self.attention_mask, 1, length),
+                pad_tensor(attention_mask, 1, length),
+            ]
+        )
+
+        if self.is_encoder_decoder:
+            length = max(
+                self.encoder_hidden_states.shape[1], encoder_hidden_states.shape[1]
+            )
+            self.encoder_hidden_states = torch.cat(
+                [
+                    pad_tensor(self.encoder_hidden_states, 1, length, left=False),
+                    pad_tensor(encoder_hidden_states, 1, length, left=False),
+                ]
+            )
+            self.encoder_attention_mask = torch.cat(
+                [
+                    pad_tensor(self.encoder_attention_mask, 1, length, left=False),
+                    pad_tensor(encoder_attention_mask, 1, length, left=False),
+                ]
+            )
+
+    def _decode(self, running: List[GenerationRequest]) -> torch.Tensor:
+        """
+        Run the model on the last token of each running sequence.
+
+        Args:
+            running (List[GenerationRequest]): the requests of the KV cache, in its order
+
+        Returns:
+            torch.Tensor: logits of the token following each sequence
+        """
+
+        input_ids = torch.tensor(
+            [[request.tokens[-1]] for request in running], device=self.device
+        )
+        self.attention_mask = torch.cat(
+            [self.attention_mask, self.attention_mask.new_ones((len(running), 1))],
+            dim=-1,
+        )
+
+        shapes = None
+
+        if self.sequence_dims is None:
+            shapes = [tensor.shape for tensor in cache_tensors(self.past)]
+
+        logits, self.past = self._forward(
+            input_ids,
+            self.attention_mask,
+            self.past,
+            self.encoder_hidden_states,
+            self.encoder_attention_mask,
+        )
+
+        if shapes is not None:
+            # the self-attention keys and values grow along the sequence dimension,
+            # the cross-attention ones keep the length of the encoder states
+            self.sequence_dims = [
+                next(
+                    (
+                        dim
+                        for dim in range(1, len(shape))
+                        if tensor.shape[dim] != shape[dim]
+                    ),
+                    None,
+                )
+                for shape, tensor in zip(shapes, cache_tensors(self.past))
+            ]
+
+        return logits
+
+    def _detokenize(self, request: GenerationRequest) -> str:
+        """
+        Decode the text of the tokens of a request not sent yet. Only these tokens and the
+        ones of the previous piece, which give their context (e.g. the leading space of
+        sentencepiece tokens), are decoded.
+
+        Args:
+            request (GenerationRequest): the request
+
+        Returns:
+            str: the new piece of text, empty while it ends with an incomplete character
+        """
+
+        prefix = self.tokenizer.decode(
+            request.tokens[request.prefix_offset : request.read_offset],
+            skip_special_tokens=True,
+        )
+        text = self.tokenizer.decode(
+            request.tokens[request.prefix_offset :], skip_special_tokens=True
+        )
+
+        # an incomplete character is only sent once the next token completes it
+        if len(text) <= len(prefix) or text.endswith("\ufffd"):
+            return ""
+
+        request.prefix_offset, request.read_offset = request.read_offset, len(
+            request.tokens
+        )
+
+        return text[len(prefix) :]
+
+    def _step(self, logits: torch.Tensor) -> None:
+        """
+        Choose the next token of each request and retire the finished ones.
+
+        Args:
+            logits (torch.Tensor): logits of the token following each sequence
+
+        Returns:
+            None
+        """
+
+        kept, finished = [], []
+
+        for index, request in enumerate(self.active):
+            token = sample_token(
+                logits[index], request.temperature, request.top_k, request.top_p
+            )
+            request.tokens.append(token)
+
+            piece = self._detokenize(request)
+
+            if piece:
+                request.push(piece)
+                request.text += piece
+
+            if (
+                request.cancelled
+                or token in self.eos_token_ids
+                or len(request.tokens) >= request.max_new_tokens
+                # only the stop sequences ending in the new piece are looked for
+                or piece
+                and any(
+                    sequence in request.text[-(len(piece) + len(sequence) - 1) :]
+                    for sequence in request.stop
+                )
+            ):
+                finished.append(request)
+            else:
+                kept.append(index)
+
+        if kept and finished:
+            batch_size = len(self.active)
+            indices = torch.tensor(kept, device=self.device)
+
+            self.past = select_cache(self.past, indices, batch_size)
+            self.attention_mask = self.attention_mask.index_select(0, indices)
+
+            if self.is_encoder_decoder:
+                self.encoder_hidden_states = self.encoder_hidden_states.index_select(
+                    0, indices
+                )
+                self.encoder_attention_mask = self.encoder_attention_mask.index_select(
+                    0, indices
+                )
+
+        elif not kept:
+            self._reset_batch()
+
+        self.active = [self.active[index] for index in kept]
+
+        for request in finished:
+            request.finish()
+
+
+class TextGenerator(object):
+    """
+    Causal or encoder-decoder language model kept in memory, the generations of concurrent
+    requests being batched together by a ContinuousBatchingScheduler.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of the model
+        device (Optional[str]): device to run the model on, cuda if available if None
+    """
+
+    def __init__(self, checkpoint: str, device: Optional[str] = None) -> None:
+        """
+        Constructor for TextGenerator, loading the model and its tokenizer.
+
+        Args:
+            checkpoint (str): huggingface checkpoint of the model
+            device (Optional[str]): device to run the model on, cuda if available if None (default: None)
+
+        Returns:
+            None
+        """
+
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+        config = AutoConfig.from_pretrained(checkpoint)
+
+        if config.is_encoder_decoder:
+            # T5 models overflow in half precision
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(checkpoint)
+        else:
+            self.model = AutoModelForCausalLM.from_pretrained(
+                checkpoint,
+                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
+            )
+
+        self.model.to(self.device).eval()
+        self.tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+
+        self.scheduler = ContinuousBatchingScheduler(
+            self.model, self.tokenizer, self.device
+        )
+
+    def submit(
+        self,
+        text: str,
+        max_new_tokens: int = 50,
+        temperature: float = 0.9,
+        stop: Optional[List[str]] = None,
+        top_k: int = 0,
+        top_p: float = 1.0,
+    ) -> GenerationRequest:
+        """
+        Submit the generation of a text to the scheduler.
+
+        Args:
+            text (str): prompt
+            max_new_tokens (int): maximum number of generated tokens (default: 50)
+            temperature (float): sampling temperature, greedy decoding if 0 (default: 0.9)
+            stop (Optional[List[str]]): stop sequences, not included in the generated text (default: None)
+            top_k (int): only sample from the k most likely tokens, all the tokens if 0 (default: 0)
+            top_p (float): only sample from the most likely tokens whose probabilities sum to top_p (default: 1.0)
+
+        Returns:
+            GenerationRequest: the request
+        """
+
+        return self.scheduler.submit(
+            self.tokenizer(text)["input_ids"],
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            top_k=top_k,
+            top_p=top_p,
+            stop=stop,
+        )
+
+    def generate(
+        self,
+        text: str,
+        max_new_tokens: int = 50,
+        temperature: float = 0.9,
+        stop: Optional[List[str]] = None,
+        top_k: int = 0,
+        top_p: float = 1.0,
+    ) -> str:
+        """
+        Generate from a text: its continuation for causal models, the output sequence for encoder-decoder ones.
+
+        Args:
+            text (str): prompt
+            max_new_tokens (int): maximum number of generated tokens (default: 50)
+            temperature (float): sampling temperature, greedy decoding if 0 (default: 0.9)
+            stop (Optional[List[str]]): stop sequences, not included in the generated text (default: None)
+            top_k (int): only sample from the k most likely tokens, all the tokens if 0 (default: 0)
+            top_p (float): only sample from the most likely tokens whose probabilities sum to top_p (default: 1.0)
+
+        Returns:
+            str: the generated text
+        """
+
+        return self.submit(
+            text, max_new_tokens, temperature, stop, top_k=top_k, top_p=top_p
+        ).result()
+
+    def stream(
+        self,
+        text: str,
+        max_new_tokens: int = 50,
+        temperature: float = 0.9,
+        stop: Optional[List[str]] = None,
+        top_k: int = 0,
+        top_p: float = 1.0,
+    ) -> Iterator[str]:
+        """
+        Generate from a text, yielding the text as the tokens are produced.
+
+        Args:
+            text (str): prompt
+            max_new_tokens (int): maximum number of generated tokens (default: 50)
+            temperature (float): sampling temperature, greedy decoding if 0 (default: 0.9)
+            stop (Optional[List[str]]): stop sequences, not included in the generated text (default: None)
+            top_k (int): only sample from the k most likely tokens, all the tokens if 0 (default: 0)
+            top_p (float): only sample from the most likely tokens whose probabilities sum to top_p (default: 1.0)
+
+        Returns:
+            Iterator[str]: the pieces of the generated text
+        """
+
+        stop = stop or []
+        request = self.submit(
+            text, max_new_tokens, temperature, stop, top_k=top_k, top_p=top_p
+        )
+
+        # the end of the text is held back while it could be the beginning of a stop sequence
+        held_back = max((len(sequence) for sequence in stop), default=1) - 1
+        text, sent = "", 0
+
+        try:
+            for piece in request:
+                text += piece
+                truncated = truncate_at_stop(text, stop)
+
+                if len(truncated) < len(text):
+                    if len(truncated) > sent:
+                        yield truncated[sent:]
+                    return
+
+                if len(text) - held_back > sent:
+                    yield text[sent : len(text) - held_back]
+                    sent = len(text) - held_back
+
+            if len(text) > sent:
+                yield text[sent:]
+
+        finally:
+            # the client may stop reading before the end of the generation
+            request.cancel()
+
+
+def to_server_sent_events(pieces: Iterator[str]) -> Iterator[str]:
+    """
+    Format the pieces of a generation as server-sent events,
+    a last event with "done" being sent after the last piece.
+
+    Args:
+        pieces (Iterator[str]): pieces of the generated text
+
+    Returns:
+        Iterator[str]: the events
+    """
+
+    for piece in pieces:
+        if piece:
+            yield f"data: {json.dumps({'token': piece}, ensure_ascii=False)}\n\n"
+
+    yield f"data: {json.dumps({'done': True})}\n\n"
@@ -1,7 +1,7 @@
 import os
 import sys
 from logging import getLogger
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from urllib.parse import urlparse
 
 import cv2
@@ -237,25 +237,26 @@ def resize_max_size(
         return np_img
 
 
-def pad_img_to_modulo(
-    img: np.ndarray, mod: int, square: bool = False, min_size: Optional[int] = None
-) -> np.ndarray:
+def get_padded_size(
+    height: int,
+    width: int,
+    mod: int,
+    square: bool = False,
+    min_size: Optional[int] = None,
+) -> Tuple[int, int]:
     """
-    Pad image to a given modulo.
+    Compute the size an image will have once padded by pad_img_to_modulo.
 
     Args:
-        img (np.ndarray): the image to be padded [H, W, C]
+        height (int): the height of the image
+        width (int): the width of the image
         mod (int): the modulo to pad the image
         square (bool): whether to pad the image to a square shape (default: False)
         min_size (Optional[int]): the minimum size of the image (default: None)
-        min_size: the minimum size of the image (default: None)
 
     Returns:
-        np.ndarray: the padded image
+        Tuple[int, int]: the padded (height, width)
     """
-    if len(img.shape) == 2:
-        img = img[:, :, np.newaxis]
-    height, width = img.shape[:2]
     out_height = ceil_modulo(height, mod)
     out_width = ceil_modulo(width, mod)
 
@@ -269,6 +270,32 @@ def pad_img_to_modulo(
         out_height = max_size
         out_width = max_size
 
+    return out_height, out_width
+
+
+def pad_img_to_modulo(
+    img: np.ndarray, mod: int, square: bool = False, min_size: Optional[int] = None
+) -> np.ndarray:
+    """
+    Pad image to a given modulo.
+
+    Args:
+        img (np.ndarray): the image to be padded [H, W, C]
+        mod (int): the modulo to pad the image
+        square (bool): whether to pad the image to a square shape (default: False)
+        min_size (Optional[int]): the minimum size of the image (default: None)
+        min_size: the minimum size of the image (default: None)
+
+    Returns:
+        np.ndarray: the padded image
+    """
+    if len(img.shape) == 2:
+        img = img[:, :, np.newaxis]
+    height, width = img.shape[:2]
+    out_height, out_width = get_padded_size(
+        height, width, mod=mod, square=square, min_size=min_size
+    )
+
     return np.pad(
         img,
         ((0, out_height - height), (0, out_width - width), (0, 0)),
@@ -302,3 +329,129 @@ def boxes_from_mask(mask: np.ndarray) -> List[np.ndarray]:
         boxes.append(box)
 
     return boxes
+
+
+def merge_boxes(boxes: List[np.ndarray], distance: int = 0) -> List[np.ndarray]:
+    """
+    Merge the boxes that overlap or that are closer than a given distance from each other.
+
+    Args:
+        boxes (List[np.ndarray]): the (left,top,right,bottom) boxes to merge
+        distance (int): the distance under which two boxes are considered as neighbours (default: 0)
+
+    Returns:
+        List[np.ndarray]: the merged boxes
+    """
+
+    merged = [np.array(box).astype(int) for box in boxes]
+
+    has_changed = True
+    while has_changed:
+        has_changed = False
+        remaining, merged = merged, []
+
+        while remaining:
+            current = remaining.pop()
+
+            index = 0
+            while index < len(remaining):
+                other = remaining[index]
+
+                if (
+                    current[0] - distance <= other[2]
+                    and other[0] - distance <= current[2]
+                    and current[1] - distance <= other[3]
+                    and other[1] - distance <= current[3]
+                ):
+                    current = np.concatenate(
+                        (
+                            np.minimum(current[:2], other[:2]),
+                            np.maximum(current[2:], other[2:]),
+                        )
+                    )
+                    remaining.pop(index)
+                    has_changed = True
+                else:
+                    index += 1
+
+            merged.append(current)
+
+    return merged
+
+
+def feather_window(
+    height: int, width: int, feather: int, edges: Tuple[bool, bool, bool, bool]
+) -> np.ndarray:
+    """
+    Build a blending window equal to 1 in its center and linearly decreasing towards the given edges.
+
+    Args:
+        height (int): the height of the window
+        width (int): the width of the window
+        feather (int): the width of the linear ramp in pixels
+        edges (Tuple[bool, bool, bool, bool]): whether to feather the (left,top,right,bottom) edges
+
+    Returns:
+        np.ndarray: the window with shape (height, width, 1) and values in ]0, 1]
+    """
+
+    window = np.ones((height, width), dtype=np.float32)
+
+    if feather <= 0:
+        return window[:, :, np.newaxis]
+
+    ramp_x = np.ones(width, dtype=np.float32)
+    ramp_y = np.ones(height, dtype=np.float32)
+    left, top, right, bottom = edges
+
+    position_x = np.arange(width, dtype=np.float32)
+    position_y = np.arange(height, dtype=np.float32)
+
+    if left:
+        ramp_x = np.minimum(ramp_x, (position_x + 1) / feather)
+    if right:
+        ramp_x = np.minimum(ramp_x, (width - position_x) / feather)
+    if top:
+        ramp_y = np.minimum(ramp_y, (position_y + 1) / feather)
+    if bottom:
+        ramp_y = np.minimum(ramp_y, (height - position_y) / feather)
+
+    window = np.minimum(ramp_y[:, np.newaxis], ramp_x[np.newaxis, :])
+
+    return np.clip(window, 1.0 / feather, 1.0)[:, :, np.newaxis]
+
+
+def paste_crops(
+    image: np.ndarray, crops: List[Tuple[np.ndarray, List[int]]], feather: int
+) -> np.ndarray:
+    """
+    Paste the inpainted crops back into the image, blending the crops borders and their overlaps.
+
+    Args:
+        image (np.ndarray): the image to paste the crops into with shape (H, W, C)
+        crops (List[Tuple[np.ndarray, List[int]]]): the crops and their (left,top,right,bottom) box
+        feather (int): the width of the blending ramp on the crops borders in pixels
+
+    Returns:
+        np.ndarray: the image with the crops pasted in
+    """
+
+    img_h, img_w = image.shape[:2]
+
+    accumulated = np.zeros(image.shape, dtype=np.float32)
+    weights = np.zeros((img_h, img_w, 1), dtype=np.float32)
+
+    for crop, (l, t, r, b) in crops:
+        # the borders touching the image borders have no neighbour to blend with
+        window = feather_window(
+            b - t, r - l, feather, edges=(l > 0, t > 0, r < img_w, b < img_h)
+        )
+        accumulated[t:b, l:r] += crop.astype(np.float32) * window
+        weights[t:b, l:r] += window
+
+    # fade to the original image where the crops weights do not sum up to 1
+    result = (
+        accumulated + image.astype(np.float32) * np.clip(1.0 - weights, 0.0, 1.0)
+    ) / np.maximum(weights, 1.0)
+
+    return np.clip(result + 0.5, 0, 255).astype(image.dtype)
@@ -1,12 +1,21 @@
 import abc
+from collections import defaultdict
 from logging import getLogger
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
 import torch
 
-from ..helper import boxes_from_mask, pad_img_to_modulo, resize_max_size
+from ...tiling import tiled_inference
+from ..helper import (
+    boxes_from_mask,
+    get_padded_size,
+    merge_boxes,
+    pad_img_to_modulo,
+    paste_crops,
+    resize_max_size,
+)
 from ..schema import Config, HDStrategy
 
 logger = getLogger(__name__)
@@ -82,6 +91,25 @@ class InpaintModel:
         """
         ...
 
+    def forward_batch(
+        self, images: List[np.ndarray], masks: List[np.ndarray], config: Config
+    ) -> List[np.ndarray]:
+        """
+        Run forward on a batch of images sharing the same size.
+        Models able to process several images at once should override this method,
+        the default implementation runs forward on each image sequentially.
+
+        Args:
+            images (List[np.ndarray]): Original Images representation in numpy array with [H, W, C] RGB format with values in [0, 255] range.
+            masks (List[np.ndarray]): Mask Images representation in numpy array with [H, W, 1] format with values in [0, 255] range.
+            config (Config): Config object used for the model containing all the parameters (see schema.py)
+
+        Returns:
+            List[np.ndarray]: Inpainted images with [H, W, C] BGR format with values in [0, 255] range.
+        """
+
+        return [self.forward(image, mask, config) for image, mask in zip(images, masks)]
+
     def _pad_forward(
         self, image: np.ndarray, mask: np.ndarray, config: Config
     ) -> torch.Tensor:
@@ -137,16 +165,11 @@ class InpaintModel:
         if config.hd_strategy == HDStrategy.CROP:
             if max(image.shape) > config.hd_strategy_crop_trigger_size:
                 logger.debug(f"Run crop strategy")
-                boxes = boxes_from_mask(mask)
-                crop_result = []
-                for box in boxes:
-                    crop_image, crop_box = self._run_box(image, mask, box, config)
-                    crop_result.append((crop_image, crop_box))
-
-                inpaint_result = image[:, :, ::-1]
-                for crop_image, crop_box in crop_result:
-                    x1, y1, x2, y2 = crop_box
-                    inpaint_result[y1:y2, x1:x2, :] = crop_image
+                # boxes closer than the crop margin would end up in overlapping crops
+                boxes = merge_boxes(
+                    boxes_from_mask(mask), distance=config.hd_strategy_crop_margin
+                )
+                inpaint_result = self._run_boxes(image, mask, boxes, config)
 
         elif config.hd_strategy == HDStrategy.RESIZE:
             if max(image.shape) > config.hd_strategy_resize_limit:
@@ -176,6 +199,13 @@ class InpaintModel:
                     original_pixel_indices
                 ]
 
+        elif config.hd_strategy == HDStrategy.TILE:
+            if max(image.shape) > config.hd_strategy_tile_size:
+                logger.debug(
+                    f"Run tile strategy, origin size: {image.shape} tile size: {config.hd_strategy_tile_size}"
+                )
+                inpaint_result = self._run_tiles(image, mask, config)
+
         if inpaint_result is None:
             inpaint_result = self._pad_forward(image, mask, config)
 
@@ -256,3 +286,168 @@ class InpaintModel:
         crop_img, crop_mask, [l, t, r, b] = self._crop_box(image, mask, box, config)
 
         return self._pad_forward(crop_img, crop_mask, config), [l, t, r, b]
+
+    def _pad_forward_batch(
+        self, images: List[np.ndarray], masks: List[np.ndarray], config: Config
+    ) -> List[np.ndarray]:
+        """
+        Pad images and masks to be divisible by self.pad_mod and run forward on all of them at once.
+        All the images must have the same size once padded.
+
+        Args:
+            images (List[np.ndarray]): Original Images representation in numpy array with [H, W, C] RGB format with values in [0, 255] range.
+            masks (List[np.ndarray]): Mask Images representation in numpy array with [H, W, 1] format with values in [0, 255] range.
+            config (Config): Config object used for the model containing all the parameters (see schema.py)
+
+        Returns:
+            List[np.ndarray]: Inpainted images with [H, W, C] BGR format with values in [0, 255] range.
+        """
+
+        pad_images = [
+            pad_img_to_modulo(
+                image,
+                mod=self.pad_mod,
+                square=self.pad_to_square,
+                min_size=self.min_size,
+            )
+            for image in images
+        ]
+        pad_masks = [
+            pad_img_to_modulo(
+                mask,
+                mod=self.pad_mod,
+                square=self.pad_to_square,
+                min_size=self.min_size,
+            )
+            for mask in masks
+        ]
+
+        logger.debug(f"final forward pad size: {len(pad_images)}x{pad_images[0].shape}")
+
+        results = self.forward_batch(pad_images, pad_masks, config)
+
+        outputs = []
+        for image, mask, result in zip(images, masks, results):
+            origin_height, origin_width = image.shape[:2]
+            result = result[0:origin_height, 0:origin_width, :]
+
+            original_pixel_indices = mask < 127
+            result[original_pixel_indices] = image[:, :, ::-1][original_pixel_indices]
+
+            outputs.append(result)
+
+        return outputs
+
+    def _run_boxes(
+        self,
+        image: np.ndarray,
+        mask: np.ndarray,
+        boxes: List[np.ndarray],
+        config: Config,
+    ) -> np.ndarray:
+        """
+        Crop image and mask around each box, run forward on the crops grouped by padded size
+        and paste the results back into the image.
+
+        Args:
+            image (np.ndarray): Original Image representation in numpy array with [H, W, C] RGB format with values in [0, 255] range.
+            mask (np.ndarray): Mask Image representation in numpy array with [H, W, 1] format with values in [0, 255] range.
+            boxes (List[np.ndarray]): (left,top,right,bottom) boxes coordinates to crop the image and mask to
+            config (Config): Config object used for the model containing all the parameters (see schema.py)
+
+        Returns:
+            np.ndarray: Inpainted image with [H, W, C] BGR format with values in [0, 255] range.
+        """
+
+        crops = [self._crop_box(image, mask, box, config) for box in boxes]
+
+        # crops sharing the same padded size are given to forward_batch together, which runs
+        # them in a single forward for the models overriding it (MAT) and one by one otherwise
+        groups: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for index, (crop_img, _, _) in enumerate(crops):
+            padded_size = get_padded_size(
+                *crop_img.shape[:2],
+                mod=self.pad_mod,
+                square=self.pad_to_square,
+                min_size=self.min_size,
+            )
+            groups[padded_size].append(index)
+
+        batch_size = max(config.hd_strategy_crop_batch_size, 1)
+        crop_results = [None] * len(crops)
+
+        for padded_size, indices in groups.items():
+            logger.debug(f"Run {len(indices)} crops of padded size {padded_size}")
+
+            for start in range(0, len(indices), batch_size):
+                batch = indices[start : start + batch_size]
+
+                results = self._pad_forward_batch(
+                    [crops[index][0] for index in batch],
+                    [crops[index][1] for index in batch],
+                    config,
+                )
+
+                for index, result in zip(batch, results):
+                    crop_results[index] = (result, crops[index][2])
+
+        return paste_crops(
+            image[:, :, ::-1], crop_results, feather=config.hd_strategy_crop_feather
+        )
+
+    def _run_tiles(
+        self, image: np.ndarray, mask: np.ndarray, config: Config
+    ) -> np.ndarray:
+        """
+        Run forward on overlapping tiles of the image at full resolution and blend the tiles seams.
+        Tiles without any masked pixel are not forwarded.
+
+        Args:
+            image (np.ndarray): Original Image representation in numpy array with [H, W, C] RGB format with values in [0, 255] range.
+            mask (np.ndarray): Mask Image representation in numpy array with [H, W, 1] format with values in [0, 255] range.
+            config (Config): Config object used for the model containing all the parameters (see schema.py)
+
+        Returns:
+            np.ndarray: Inpainted image with [H, W, C] BGR format with values in [0, 255] range.
+        """
+
+        if len(mask.shape) == 3:
+            mask = mask[:, :, 0]
+
+        def inpaint_tiles(tiles: np.ndarray) -> np.ndarray:
+            tile_images, tile_masks = tiles[:, :, :, :3], tiles[:, :, :, 3]
+
+            results = [tile_image[:, :, ::-1] for tile_image in tile_images]
+            masked_indices = [
+                index
+                for index, tile_mask in enumerate(tile_masks)
+                if (tile_mask >= 127).any()
+            ]
+
+            if masked_indices:
+                outputs = self._pad_forward_batch(
+                    [tile_images[index] for index in masked_indices],
+                    [tile_masks[index] for index in masked_indices],
+                    config,
+                )
+                for index, output in zip(masked_indices, outputs):
+                    results[index] = output
+
+            return np.stack(results)
+
+        inpaint_result = tiled_inference(
+            np.concatenate((image, mask[:, :, np.newaxis]), axis=-1),
+            process=inpaint_tiles,
+            tile_size=config.hd_strategy_tile_size,
+            overlap=config.hd_strategy_tile_overlap,
+            batch_size=config.hd_strategy_tile_batch_size,
+            out_channels=3,
+        )
+        inpaint_result = np.clip(inpaint_result + 0.5, 0, 255).astype(np.uint8)
+
+        original_pixel_indices = mask < 127
+        inpaint_result[original_pixel_indices] = image[:, :, ::-1][
+            original_pixel_indices
+        ]
+
+        return inpaint_result
@@ -5,7 +5,13 @@ import numpy as np
 import torch
 from tqdm import tqdm
 
-from .utils import make_ddim_sampling_parameters, make_ddim_timesteps, noise_like
+from .utils import (
+    SCHEDULE_BUFFERS,
+    make_ddim_sampling_parameters,
+    make_ddim_timesteps,
+    noise_like,
+    schedule_cache,
+)
 
 logger = getLogger(__name__)
 
@@ -64,6 +70,16 @@ class DDIMSampler(object):
         Returns:
             None
         """
+        # the schedule buffers are shared by the calls using the same parameters
+        key = schedule_cache.get_key(
+            self.model, ddim_num_steps, ddim_discretize, ddim_eta
+        )
+        cached_buffers = schedule_cache.get(key)
+        if cached_buffers is not None:
+            for name, buffer in cached_buffers.items():
+                self.register_buffer(name, buffer)
+            return
+
         self.ddim_timesteps = make_ddim_timesteps(
             ddim_discr_method=ddim_discretize,
             num_ddim_timesteps=ddim_num_steps,
@@ -119,6 +135,10 @@ class DDIMSampler(object):
             "ddim_sigmas_for_original_num_steps", sigmas_for_original_sampling_steps
         )
 
+        schedule_cache.set(
+            key, {name: getattr(self, name) for name in SCHEDULE_BUFFERS}
+        )
+
     @torch.no_grad()
     def sample(
         self,
@@ -1,5 +1,6 @@
 import os
 from logging import getLogger
+from typing import List
 
 import cv2
 import numpy as np
@@ -110,3 +111,32 @@ class LaMa(InpaintModel):
         cur_res = cv2.cvtColor(cur_res, cv2.COLOR_RGB2BGR)
 
         return cur_res
+
+    def forward_batch(
+        self, images: List[np.ndarray], masks: List[np.ndarray], config: Config
+    ) -> List[np.ndarray]:
+        """
+        Forward pass of the model on a batch of images sharing the same size
+
+        Args:
+            images (List[np.ndarray]): images to be inpainted with shape (H, W, C) RGB
+            masks (List[np.ndarray]): masks of the images with shape (H, W)
+            config (Config): config of the model (see schema.py) (unused)
+
+        Returns:
+            List[np.ndarray]: inpainted images BGR
+        """
+
+        images = np.stack([norm_img(image) for image in images])
+        masks = np.stack([norm_img(mask) for mask in masks])
+
+        masks = (masks > 0) * 1
+        images = torch.from_numpy(images).to(self.device)
+        masks = torch.from_numpy(masks).to(self.device)
+
+        inpainted_images = self.model(images, masks)
+
+        results = inpainted_images.permute(0, 2, 3, 1).detach().cpu().numpy()
+        results = np.clip(results * 255, 0, 255).astype("uint8")
+
+        return [cv2.cvtColor(result, cv2.COLOR_RGB2BGR) for result in results]
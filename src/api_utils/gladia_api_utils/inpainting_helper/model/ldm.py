@@ -9,6 +9,7 @@ logger = getLogger(__name__)
 from ..schema import Config, LDMSampler
 from .base import InpaintModel
 from .ddim_sampler import DDIMSampler
+from .dpm_solver_sampler import DPMSolverSampler
 from .plms_sampler import PLMSSampler
 
 torch.manual_seed(42)
@@ -432,6 +433,8 @@ class LDM(InpaintModel):
             sampler = DDIMSampler(self.model)
         elif config.ldm_sampler == LDMSampler.plms:
             sampler = PLMSSampler(self.model)
+        elif config.ldm_sampler == LDMSampler.dpm_solver:
+            sampler = DPMSolverSampler(self.model)
         else:
             raise ValueError()
 
@@ -3326,3 +3326,44 @@ class MAT(InpaintModel):
         output = output[0].cpu().numpy()
         cur_res = cv2.cvtColor(output, cv2.COLOR_RGB2BGR)
         return cur_res
+
+    def forward_batch(
+        self, images: List[np.ndarray], masks: List[np.ndarray], config: Config
+    ) -> List[np.ndarray]:
+        """
+        Forward function for `MAT` on a batch of images sharing the same size,
+        the latent code being shared by all the images as in `forward`.
+
+        Args:
+            images (List[np.ndarray]): Input images with shape (H, W, C) RGB.
+            masks (List[np.ndarray]): Input masks with shape (H, W) => 0 or 255
+            config (Config): Config object see schema.py
+
+        Returns:
+            List[np.ndarray]: Output images with shape (H, W, C) BGR.
+        """
+
+        images = np.stack([norm_img(image) * 2 - 1 for image in images])
+        masks = np.stack([norm_img(255 - (mask > 127) * 255) for mask in masks])
+
+        images = torch.from_numpy(images).to(self.device)
+        masks = torch.from_numpy(masks).to(self.device)
+
+        outputs = self.model(
+            images,
+            masks,
+            self.z.expand(len(images), -1),
+            self.label.expand(len(images), -1),
+            truncation_psi=1,
+            noise_mode="none",
+        )
+        outputs = (
+            (outputs.permute(0, 2, 3, 1) * 127.5 + 127.5)
+            .round()
+            .clamp(0, 255)
+            .to(torch.uint8)
+        )
+
+        return [
+            cv2.cvtColor(output, cv2.COLOR_RGB2BGR) for output in outputs.cpu().numpy()
+        ]
@@ -6,7 +6,13 @@ import numpy as np
 import torch
 from tqdm import tqdm
 
-from .utils import make_ddim_sampling_parameters, make_ddim_timesteps, noise_like
+from .utils import (
+    SCHEDULE_BUFFERS,
+    make_ddim_sampling_parameters,
+    make_ddim_timesteps,
+    noise_like,
+    schedule_cache,
+)
 
 logger = getLogger(__name__)
 
@@ -70,6 +76,17 @@ class PLMSSampler(object):
 
         if ddim_eta != 0:
             raise ValueError("ddim_eta must be 0 for PLMS")
+
+        # the schedule buffers are shared by the calls using the same parameters
+        key = schedule_cache.get_key(
+            self.model, ddim_num_steps, ddim_discretize, ddim_eta
+        )
+        cached_buffers = schedule_cache.get(key)
+        if cached_buffers is not None:
+            for name, buffer in cached_buffers.items():
+                self.register_buffer(name, buffer)
+            return
+
         self.ddim_timesteps = make_ddim_timesteps(
             ddim_discr_method=ddim_discretize,
             num_ddim_timesteps=ddim_num_steps,
@@ -125,6 +142,10 @@ class PLMSSampler(object):
             "ddim_sigmas_for_original_num_steps", sigmas_for_original_sampling_steps
         )
 
+        schedule_cache.set(
+            key, {name: getattr(self, name) for name in SCHEDULE_BUFFERS}
+        )
+
     @torch.no_grad()
     def sample(
         self,
@@ -1,8 +1,9 @@
 import collections
 import math
+import threading
 from itertools import repeat
 from logging import getLogger
-from typing import Any, Callable, Tuple, Union
+from typing import Any, Callable, Optional, Tuple, Union
 
 import numpy as np
 import torch
@@ -100,6 +101,118 @@ def make_ddim_sampling_parameters(
     return sigmas, alphas, alphas_prev
 
 
+# buffers computed by the samplers make_schedule, cached per schedule
+SCHEDULE_BUFFERS = (
+    "ddim_timesteps",
+    "betas",
+    "alphas_cumprod",
+    "alphas_cumprod_prev",
+    "sqrt_alphas_cumprod",
+    "sqrt_one_minus_alphas_cumprod",
+    "log_one_minus_alphas_cumprod",
+    "sqrt_recip_alphas_cumprod",
+    "sqrt_recipm1_alphas_cumprod",
+    "ddim_sigmas",
+    "ddim_alphas",
+    "ddim_alphas_prev",
+    "ddim_sqrt_one_minus_alphas",
+    "ddim_sigmas_for_original_num_steps",
+)
+
+
+class ScheduleCache:
+    """
+    Bounded LRU cache of the samplers schedules buffers.
+    The schedules only depend on the diffusion model noise schedule and on the sampling
+    parameters, so they can be shared by all the samplers instead of being recomputed per call.
+
+    Args:
+        max_size (int): maximum number of schedules kept in memory (default: 16)
+    """
+
+    def __init__(self, max_size: int = 16) -> None:
+        """
+        Constructor of the ScheduleCache
+
+        Args:
+            max_size (int): maximum number of schedules kept in memory (default: 16)
+
+        Returns:
+            None
+        """
+        self.max_size = max_size
+        self.schedules = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def get_key(
+        model: torch.nn.Module,
+        ddim_num_steps: int,
+        ddim_discretize: str,
+        ddim_eta: float,
+    ) -> Tuple:
+        """
+        Build the key identifying a schedule
+
+        Args:
+            model (torch.nn.Module): diffusion model the schedule is made for
+            ddim_num_steps (int): number of sampling steps
+            ddim_discretize (str): discretization method (uniform, quad)
+            ddim_eta (float): eta parameter of the sampler
+
+        Returns:
+            Tuple: the key of the schedule
+        """
+        return (
+            model.num_timesteps,
+            model.linear_start,
+            model.linear_end,
+            str(model.device),
+            ddim_num_steps,
+            ddim_discretize,
+            float(ddim_eta),
+        )
+
+    def get(self, key: Tuple) -> Optional[dict]:
+        """
+        Get the buffers of a schedule
+
+        Args:
+            key (Tuple): key of the schedule (see get_key)
+
+        Returns:
+            Optional[dict]: buffers of the schedule by name, None if the schedule is not cached
+        """
+        with self.lock:
+            if key not in self.schedules:
+                return None
+
+            self.schedules.move_to_end(key)
+
+            return self.schedules[key]
+
+    def set(self, key: Tuple, buffers: dict) -> None:
+        """
+        Cache the buffers of a schedule
+
+        Args:
+            key (Tuple): key of the schedule (see get_key)
+            buffers (dict): buffers of the schedule by name
+
+        Returns:
+            None
+        """
+        with self.lock:
+            self.schedules[key] = buffers
+            self.schedules.move_to_end(key)
+
+            while len(self.schedules) > self.max_size:
+                self.schedules.popitem(last=False)
+
+
+schedule_cache = ScheduleCache()
+
+
 def make_ddim_timesteps(
     ddim_discr_method: str, num_ddim_timesteps: int, num_ddpm_timesteps: int
 ) -> np.ndarray:
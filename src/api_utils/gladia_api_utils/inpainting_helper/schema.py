@@ -11,6 +11,7 @@ class HDStrategy(str, Enum):
     ORIGINAL = "Original"
     RESIZE = "Resize"
     CROP = "Crop"
+    TILE = "Tile"
 
 
 class LDMSampler(str, Enum):
@@ -20,6 +21,7 @@ class LDMSampler(str, Enum):
 
     ddim = "ddim"
     plms = "plms"
+    dpm_solver = "dpm_solver"
 
 
 class Config(BaseModel):
@@ -34,3 +36,8 @@ class Config(BaseModel):
     hd_strategy_crop_margin: int
     hd_strategy_crop_trigger_size: int
     hd_strategy_resize_limit: int
+    hd_strategy_crop_batch_size: int = 4
+    hd_strategy_crop_feather: int = 32
+    hd_strategy_tile_size: int = 1024
+    hd_strategy_tile_overlap: int = 128
+    hd_strategy_tile_batch_size: int = 2
@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from logging import getLogger
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langid.langid import LanguageIdentifier, model
+
+logger = getLogger(__name__)
+
+# minimum probability of the n-gram detector for its answer to be kept
+LANGUAGE_DETECTION_CONFIDENCE_THRESHOLD = float(
+    os.getenv("GLADIA_LANGUAGE_DETECTION_CONFIDENCE_THRESHOLD", 0.9)
+)
+
+# texts shorter than this number of characters are always sent to the fallback model
+LANGUAGE_DETECTION_MIN_LENGTH = int(
+    os.getenv("GLADIA_LANGUAGE_DETECTION_MIN_LENGTH", 20)
+)
+
+# number of languages returned in the prediction_raw of the n-gram detector
+LANGUAGE_DETECTION_TOP_LANGUAGES = 20
+
+
+class CascadeLanguageDetector(object):
+    """
+    Language detector answering with an in-process character n-gram classifier (langid.py)
+    and escalating to a slower, more accurate model only when the n-gram classifier is unsure
+    or when the text is too short for character n-grams to be reliable.
+
+    Args:
+        fallback (Callable[[str], Dict[str, float]]): model returning the probability of each language of a text
+        threshold (float): minimum probability of the n-gram detector for its answer to be kept
+        min_length (int): texts shorter than this number of characters are always escalated
+        languages (Optional[List[str]]): ISO 639-1 codes the n-gram detector is restricted to, all if None
+    """
+
+    def __init__(
+        self,
+        fallback: Callable[[str], Dict[str, float]],
+        threshold: float = LANGUAGE_DETECTION_CONFIDENCE_THRESHOLD,
+        min_length: int = LANGUAGE_DETECTION_MIN_LENGTH,
+        languages: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Constructor for CascadeLanguageDetector, loading the n-gram model.
+
+        Args:
+            fallback (Callable[[str], Dict[str, float]]): model returning the probability of each language of a text
+            threshold (float): minimum probability of the n-gram detector for its answer to be kept (default: GLADIA_LANGUAGE_DETECTION_CONFIDENCE_THRESHOLD or 0.9)
+            min_length (int): texts shorter than this number of characters are always escalated (default: GLADIA_LANGUAGE_DETECTION_MIN_LENGTH or 20)
+            languages (Optional[List[str]]): ISO 639-1 codes the n-gram detector is restricted to, all if None (default: None)
+
+        Returns:
+            None
+        """
+
+        self.fallback = fallback
+        self.threshold = threshold
+        self.min_length = min_length
+
+        # normalized probabilities are needed to compare the confidence to the threshold
+        self.identifier = LanguageIdentifier.from_modelstring(model, norm_probs=True)
+        if languages:
+            self.identifier.set_languages(languages)
+
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "short_text_escalations": 0,
+            "low_confidence_escalations": 0,
+            "ngram_seconds": 0.0,
+            "fallback_seconds": 0.0,
+        }
+
+    def detect(self, text: str) -> Tuple[str, Dict[str, float]]:
+        """
+        Detect the language of a text.
+
+        Args:
+            text (str): text to detect the language of
+
+        Returns:
+            Tuple[str, Dict[str, float]]: the detected language and the probability of each language
+        """
+
+        start = time.perf_counter()
+        ranking = self.identifier.rank(text)
+        ngram_seconds = time.perf_counter() - start
+
+        language, confidence = ranking[0]
+
+        escalation = None
+        if len(text.strip()) < self.min_length:
+            escalation = "short_text_escalations"
+        elif confidence < self.threshold:
+            escalation = "low_confidence_escalations"
+
+        fallback_seconds = 0.0
+        if escalation is None:
+            scores = dict(ranking[:LANGUAGE_DETECTION_TOP_LANGUAGES])
+        else:
+            logger.debug(
+                f"Escalating language detection ({escalation}): {language} at {confidence:.3f}"
+            )
+
+            start = time.perf_counter()
+            scores = self.fallback(text)
+            fallback_seconds = time.perf_counter() - start
+
+            language = max(scores, key=scores.get)
+
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["ngram_seconds"] += ngram_seconds
+            self.stats["fallback_seconds"] += fallback_seconds
+            if escalation is not None:
+                self.stats[escalation] += 1
+
+        return language, scores
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get the number of requests, how many were escalated to the fallback model and why,
+        the escalation rate and the mean latency of both stages.
+
+        Returns:
+            Dict[str, float]: the counts, the escalation rate and the mean latencies in seconds
+        """
+
+        with self.lock:
+            stats = dict(self.stats)
+
+        escalations = (
+            stats["short_text_escalations"] + stats["low_confidence_escalations"]
+        )
+
+        ngram_seconds = stats.pop("ngram_seconds")
+        fallback_seconds = stats.pop("fallback_seconds")
+
+        stats["escalations"] = escalations
+        stats["escalation_rate"] = (
+            escalations / stats["requests"] if stats["requests"] else 0.0
+        )
+        stats["ngram_mean_seconds"] = (
+            ngram_seconds / stats["requests"] if stats["requests"] else 0.0
+        )
+        stats["fallback_mean_seconds"] = (
+            fallback_seconds / escalations if escalations else 0.0
+        )
+
+        return stats
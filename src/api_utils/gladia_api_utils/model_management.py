@@ -4,6 +4,7 @@ import sys
 import threading
 from logging import getLogger
 from pathlib import Path
+from typing import Any, Callable
 from urllib.parse import urlparse
 
 from git import Repo
@@ -22,6 +23,10 @@ logger = getLogger(__name__)
 
 GLADIA_TMP_MODEL_PATH = os.getenv("GLADIA_TMP_MODEL_PATH", "/tmp/gladia/models")
 
+resident_models = dict()
+resident_models_locks = dict()
+resident_models_lock = threading.Lock()
+
 
 def __download_huggingface_model(
     url: str,
@@ -243,3 +248,44 @@ def download_models(model_list: dict) -> dict:
         t.join()
 
     return output
+
+
+def load_resident_model(key: str, loader: Callable[[], Any]) -> Any:
+    """
+    Load a model only once per process and keep it in memory for the next calls.
+    Model modules are re-executed for each request, so they can't keep their models
+    in their own globals: the models are kept here instead, indexed by key.
+
+    Args:
+        key (str): unique key identifying the model (and its loading options)
+        loader (Callable[[], Any]): function loading the model, only called if the key is not loaded yet
+
+    Returns:
+        Any: the loaded model
+    """
+
+    with resident_models_lock:
+        lock = resident_models_locks.setdefault(key, threading.Lock())
+
+    # a lock per key so that a slow loading doesn't block the other models
+    with lock:
+        if key not in resident_models:
+            logger.info(f"Loading resident model {key}")
+            resident_models[key] = loader()
+
+    return resident_models[key]
+
+
+def unload_resident_model(key: str) -> None:
+    """
+    Remove a model from the resident models, freeing its memory once it's not used anymore.
+
+    Args:
+        key (str): unique key identifying the model
+
+    Returns:
+        None
+    """
+
+    with resident_models_lock:
+        resident_models.pop(key, None)
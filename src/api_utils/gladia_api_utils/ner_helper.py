@@ -0,0 +1,310 @@
+import json
+import os
+import threading
+from logging import getLogger
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from transformers import AutoTokenizer
+
+from .triton_helper import TritonClient, check_if_model_needs_to_be_preloaded
+from .truecase_helper import restore_case
+
+logger = getLogger(__name__)
+
+# number of characters of the windows a document is split into, most windows
+# of this size fit in the tokens of the model, the others being split again
+NER_WINDOW_SIZE = int(os.getenv("GLADIA_NER_WINDOW_SIZE", 1000))
+
+# maximum number of tokens of a window, the 512 tokens of the BERT models
+# minus the [CLS] and [SEP] tokens added by the model
+NER_MAX_TOKENS = int(os.getenv("GLADIA_NER_MAX_TOKENS", 510))
+
+# number of characters shared by two consecutive windows
+NER_WINDOW_OVERLAP = int(os.getenv("GLADIA_NER_WINDOW_OVERLAP", 200))
+
+# maximum number of windows sent in a single inference
+NER_MAX_BATCH_SIZE = int(os.getenv("GLADIA_NER_MAX_BATCH_SIZE", 64))
+
+
+def split_windows(
+    text: str,
+    window_size: int = NER_WINDOW_SIZE,
+    overlap: int = NER_WINDOW_OVERLAP,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    max_tokens: int = NER_MAX_TOKENS,
+) -> List[Tuple[int, int]]:
+    """
+    Split a text into overlapping windows, cut on whitespaces when possible.
+    The windows with more tokens than the model can take are shortened until they fit.
+
+    Args:
+        text (str): text to split
+        window_size (int): maximum number of characters of a window (default: GLADIA_NER_WINDOW_SIZE or 1000)
+        overlap (int): number of characters shared by two consecutive windows (default: GLADIA_NER_WINDOW_OVERLAP or 200)
+        count_tokens (Optional[Callable[[str], int]]): function counting the tokens of a text, the windows aren't checked if None (default: None)
+        max_tokens (int): maximum number of tokens of a window (default: GLADIA_NER_MAX_TOKENS or 510)
+
+    Returns:
+        List[Tuple[int, int]]: start and end character of each window
+    """
+
+    windows = []
+    start = 0
+
+    while True:
+        end = min(start + window_size, len(text))
+
+        # the window isn't cut in the middle of a word, unless the word fills it
+        if end < len(text):
+            space = text.rfind(" ", start + overlap + 1, end)
+            end = space if space > 0 else end
+
+        # dense texts (numbers, urls, non latin scripts) have more tokens per character
+        while count_tokens is not None and end - start > 1:
+            tokens = count_tokens(text[start:end])
+            if tokens <= max_tokens:
+                break
+
+            shorter = start + max(1, (end - start) * max_tokens * 9 // (tokens * 10))
+            space = text.rfind(" ", start + (shorter - start) // 2 + 1, shorter)
+            end = space if space > 0 else shorter
+
+        windows.append((start, end))
+
+        if end >= len(text):
+            return windows
+
+        # the next window starts on a word, within the overlap, at most half of a shortened window
+        next_start = max(end - min(overlap, (end - start) // 2), start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space >= 0 else next_start
+
+
+def group_entities(tokens: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """
+    Aggregate token-level B-/I- predictions into entity spans, the tokens of a same
+    entity being consecutive, of the same type and only separated by whitespaces.
+
+    Args:
+        tokens (List[Dict[str, Any]]): the "entity", "score", "start" and "end" of each token
+        text (str): the text the offsets are relative to
+
+    Returns:
+        List[Dict[str, Any]]: the "entity_group", "score" (mean of its tokens), "word", "start" and "end" of each entity
+    """
+
+    groups: List[List[Dict[str, Any]]] = []
+
+    for token in sorted(tokens, key=lambda token: token["start"]):
+        if token["entity"] == "O":
+            continue
+
+        prefix, _, entity_type = token["entity"].rpartition("-")
+
+        previous = groups[-1][-1] if groups else None
+        if (
+            previous is not None
+            and prefix != "B"
+            and previous["entity"].rpartition("-")[2] == entity_type
+            and not text[previous["end"] : token["start"]].strip()
+        ):
+            groups[-1].append(token)
+        else:
+            groups.append([token])
+
+    return [
+        {
+            "entity_group": group[0]["entity"].rpartition("-")[2],
+            "score": float(np.mean([token["score"] for token in group])),
+            "word": text[group[0]["start"] : group[-1]["end"]],
+            "start": group[0]["start"],
+            "end": group[-1]["end"],
+        }
+        for group in groups
+    ]
+
+
+def merge_windows(
+    windows: List[Tuple[int, int]], windows_entities: List[List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Merge the entities of overlapping windows, the offsets being moved to the document.
+    An overlap is split in its middle: each window keeps the entities starting in its part,
+    which are the ones it saw with the most context.
+
+    Args:
+        windows (List[Tuple[int, int]]): start and end character of each window in the document
+        windows_entities (List[List[Dict[str, Any]]]): the entities of each window, offsets relative to the window
+
+    Returns:
+        List[Dict[str, Any]]: the entities of the document
+    """
+
+    entities = []
+
+    for index, ((start, end), window_entities) in enumerate(
+        zip(windows, windows_entities)
+    ):
+        low = (windows[index - 1][1] + start) // 2 if index > 0 else 0
+        high = (end + windows[index + 1][0]) // 2 if index < len(windows) - 1 else end
+
+        for entity in window_entities:
+            entity = {
+                **entity,
+                "start": entity["start"] + start,
+                "end": entity["end"] + start,
+            }
+            if low <= entity["start"] < high:
+                entities.append(entity)
+
+    return entities
+
+
+class TritonNERService(object):
+    """
+    Named entity recognition over documents of any length with a token classification model
+    served by Triton. The documents are split into overlapping windows, all sent in a single
+    inference, and their entities are merged back with offsets relative to the documents.
+
+    Args:
+        model_name (str): name of the triton model
+        sub_parts (List[str]): triton models the model depends on
+        current_path (str): directory of the model, where its .git_path is
+        tokenizer_name (str): huggingface checkpoint of the tokenizer of the model, counting the tokens of the windows
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        sub_parts: List[str],
+        current_path: str,
+        tokenizer_name: str,
+    ) -> None:
+        """
+        Constructor for TritonNERService.
+
+        Args:
+            model_name (str): name of the triton model
+            sub_parts (List[str]): triton models the model depends on
+            current_path (str): directory of the model, where its .git_path is
+            tokenizer_name (str): huggingface checkpoint of the tokenizer of the model, counting the tokens of the windows
+
+        Returns:
+            None
+        """
+
+        self.client = TritonClient(
+            model_name=model_name,
+            sub_parts=sub_parts,
+            output_name="output",
+            current_path=current_path,
+            preload_model=check_if_model_needs_to_be_preloaded(model_name),
+        )
+
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True)
+
+        # the inputs are registered on the client
+        self.lock = threading.Lock()
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the tokens of a text, without the special tokens added by the model.
+
+        Args:
+            text (str): text to count the tokens of
+
+        Returns:
+            int: number of tokens of the text
+        """
+
+        return len(self.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def infer(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Recognize the entities of texts fitting in the model, in a single inference.
+
+        Args:
+            texts (List[str]): texts to recognize the entities of
+
+        Returns:
+            List[List[Dict[str, Any]]]: the entities of each text, grouped into spans
+
+        Raises:
+            RuntimeError: if the model didn't return the entities of every text
+        """
+
+        batch = np.array([text.encode("utf-8") for text in texts], dtype=np.object_)
+
+        with self.lock:
+            self.client.set_input(name="TEXT", shape=batch.shape, datatype="BYTES")
+            output = self.client(batch)[0]
+
+        # the predictions of the batch are json encoded, in one or several elements
+        elements = output if isinstance(output, list) else [output]
+        predictions = [
+            prediction
+            for element in np.array(elements, dtype=np.object_).flatten()
+            for prediction in json.loads(element.decode("utf-8"))
+        ]
+
+        if len(predictions) != len(texts):
+            raise RuntimeError(
+                f"Got the entities of {len(predictions)} texts instead of {len(texts)}"
+            )
+
+        # the token-level predictions are aggregated into spans
+        return [
+            group_entities(entities, text)
+            if entities and "entity_group" not in entities[0]
+            else entities
+            for text, entities in zip(texts, predictions)
+        ]
+
+    def recognize(self, documents: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Recognize the entities of documents of any length.
+
+        Args:
+            documents (List[str]): documents to recognize the entities of
+
+        Returns:
+            List[List[Dict[str, Any]]]: the "entity_group", "score", "word", "start" and "end"
+                of each entity of each document, offsets relative to the document
+        """
+
+        # only the case is restored so the offsets are the ones of the documents,
+        # the words of the entities being taken from the documents as they were sent
+        cased_documents = [restore_case(document) for document in documents]
+
+        windows = [
+            split_windows(document, count_tokens=self.count_tokens)
+            for document in cased_documents
+        ]
+        texts = [
+            document[start:end]
+            for document, document_windows in zip(cased_documents, windows)
+            for start, end in document_windows
+        ]
+
+        logger.debug(
+            f"Recognizing entities of {len(documents)} documents in {len(texts)} windows"
+        )
+
+        texts_entities = []
+        for start in range(0, len(texts), NER_MAX_BATCH_SIZE):
+            texts_entities += self.infer(texts[start : start + NER_MAX_BATCH_SIZE])
+
+        entities = []
+        for document, document_windows in zip(documents, windows):
+            document_entities = merge_windows(
+                document_windows, texts_entities[: len(document_windows)]
+            )
+            texts_entities = texts_entities[len(document_windows) :]
+
+            for entity in document_entities:
+                entity["word"] = document[entity["start"] : entity["end"]]
+
+            entities.append(document_entities)
+
+        return entities
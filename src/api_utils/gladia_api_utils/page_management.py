@@ -0,0 +1,54 @@
+import os
+from io import BytesIO
+from logging import getLogger
+from typing import List, Union
+
+import pypdfium2 as pdfium
+from PIL import Image, ImageSequence
+
+logger = getLogger(__name__)
+
+# resolution used to render the pdf pages
+PDF_DPI = 200
+
+
+def is_pdf_buffer(buffer: bytes) -> bool:
+    """
+    Check if a buffer contains a pdf document.
+
+    Args:
+        buffer (bytes): buffer to check
+
+    Returns:
+        bool: True if the buffer is a pdf document, False otherwise
+    """
+
+    return buffer[:4] == b"%PDF"
+
+
+def get_pages(document: Union[bytes, str], dpi: int = PDF_DPI) -> List[Image.Image]:
+    """
+    Get the pages of a document: each page of a pdf, each frame of a multi-frame image (tiff, gif)
+    or the image itself.
+
+    Args:
+        document (Union[bytes, str]): the image or pdf, or the path to it
+        dpi (int): resolution used to render the pdf pages (default: 200)
+
+    Returns:
+        List[Image.Image]: the RGB pages
+    """
+
+    if isinstance(document, str) and os.path.isfile(document):
+        with open(document, "rb") as f:
+            document = f.read()
+
+    if is_pdf_buffer(document):
+        pdf = pdfium.PdfDocument(document)
+
+        logger.debug(f"Rendering {len(pdf)} pdf pages at {dpi} dpi")
+
+        return [page.render(scale=dpi / 72).to_pil().convert("RGB") for page in pdf]
+
+    with Image.open(BytesIO(document)) as frames:
+        return [frame.convert("RGB") for frame in ImageSequence.Iterator(frames)]
@@ -2,7 +2,10 @@ import importlib.util
 import json
 import os
 import sys
+import traceback
 import urllib.parse
+from types import ModuleType
+from typing import Any
 
 from PIL import Image
 
@@ -12,19 +15,32 @@ python <PATH_TO_FILE>/run_process.py <module_path> <model> <output_tmp_result> <
     - model : the targeted model name (for instance `ageitgey`)
     - output_tmp_result : the path to where the results will be written (for example `/tmp/tmpo8q0coqe`)
     - kwargs : a dictionary encoded with `urllib.parse.quote()`. Keywords argument are needed for the `predict` function (for instance `{'image': '/tmp/tmp342by415'}` is encoded into `%257B%2522image%2522%253A%2520%2522/tmp/tmp342by415%2522%257D`)
+
+python <PATH_TO_FILE>/run_process.py --worker <module_path> <model>
+    - starts a persistent worker loading the model module once then reading one json request per line on stdin
+      ({"output_tmp_result": ..., "kwargs": {...}}) and answering one json line ({"status": "ok"} or {"status": "error", "message": ...})
+
+The inputs rejected by predict with a ValueError are answered with {"status": "invalid", "message": ...},
+or make the process exit with the code INVALID_INPUT_EXIT_CODE.
 """
 
-if __name__ == "__main__":
+WORKER_FLAG = "--worker"
 
-    if len(sys.argv) < 5:
-        print("Not enough arguments. Please read usage below.", HELP_STRING)
+# exit code of a subprocess whose predict rejected its inputs with a ValueError
+INVALID_INPUT_EXIT_CODE = 3
 
-        sys.exit(1)
 
-    module_path = sys.argv[1]
-    model = sys.argv[2]
-    output_tmp_result = sys.argv[3]
-    kwargs = json.loads(urllib.parse.unquote(sys.argv[4]))
+def load_module(module_path: str, model: str) -> ModuleType:
+    """
+    Load the module of a model.
+
+    Args:
+        module_path (str): path to the module, relative to PATH_TO_GLADIA_SRC if not absolute
+        model (str): name of the model
+
+    Returns:
+        ModuleType: the loaded module
+    """
 
     PATH_TO_GLADIA_SRC = os.getenv("PATH_TO_GLADIA_SRC", "/app")
 
@@ -49,7 +65,20 @@ if __name__ == "__main__":
 
     spec.loader.exec_module(this_module)
 
-    output = this_module.predict(**kwargs)
+    return this_module
+
+
+def write_output(output: Any, output_tmp_result: str) -> None:
+    """
+    Write the output of a predict function to the result file.
+
+    Args:
+        output (Any): output of the predict function
+        output_tmp_result (str): path to where the result will be written
+
+    Returns:
+        None
+    """
 
     if isinstance(output, Image.Image):
         output.save(f"{output_tmp_result}", format="PNG")
@@ -59,3 +88,71 @@ if __name__ == "__main__":
     else:
         with open(f"{output_tmp_result}", "w") as f:
             f.write(str(output))
+
+
+def serve(module_path: str, model: str) -> None:
+    """
+    Serve predict requests read from stdin until stdin is closed.
+    The module (and the models it keeps in memory) is loaded only once.
+
+    Args:
+        module_path (str): path to the module
+        model (str): name of the model
+
+    Returns:
+        None
+    """
+
+    # keep the real stdout for the answers and send everything
+    # printed by the model (python or native code) to stderr
+    answers = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    this_module = load_module(module_path, model)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        try:
+            request = json.loads(line)
+            output = this_module.predict(**request["kwargs"])
+            write_output(output, request["output_tmp_result"])
+            answer = {"status": "ok"}
+        except ValueError as error:
+            answer = {"status": "invalid", "message": str(error)}
+        except Exception as error:
+            traceback.print_exc()
+            answer = {"status": "error", "message": f"{type(error).__name__}: {error}"}
+
+        answers.write(json.dumps(answer) + "\n")
+        answers.flush()
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) == 4 and sys.argv[1] == WORKER_FLAG:
+        serve(module_path=sys.argv[2], model=sys.argv[3])
+
+        sys.exit(0)
+
+    if len(sys.argv) < 5:
+        print("Not enough arguments. Please read usage below.", HELP_STRING)
+
+        sys.exit(1)
+
+    module_path = sys.argv[1]
+    model = sys.argv[2]
+    output_tmp_result = sys.argv[3]
+    kwargs = json.loads(urllib.parse.unquote(sys.argv[4]))
+
+    this_module = load_module(module_path, model)
+
+    try:
+        output = this_module.predict(**kwargs)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+
+        sys.exit(INVALID_INPUT_EXIT_CODE)
+
+    write_output(output, output_tmp_result)
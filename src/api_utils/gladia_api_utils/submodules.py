@@ -4,6 +4,7 @@ import os
 import subprocess
 import sys
 import tempfile
+import threading
 import urllib.parse
 from logging import getLogger
 from pathlib import Path
@@ -17,10 +18,13 @@ import yaml
 from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, create_model
+from starlette.concurrency import run_in_threadpool
 
 from .casting import cast_response
 from .file_management import is_binary_file, is_valid_path, write_tmp_file
 from .responses import AudioResponse, ImageResponse, VideoResponse
+from .run_process import INVALID_INPUT_EXIT_CODE
+from .truecase_helper import truecase_enabled
 
 versions = list()
 available_versions = list()
@@ -29,6 +33,20 @@ logger = getLogger(__name__)
 PATH_TO_GLADIA_SRC = os.getenv("PATH_TO_GLADIA_SRC", "/app")
 ENV_YAML = "env.yaml"
 
+# keep one python process per model running in a custom env instead of spawning
+# a new one (and reloading the model) for each request, for all the models;
+# otherwise only for the models setting gladia.persistent_subprocess in their metadata
+PERSISTENT_SUBPROCESS = (
+    os.getenv("GLADIA_PERSISTENT_SUBPROCESS", "false").lower() == "true"
+)
+
+# the helpers truecasing the texts they are given, the models using one of them
+# get a query parameter to disable truecasing
+TRUECASING_HELPERS = ["truecase_helper", "ner_helper", "answer_questions"]
+
+subprocess_workers = dict()
+subprocess_workers_lock = threading.Lock()
+
 models_folder_suffix = "models"
 
 file_types = ["image", "audio", "video"]
@@ -214,12 +232,197 @@ def get_metadata(rel_path, file_name, fallback_file_name):
     return metadata
 
 
+class SubprocessWorker:
+    """
+    Persistent python process running in a model's micromamba environment.
+    The model module is loaded once by the worker, so the models it keeps in memory
+    stay resident between requests instead of being reloaded by a new subprocess each time.
+
+    Args:
+        env_name (str): name of the environment
+        module_path (str): path to the module
+        model (str): name of the model
+    """
+
+    def __init__(self, env_name: str, module_path: str, model: str) -> None:
+        """
+        Start the worker process
+
+        Args:
+            env_name (str): name of the environment
+            module_path (str): path to the module
+            model (str): name of the model
+
+        Returns:
+            None
+        """
+
+        HERE = os.path.abspath(Path(__file__).parent)
+
+        self.cmd = f"""micromamba run -n {env_name} --cwd {os.path.abspath(module_path)} python {os.path.join(HERE, 'run_process.py')} --worker {os.path.abspath(module_path)} {model}"""
+        self.lock = threading.Lock()
+
+        logger.info(f"Starting subprocess worker: {self.cmd}")
+
+        # stderr is inherited so that the worker logs are not lost
+        # and can't fill up a pipe nobody reads
+        self.process = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            shell=True,
+            executable="/bin/bash",
+            text=True,
+        )
+
+    def is_alive(self) -> bool:
+        """
+        Check if the worker process is still running
+
+        Returns:
+            bool: True if the worker process is running, False otherwise
+        """
+
+        return self.process.poll() is None
+
+    def run(self, output_tmp_result: str, **kwargs) -> None:
+        """
+        Send a predict request to the worker and wait for it to be processed.
+
+        Args:
+            output_tmp_result (str): path to the temporary result file
+            **kwargs: arguments to pass to the model
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: if the worker fails to process the request
+            ValueError: if the model rejects the inputs
+        """
+
+        with self.lock:
+            try:
+                self.process.stdin.write(
+                    json.dumps(
+                        {"output_tmp_result": output_tmp_result, "kwargs": kwargs}
+                    )
+                    + "\n"
+                )
+                self.process.stdin.flush()
+                answer = self.process.stdout.readline()
+            except (BrokenPipeError, OSError) as error:
+                raise RuntimeError(f"Subprocess worker is not reachable: {error}")
+
+        if not answer:
+            raise RuntimeError(
+                f"Subprocess worker exited with code {self.process.poll()}\nCommand executed: {self.cmd}"
+            )
+
+        answer = json.loads(answer)
+
+        if answer["status"] == "invalid":
+            raise ValueError(answer["message"])
+
+        if answer["status"] != "ok":
+            raise RuntimeError(
+                f"Subprocess encountered the following error : {answer['message']}\nCommand executed: {self.cmd}"
+            )
+
+    def stop(self) -> None:
+        """
+        Stop the worker process
+
+        Returns:
+            None
+        """
+
+        if self.is_alive():
+            self.process.stdin.close()
+            self.process.wait()
+
+
+def get_subprocess_worker(
+    env_name: str, module_path: str, model: str
+) -> SubprocessWorker:
+    """
+    Get the running worker for a model, starting a new one if there is none or if it died.
+
+    Args:
+        env_name (str): name of the environment
+        module_path (str): path to the module
+        model (str): name of the model
+
+    Returns:
+        SubprocessWorker: the running worker
+    """
+
+    key = (env_name, os.path.abspath(module_path), model)
+
+    with subprocess_workers_lock:
+        worker = subprocess_workers.get(key, None)
+
+        if worker is None or not worker.is_alive():
+            worker = SubprocessWorker(env_name, module_path, model)
+            subprocess_workers[key] = worker
+
+    return worker
+
+
+def is_persistent_subprocess(module_path: str) -> bool:
+    """
+    Check if the requests to a model running in a custom env go to a persistent worker.
+
+    Args:
+        module_path (str): path to the module
+
+    Returns:
+        bool: True if PERSISTENT_SUBPROCESS is activated or if the model's metadata asks for it
+    """
+
+    if PERSISTENT_SUBPROCESS:
+        return True
+
+    metadata_path = os.path.join(module_path, ".model_metadata.yaml")
+    if not os.path.isfile(metadata_path):
+        return False
+
+    with open(metadata_path, "r") as metadata_file:
+        metadata = yaml.safe_load(metadata_file) or {}
+
+    return bool((metadata.get("gladia") or {}).get("persistent_subprocess", False))
+
+
+def is_truecasing_model(module_path: str, model: str) -> bool:
+    """
+    Check if a model truecases its text inputs, i.e. if it uses one of the TRUECASING_HELPERS.
+
+    Args:
+        module_path (str): path to the module
+        model (str): name of the model
+
+    Returns:
+        bool: True if the model's source uses one of the TRUECASING_HELPERS
+    """
+
+    model_file_path = os.path.join(module_path, f"{model}.py")
+    if not os.path.isfile(model_file_path):
+        return False
+
+    with open(model_file_path, "r") as model_file:
+        source = model_file.read()
+
+    return any(helper in source for helper in TRUECASING_HELPERS)
+
+
 def exec_in_subprocess(
     env_name: str, module_path: str, model: str, output_tmp_result: str, **kwargs
 ):
     """
     Execute a model in a subprocess.
     The subprocess is executed in a separate thread.
+    If PERSISTENT_SUBPROCESS is activated or the model's metadata asks for it,
+    the request is sent to a persistent worker keeping the model loaded instead.
 
     Args:
         env_name (str): name of the environment
@@ -233,8 +436,18 @@ def exec_in_subprocess(
 
     Raises:
         RuntimeError: if the subprocess fails
+        ValueError: if the model rejects the inputs
     """
 
+    if is_persistent_subprocess(module_path):
+        worker = get_subprocess_worker(env_name, module_path, model)
+
+        try:
+            return worker.run(output_tmp_result, **kwargs)
+        except RuntimeError as error:
+            logger.error(str(error))
+            raise
+
     HERE = os.path.abspath(Path(__file__).parent)
 
     cmd = f"""micromamba run -n {env_name} --cwd {os.path.abspath(module_path)} python {os.path.join(HERE, 'run_process.py')} {os.path.abspath(module_path)} {model} {output_tmp_result} """
@@ -254,6 +467,10 @@ def exec_in_subprocess(
         std_outputs, error_message = proc.communicate()
         logger.debug(f"subprocess stdout: {std_outputs}")
 
+        if proc.returncode == INVALID_INPUT_EXIT_CODE:
+            # the error is printed last, after the warnings of the libraries
+            raise ValueError(error_message.decode().strip().split("\n")[-1])
+
         error_message = f"Subprocess encountered the following error : {error_message}\nCommand executed: {cmd}"
 
         # if the subprocess has failed (return code of shell != 0)
@@ -532,6 +749,24 @@ class TaskRouter:
             default=Query(self.default_model, enum=set(self.versions.keys())),
         )
 
+        query_parameters = [query_for_model_name]
+
+        # the models using the truecase helpers truecase their inputs unless it is disabled for the request
+        if any(
+            is_truecasing_model(os.path.join(self.root_package_path, model), model)
+            for model in models
+        ):
+            query_parameters.append(
+                forge.arg(
+                    "truecase",
+                    type=bool,
+                    default=Query(
+                        True,
+                        description="Restore the case of the input texts before applying the model",
+                    ),
+                )
+            )
+
         # Define the post routes implemented by fastapi
         # The @router.post() content define the informations
         # displayed in /docs and /openapi.json for the post routes
@@ -542,7 +777,7 @@ class TaskRouter:
             response_class=response_class,
             responses=responses,
         )
-        @forge.sign(*[*form_parameters, query_for_model_name])
+        @forge.sign(*[*form_parameters, *query_parameters])
         async def apply(*args, **kwargs):
 
             # cast BaseModel pydantic models into python type
@@ -564,6 +799,8 @@ class TaskRouter:
             # remove it from kwargs to avoid passing it to the predict function
             del kwargs["model"]
 
+            truecase = kwargs.pop("truecase", True)
+
             module_path = f"{self.root_package_path}/{model}/"
             if not os.path.exists(module_path):
                 raise HTTPException(
@@ -603,7 +840,8 @@ class TaskRouter:
                     if f"{input_name}_url" in kwargs:
                         del kwargs[f"{input_name}_url"]
 
-                else:
+                # the inputs having a default value can be falsy (False, 0)
+                elif "default" not in input:
                     if not kwargs.get(input_name, None):
                         error_message = f"Input '{input_name}' of '{input['type']}' type is missing."
                         return get_error_reponse(400, error_message)
@@ -629,8 +867,10 @@ class TaskRouter:
                 model = quote(model)
                 output_tmp_result = quote(output_tmp_result)
 
+                # waiting for the subprocess doesn't block the event loop either
                 try:
-                    exec_in_subprocess(
+                    await run_in_threadpool(
+                        exec_in_subprocess,
                         env_name=env_name,
                         module_path=module_path,
                         model=model,
@@ -638,6 +878,12 @@ class TaskRouter:
                         **kwargs,
                     )
 
+                except ValueError as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=str(e),
+                    )
+
                 except Exception as e:
                     raise HTTPException(
                         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -663,7 +909,23 @@ class TaskRouter:
                 ).load_module()
 
                 # This is where we launch the inference without custom env
-                result = getattr(this_module, f"predict")(*args, **kwargs)
+                # predict runs in the threadpool, which copies the context (and the truecase flag),
+                # so the event loop keeps accepting the concurrent requests the models batch together
+                truecase_token = truecase_enabled.set(truecase)
+                try:
+                    result = await run_in_threadpool(
+                        getattr(this_module, f"predict"), *args, **kwargs
+                    )
+
+                # the models reject the invalid inputs with a ValueError
+                except ValueError as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=str(e),
+                    )
+
+                finally:
+                    truecase_enabled.reset(truecase_token)
 
             try:
                 return cast_response(result, self.output)
@@ -0,0 +1,233 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from logging import getLogger
+from threading import Condition
+from typing import FrozenSet, Iterator, List, Optional
+
+from PIL import Image
+from tesserocr import PyTessBaseAPI, get_languages
+
+from .model_management import load_resident_model
+
+logger = getLogger(__name__)
+
+# number of engines per language, each engine processing one page at a time
+TESSERACT_POOL_SIZE = int(os.getenv("GLADIA_TESSERACT_POOL_SIZE", os.cpu_count() or 1))
+
+# number of seconds to wait for an engine of a pool to be free before giving up
+TESSERACT_ENGINE_TIMEOUT = float(os.getenv("GLADIA_TESSERACT_ENGINE_TIMEOUT", 300))
+
+# ISO 639-2/B codes whose tesseract model uses the ISO 639-2/T code
+TESSERACT_LANGUAGE_CODES = {
+    "alb": "sqi",
+    "arm": "hye",
+    "baq": "eus",
+    "bur": "mya",
+    "chi": "chi_sim",
+    "cze": "ces",
+    "dut": "nld",
+    "fre": "fra",
+    "geo": "kat",
+    "ger": "deu",
+    "gre": "ell",
+    "ice": "isl",
+    "mac": "mkd",
+    "may": "msa",
+    "per": "fas",
+    "rum": "ron",
+    "slo": "slk",
+    "tib": "bod",
+    "wel": "cym",
+}
+
+
+@lru_cache(maxsize=1)
+def get_installed_languages() -> FrozenSet[str]:
+    """
+    Get the languages whose tesseract model is installed.
+
+    Returns:
+        FrozenSet[str]: the tesseract languages (eng, fra...)
+    """
+
+    _, languages = get_languages()
+
+    return frozenset(languages)
+
+
+def to_tesseract_language(source_language: str) -> str:
+    """
+    Convert a list of ISO 639-2 languages separated by "," or "+" (eng+fre) to a tesseract language string.
+
+    Args:
+        source_language (str): languages of the document
+
+    Returns:
+        str: tesseract languages joined by "+" (eng+fra), "eng" if empty
+
+    Raises:
+        ValueError: if the tesseract model of a language isn't installed
+    """
+
+    languages = source_language.replace(",", "+").split("+")
+    languages = [language.strip().lower() for language in languages]
+
+    languages = [
+        TESSERACT_LANGUAGE_CODES.get(language, language)
+        for language in languages
+        if language
+    ]
+
+    missing = [
+        language for language in languages if language not in get_installed_languages()
+    ]
+    if missing:
+        raise ValueError(
+            f"Unsupported source_language {', '.join(missing)}, the supported languages are {', '.join(sorted(get_installed_languages()))}"
+        )
+
+    return "+".join(languages) or "eng"
+
+
+class TesseractEnginePool(object):
+    """
+    Pool of initialized tesseract engines for a language.
+    Initializing an engine loads the language model so the engines are kept for the next calls,
+    they are created lazily up to the size of the pool.
+
+    Args:
+        language (str): tesseract language string (eng+fra)
+        size (int): maximum number of engines
+    """
+
+    def __init__(self, language: str, size: int = TESSERACT_POOL_SIZE) -> None:
+        """
+        Constructor for TesseractEnginePool.
+
+        Args:
+            language (str): tesseract language string (eng+fra)
+            size (int): maximum number of engines (default: GLADIA_TESSERACT_POOL_SIZE or the number of cpus)
+
+        Returns:
+            None
+        """
+
+        self.language = language
+        self.size = max(size, 1)
+        self.engines: List[PyTessBaseAPI] = list()
+        self.created = 0
+        self.condition = Condition()
+
+    @contextmanager
+    def engine(
+        self, timeout: float = TESSERACT_ENGINE_TIMEOUT
+    ) -> Iterator[PyTessBaseAPI]:
+        """
+        Borrow an engine from the pool, creating it if none is free and the pool isn't full.
+
+        Args:
+            timeout (float): number of seconds to wait for an engine (default: GLADIA_TESSERACT_ENGINE_TIMEOUT or 300)
+
+        Returns:
+            Iterator[PyTessBaseAPI]: the engine, given back to the pool on exit
+
+        Raises:
+            TimeoutError: if no engine was free before the timeout
+        """
+
+        with self.condition:
+            if not self.condition.wait_for(
+                lambda: self.engines or self.created < self.size, timeout=timeout
+            ):
+                raise TimeoutError(
+                    f"No tesseract engine for {self.language} was free after {timeout} seconds"
+                )
+
+            api = self.engines.pop() if self.engines else None
+            if api is None:
+                self.created += 1
+
+        if api is None:
+            logger.debug(f"Initializing tesseract engine for {self.language}")
+
+            # the slot reserved for the engine is released if it can't be created
+            try:
+                api = PyTessBaseAPI(lang=self.language)
+            except Exception:
+                with self.condition:
+                    self.created -= 1
+                    self.condition.notify()
+                raise
+
+        try:
+            yield api
+        finally:
+            api.Clear()
+            with self.condition:
+                self.engines.append(api)
+                self.condition.notify()
+
+
+def get_engine_pool(language: str) -> TesseractEnginePool:
+    """
+    Get the pool of engines of a language, created only once per process.
+
+    Args:
+        language (str): tesseract language string (eng+fra)
+
+    Returns:
+        TesseractEnginePool: the pool
+    """
+
+    return load_resident_model(
+        f"tesseract-{language}", lambda: TesseractEnginePool(language)
+    )
+
+
+def recognize_page(pool: TesseractEnginePool, page: Image.Image) -> str:
+    """
+    Recognize the text of a page with an engine of the pool.
+    The recognition releases the GIL so several pages can be recognized in parallel threads.
+
+    Args:
+        pool (TesseractEnginePool): pool of engines to use
+        page (Image.Image): page to recognize
+
+    Returns:
+        str: the text of the page
+    """
+
+    with pool.engine() as api:
+        api.SetImage(page)
+
+        return api.GetUTF8Text()
+
+
+def recognize_pages(
+    pages: List[Image.Image],
+    source_language: str = "eng",
+    workers: Optional[int] = None,
+) -> List[str]:
+    """
+    Recognize the text of several pages in parallel, using a pool of engines initialized for their language.
+
+    Args:
+        pages (List[Image.Image]): pages to recognize
+        source_language (str): ISO 639-2 languages of the pages separated by "," or "+" (default: "eng")
+        workers (Optional[int]): number of pages recognized at once, the size of the pool if None (default: None)
+
+    Returns:
+        List[str]: the text of each page
+    """
+
+    pool = get_engine_pool(to_tesseract_language(source_language))
+
+    if len(pages) == 1:
+        return [recognize_page(pool, pages[0])]
+
+    workers = pool.size if workers is None else workers
+
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(pages)), 1)) as executor:
+        return list(executor.map(lambda page: recognize_page(pool, page), pages))
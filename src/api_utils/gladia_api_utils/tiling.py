@@ -0,0 +1,171 @@
+from logging import getLogger
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = getLogger(__name__)
+
+
+def get_tile_starts(length: int, tile_size: int, overlap: int) -> List[int]:
+    """
+    Get the start positions of the tiles covering a given length.
+    The last tile is shifted to end on the border so that all the tiles have the same size.
+
+    Args:
+        length (int): length of the dimension to cover
+        tile_size (int): size of the tiles (must be <= length)
+        overlap (int): minimum overlap between two consecutive tiles
+
+    Returns:
+        List[int]: start positions of the tiles
+    """
+
+    if tile_size >= length:
+        return [0]
+
+    stride = max(tile_size - overlap, 1)
+    starts = list(range(0, length - tile_size, stride))
+    starts.append(length - tile_size)
+
+    return starts
+
+
+def get_tiles(
+    height: int, width: int, tile_size: int, overlap: int
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Get the (left,top,right,bottom) boxes of the overlapping tiles covering an image.
+
+    Args:
+        height (int): height of the image
+        width (int): width of the image
+        tile_size (int): size of the square tiles, clipped to the image size
+        overlap (int): minimum overlap between two consecutive tiles
+
+    Returns:
+        List[Tuple[int, int, int, int]]: boxes of the tiles
+    """
+
+    tile_height = min(tile_size, height)
+    tile_width = min(tile_size, width)
+
+    return [
+        (left, top, left + tile_width, top + tile_height)
+        for top in get_tile_starts(height, tile_height, overlap)
+        for left in get_tile_starts(width, tile_width, overlap)
+    ]
+
+
+def blending_window(
+    height: int, width: int, ramp: int, edges: Tuple[bool, bool, bool, bool]
+) -> np.ndarray:
+    """
+    Build a weighted window equal to 1 in its center and linearly decreasing towards the given edges.
+
+    Args:
+        height (int): height of the window
+        width (int): width of the window
+        ramp (int): width of the linear ramp in pixels
+        edges (Tuple[bool, bool, bool, bool]): whether to ramp the (left,top,right,bottom) edges
+
+    Returns:
+        np.ndarray: the window with shape (height, width, 1) and values in ]0, 1]
+    """
+
+    ramp_x = np.ones(width, dtype=np.float32)
+    ramp_y = np.ones(height, dtype=np.float32)
+
+    if ramp > 0:
+        left, top, right, bottom = edges
+        position_x = np.arange(width, dtype=np.float32)
+        position_y = np.arange(height, dtype=np.float32)
+
+        if left:
+            ramp_x = np.minimum(ramp_x, (position_x + 1) / (ramp + 1))
+        if right:
+            ramp_x = np.minimum(ramp_x, (width - position_x) / (ramp + 1))
+        if top:
+            ramp_y = np.minimum(ramp_y, (position_y + 1) / (ramp + 1))
+        if bottom:
+            ramp_y = np.minimum(ramp_y, (height - position_y) / (ramp + 1))
+
+    return np.minimum(ramp_y[:, np.newaxis], ramp_x[np.newaxis, :])[:, :, np.newaxis]
+
+
+def _batches(items: List, batch_size: int) -> Iterator[List]:
+    """
+    Split a list into consecutive batches.
+
+    Args:
+        items (List): items to split
+        batch_size (int): maximum number of items per batch
+
+    Returns:
+        Iterator[List]: the batches
+    """
+
+    for start in range(0, len(items), batch_size):
+        yield items[start : start + batch_size]
+
+
+def tiled_inference(
+    image: np.ndarray,
+    process: Callable[[np.ndarray], np.ndarray],
+    tile_size: int = 512,
+    overlap: int = 64,
+    batch_size: int = 4,
+    scale: int = 1,
+    out_channels: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Run an image-to-image function on overlapping tiles of an image and blend the results.
+    Only batch_size tiles are in memory at once, so the peak memory only depends on the tile
+    size and the batch size besides the output image itself.
+
+    Args:
+        image (np.ndarray): image to process with shape (H, W, C)
+        process (Callable[[np.ndarray], np.ndarray]): function mapping a batch of tiles (N, h, w, C) to a batch of results (N, h * scale, w * scale, C_out)
+        tile_size (int): size of the square tiles (default: 512)
+        overlap (int): overlap between two consecutive tiles used to blend the seams (default: 64)
+        batch_size (int): number of tiles processed at once (default: 4)
+        scale (int): ratio between the output and the input size (default: 1)
+        out_channels (Optional[int]): number of channels of the output, same as the input if None (default: None)
+
+    Returns:
+        np.ndarray: the blended float32 output with shape (H * scale, W * scale, C_out)
+    """
+
+    if image.ndim == 2:
+        image = image[:, :, np.newaxis]
+
+    height, width, channels = image.shape
+    out_channels = channels if out_channels is None else out_channels
+
+    tiles = get_tiles(height, width, tile_size, overlap)
+
+    logger.debug(
+        f"Tiled inference on {height}x{width}: {len(tiles)} tiles of {tile_size} with overlap {overlap}"
+    )
+
+    output = np.zeros((height * scale, width * scale, out_channels), dtype=np.float32)
+    weights = np.zeros((height * scale, width * scale, 1), dtype=np.float32)
+
+    for batch in _batches(tiles, max(batch_size, 1)):
+        inputs = np.stack([image[t:b, l:r] for l, t, r, b in batch])
+        results = process(inputs)
+
+        for (l, t, r, b), result in zip(batch, results):
+            # the borders touching the image borders have no neighbour to blend with
+            window = blending_window(
+                (b - t) * scale,
+                (r - l) * scale,
+                ramp=overlap * scale,
+                edges=(l > 0, t > 0, r < width, b < height),
+            )
+
+            output[t * scale : b * scale, l * scale : r * scale] += (
+                result.astype(np.float32) * window
+            )
+            weights[t * scale : b * scale, l * scale : r * scale] += window
+
+    return output / weights
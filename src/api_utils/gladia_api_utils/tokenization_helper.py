@@ -0,0 +1,126 @@
+from logging import getLogger
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from transformers import BatchEncoding, PreTrainedTokenizerBase
+
+logger = getLogger(__name__)
+
+
+def tokenize_texts(
+    tokenizer: PreTrainedTokenizerBase,
+    texts: List[str],
+    max_length: Optional[int] = None,
+    text_pairs: Optional[List[str]] = None,
+) -> List[Dict[str, List[int]]]:
+    """
+    Tokenize texts without padding them, the texts longer than max_length tokens
+    being truncated with a warning instead of silently.
+
+    Args:
+        tokenizer (PreTrainedTokenizerBase): tokenizer of the model
+        texts (List[str]): texts to tokenize
+        max_length (Optional[int]): maximum number of tokens of a text, the maximum length of the model if None (default: None)
+        text_pairs (Optional[List[str]]): second text of each pair for the models taking pairs of texts (default: None)
+
+    Returns:
+        List[Dict[str, List[int]]]: the encoding of each text (input_ids, attention_mask...)
+    """
+
+    max_length = max_length or tokenizer.model_max_length
+
+    encodings = tokenizer(texts, text_pairs, verbose=False)
+    features = [
+        {key: values[index] for key, values in encodings.items()}
+        for index in range(len(texts))
+    ]
+
+    too_long = [
+        index
+        for index, feature in enumerate(features)
+        if len(feature["input_ids"]) > max_length
+    ]
+
+    for index in too_long:
+        logger.warning(
+            f"Input {index} has {len(features[index]['input_ids'])} tokens, truncating it to {max_length} tokens"
+        )
+
+    # only the texts which are too long are tokenized again
+    if too_long:
+        truncated = tokenizer(
+            [texts[index] for index in too_long],
+            [text_pairs[index] for index in too_long] if text_pairs else None,
+            max_length=max_length,
+            truncation=True,
+        )
+        for position, index in enumerate(too_long):
+            features[index] = {
+                key: values[position] for key, values in truncated.items()
+            }
+
+    return features
+
+
+def encode_batches(
+    tokenizer: PreTrainedTokenizerBase,
+    texts: List[str],
+    batch_size: int = 32,
+    max_length: Optional[int] = None,
+    text_pairs: Optional[List[str]] = None,
+    device: str = "cpu",
+) -> Iterator[Tuple[List[int], BatchEncoding]]:
+    """
+    Tokenize texts into batches of texts of similar length, each batch being padded
+    to its longest text only instead of to the maximum length of the model.
+
+    Args:
+        tokenizer (PreTrainedTokenizerBase): tokenizer of the model
+        texts (List[str]): texts to tokenize
+        batch_size (int): maximum number of texts per batch (default: 32)
+        max_length (Optional[int]): maximum number of tokens of a text, the maximum length of the model if None (default: None)
+        text_pairs (Optional[List[str]]): second text of each pair for the models taking pairs of texts (default: None)
+        device (str): device to put the batches on (default: "cpu")
+
+    Returns:
+        Iterator[Tuple[List[int], BatchEncoding]]: the indices of the texts of each batch and its padded tensors
+    """
+
+    features = tokenize_texts(tokenizer, texts, max_length, text_pairs)
+
+    # the longest texts come first so a batch too large for the device fails early
+    indices = sorted(
+        range(len(features)), key=lambda index: -len(features[index]["input_ids"])
+    )
+
+    for start in range(0, len(indices), batch_size):
+        batch_indices = indices[start : start + batch_size]
+
+        batch = tokenizer.pad(
+            [features[index] for index in batch_indices], return_tensors="pt"
+        )
+
+        yield batch_indices, batch.to(device)
+
+
+def encode_text(
+    tokenizer: PreTrainedTokenizerBase,
+    text: str,
+    max_length: Optional[int] = None,
+    device: str = "cpu",
+) -> BatchEncoding:
+    """
+    Tokenize a single text without padding it.
+
+    Args:
+        tokenizer (PreTrainedTokenizerBase): tokenizer of the model
+        text (str): text to tokenize
+        max_length (Optional[int]): maximum number of tokens of the text, the maximum length of the model if None (default: None)
+        device (str): device to put the tensors on (default: "cpu")
+
+    Returns:
+        BatchEncoding: the tensors of the text (input_ids, attention_mask...)
+    """
+
+    _, batch = next(encode_batches(tokenizer, [text], 1, max_length, device=device))
+
+    return batch
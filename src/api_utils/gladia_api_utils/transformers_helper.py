@@ -0,0 +1,484 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+from transformers import (
+    AutoModelForMaskedLM,
+    AutoModelForQuestionAnswering,
+    AutoModelForSequenceClassification,
+    AutoTokenizer,
+    BertForNextSentencePrediction,
+    PreTrainedModel,
+    PreTrainedTokenizerFast,
+)
+
+from .model_management import load_resident_model
+from .tokenization_helper import encode_batches
+from .truecase_helper import get_true_case, get_true_cases, truecase_enabled
+
+logger = getLogger(__name__)
+
+# number of encoded question answering contexts kept in memory
+QA_CONTEXT_CACHE_SIZE = int(os.getenv("GLADIA_QA_CONTEXT_CACHE_SIZE", 128))
+
+qa_contexts = OrderedDict()
+qa_contexts_lock = threading.Lock()
+
+
+def load_model(
+    model_class: type, checkpoint: str, device: Optional[str] = None
+) -> Tuple[PreTrainedModel, PreTrainedTokenizerFast, str]:
+    """
+    Load a model with its fast tokenizer, in eval mode.
+
+    Args:
+        model_class (type): transformers class of the model (AutoModelForMaskedLM...)
+        checkpoint (str): huggingface checkpoint of the model
+        device (Optional[str]): device to run the model on, cuda if available if None (default: None)
+
+    Returns:
+        Tuple[PreTrainedModel, PreTrainedTokenizerFast, str]: the model, its tokenizer and its device
+    """
+
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+    model = model_class.from_pretrained(checkpoint)
+    model.to(device).eval()
+
+    tokenizer = AutoTokenizer.from_pretrained(checkpoint, use_fast=True)
+
+    return model, tokenizer, device
+
+
+def get_model(
+    model_class: type, checkpoint: str
+) -> Tuple[PreTrainedModel, PreTrainedTokenizerFast, str]:
+    """
+    Get a model with its fast tokenizer, loaded only once per process.
+
+    Args:
+        model_class (type): transformers class of the model (AutoModelForMaskedLM...)
+        checkpoint (str): huggingface checkpoint of the model
+
+    Returns:
+        Tuple[PreTrainedModel, PreTrainedTokenizerFast, str]: the model, its tokenizer and its device
+    """
+
+    return load_resident_model(
+        f"{model_class.__name__}-{checkpoint}",
+        lambda: load_model(model_class, checkpoint),
+    )
+
+
+def predict_masks(
+    checkpoint: str, texts: List[str], top_k: int = 3, batch_size: int = 32
+) -> List[List[Tuple[str, float]]]:
+    """
+    Predict the most likely tokens for the "[MASK]" of each text.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of a masked language model
+        texts (List[str]): texts containing a "[MASK]"
+        top_k (int): number of tokens to return for each text (default: 3)
+        batch_size (int): number of texts per forward pass (default: 32)
+
+    Returns:
+        List[List[Tuple[str, float]]]: the tokens and their probability for each text, from the most likely
+
+    Raises:
+        ValueError: if a text has no "[MASK]", or if it is beyond the maximum length of the model
+    """
+
+    model, tokenizer, device = get_model(AutoModelForMaskedLM, checkpoint)
+
+    for index, text in enumerate(texts):
+        if "[MASK]" not in text:
+            raise ValueError(f'Text {index} has no "[MASK]" to predict')
+
+    texts = [text.replace("[MASK]", tokenizer.mask_token) for text in texts]
+    predictions: List[List[Tuple[str, float]]] = [[] for _ in texts]
+
+    for indices, inputs in encode_batches(tokenizer, texts, batch_size, device=device):
+        is_mask = inputs["input_ids"] == tokenizer.mask_token_id
+
+        # argmax would silently take the first token of a text whose mask was truncated
+        for index, has_mask in zip(indices, is_mask.any(-1).tolist()):
+            if not has_mask:
+                raise ValueError(
+                    f'The "[MASK]" of text {index} is beyond the {tokenizer.model_max_length} tokens of the model'
+                )
+
+        with torch.no_grad():
+            logits = model(**inputs).logits
+
+        # the first mask of each text
+        mask_positions = is_mask.int().argmax(-1)
+        probabilities = torch.softmax(
+            logits[torch.arange(len(logits)), mask_positions], dim=-1
+        )
+        scores, token_ids = probabilities.topk(top_k, dim=-1)
+
+        for index, text_token_ids, text_scores in zip(
+            indices, token_ids.tolist(), scores.tolist()
+        ):
+            predictions[index] = [
+                (tokenizer.decode([token_id]).strip(), score)
+                for token_id, score in zip(text_token_ids, text_scores)
+            ]
+
+    return predictions
+
+
+def predict_next_sentences(
+    checkpoint: str, pairs: List[Tuple[str, str]], batch_size: int = 32
+) -> List[float]:
+    """
+    Predict whether the second sentence of each pair follows the first one.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of a BERT model with a next sentence prediction head
+        pairs (List[Tuple[str, str]]): pairs of sentences
+        batch_size (int): number of pairs per forward pass (default: 32)
+
+    Returns:
+        List[float]: probability that the second sentence follows the first one, for each pair
+    """
+
+    model, tokenizer, device = get_model(BertForNextSentencePrediction, checkpoint)
+
+    probabilities = [0.0] * len(pairs)
+
+    for indices, inputs in encode_batches(
+        tokenizer,
+        [first for first, _ in pairs],
+        batch_size,
+        text_pairs=[second for _, second in pairs],
+        device=device,
+    ):
+        with torch.no_grad():
+            logits = model(**inputs).logits
+
+        # the label 0 means that the second sentence follows the first one
+        for index, probability in zip(
+            indices, torch.softmax(logits, dim=-1)[:, 0].tolist()
+        ):
+            probabilities[index] = probability
+
+    return probabilities
+
+
+def classify_texts(
+    checkpoint: str, texts: List[str], batch_size: int = 32
+) -> List[Dict[str, Any]]:
+    """
+    Classify texts with a sequence classification model.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of a sequence classification model
+        texts (List[str]): texts to classify
+        batch_size (int): number of texts per forward pass (default: 32)
+
+    Returns:
+        List[Dict[str, Any]]: the most likely label of each text and its probability
+    """
+
+    model, tokenizer, device = get_model(AutoModelForSequenceClassification, checkpoint)
+
+    predictions: List[Dict[str, Any]] = [dict() for _ in texts]
+
+    for indices, inputs in encode_batches(tokenizer, texts, batch_size, device=device):
+        with torch.no_grad():
+            logits = model(**inputs).logits
+
+        scores, labels = torch.softmax(logits, dim=-1).max(dim=-1)
+
+        for index, label, score in zip(indices, labels.tolist(), scores.tolist()):
+            predictions[index] = {"label": model.config.id2label[label], "score": score}
+
+    return predictions
+
+
+def encode_context(
+    checkpoint: str, context: str, tokenizer: PreTrainedTokenizerFast
+) -> Dict[str, Any]:
+    """
+    Truecase and tokenize a question answering context, the result being cached
+    by (model, truecasing, context hash) so the questions about a same context share it.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of the model
+        context (str): context to encode
+        tokenizer (PreTrainedTokenizerFast): tokenizer of the model
+
+    Returns:
+        Dict[str, Any]: the truecased context ("text"), its tokens ("input_ids")
+            and their character offsets in the truecased context ("offsets")
+    """
+
+    key = (
+        checkpoint,
+        truecase_enabled.get(),
+        hashlib.sha256(context.encode("utf-8")).hexdigest(),
+    )
+
+    with qa_contexts_lock:
+        if key in qa_contexts:
+            qa_contexts.move_to_end(key)
+            return qa_contexts[key]
+
+    text = get_true_case(context) if context.strip() else context
+    encoding = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )
+
+    encoded_context = {
+        "text": text,
+        "input_ids": encoding["input_ids"],
+        "offsets": encoding["offset_mapping"],
+    }
+
+    with qa_contexts_lock:
+        qa_contexts[key] = encoded_context
+
+        while len(qa_contexts) > QA_CONTEXT_CACHE_SIZE:
+            qa_contexts.popitem(last=False)
+
+    return encoded_context
+
+
+def build_windows(
+    question_ids: List[int],
+    context_ids: List[int],
+    tokenizer: PreTrainedTokenizerFast,
+    max_length: int,
+    stride: int,
+) -> List[Dict[str, Any]]:
+    """
+    Build the inputs of a question over overlapping windows of its context.
+
+    Args:
+        question_ids (List[int]): tokens of the question
+        context_ids (List[int]): tokens of the context
+        tokenizer (PreTrainedTokenizerFast): tokenizer of the model
+        max_length (int): maximum number of tokens of a window, question included
+        stride (int): number of tokens shared by two consecutive windows
+
+    Returns:
+        List[Dict[str, Any]]: the inputs of each window, with the index of its first context token ("offset")
+            and the position of each context token in the inputs ("context_positions")
+    """
+
+    question_ids = question_ids[: max_length // 2]
+    window_length = (
+        max_length - len(question_ids) - tokenizer.num_special_tokens_to_add(pair=True)
+    )
+
+    windows = []
+    start = 0
+
+    while True:
+        window_ids = context_ids[start : start + window_length]
+
+        # placeholders locate the context tokens once the special tokens are added
+        layout = tokenizer.build_inputs_with_special_tokens(
+            [-1] * len(question_ids), [-2] * len(window_ids)
+        )
+
+        window = {
+            "input_ids": tokenizer.build_inputs_with_special_tokens(
+                question_ids, window_ids
+            ),
+            "offset": start,
+            "context_positions": [
+                position for position, token in enumerate(layout) if token == -2
+            ],
+        }
+
+        if "token_type_ids" in tokenizer.model_input_names:
+            window["token_type_ids"] = tokenizer.create_token_type_ids_from_sequences(
+                question_ids, window_ids
+            )
+
+        windows.append(window)
+
+        if start + window_length >= len(context_ids):
+            return windows
+
+        start += max(window_length - stride, 1)
+
+
+def answer_questions(
+    checkpoint: str,
+    context: str,
+    questions: List[str],
+    top_k: int = 1,
+    max_length: int = 384,
+    stride: int = 128,
+    max_answer_length: int = 15,
+    batch_size: int = 32,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Extract the answers of questions from a context. The context is truecased and tokenized once
+    for all the questions, the long contexts are split into overlapping windows and the windows
+    of all the questions are run in the same batches, the answers of all the windows being ranked together.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of an extractive question answering model
+        context (str): context to extract the answers from
+        questions (List[str]): questions about the context
+        top_k (int): number of answers to return for each question (default: 1)
+        max_length (int): maximum number of tokens of a window, question included (default: 384)
+        stride (int): number of tokens shared by two consecutive windows (default: 128)
+        max_answer_length (int): maximum number of tokens of an answer (default: 15)
+        batch_size (int): number of windows per forward pass (default: 32)
+
+    Returns:
+        List[List[Dict[str, Any]]]: the answers of each question, from the most likely,
+            with their score and their start and end characters in the truecased context
+    """
+
+    model, tokenizer, device = get_model(AutoModelForQuestionAnswering, checkpoint)
+
+    encoded_context = encode_context(checkpoint, context, tokenizer)
+    text, offsets = encoded_context["text"], encoded_context["offsets"]
+
+    # a context without any token has no answer, and no second sequence to build the windows with
+    if not encoded_context["input_ids"]:
+        return [[] for _ in questions]
+
+    windows, question_indices = [], []
+    for question_index, question in enumerate(get_true_cases(questions)):
+        question_ids = tokenizer(question, add_special_tokens=False)["input_ids"]
+
+        question_windows = build_windows(
+            question_ids, encoded_context["input_ids"], tokenizer, max_length, stride
+        )
+        windows += question_windows
+        question_indices += [question_index] * len(question_windows)
+
+    answers: List[List[Dict[str, Any]]] = [[] for _ in questions]
+
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start : start + batch_size]
+
+        inputs = tokenizer.pad(
+            [
+                {
+                    name: window[name]
+                    for name in ("input_ids", "token_type_ids")
+                    if name in window
+                }
+                for window in batch
+            ],
+            return_tensors="pt",
+        ).to(device)
+
+        with torch.no_grad():
+            outputs = model(**inputs)
+
+        for window, question_index, start_logits, end_logits in zip(
+            batch,
+            question_indices[start : start + batch_size],
+            outputs.start_logits.float().cpu(),
+            outputs.end_logits.float().cpu(),
+        ):
+            answers[question_index] += extract_answers(
+                window,
+                start_logits,
+                end_logits,
+                text,
+                offsets,
+                top_k,
+                max_answer_length,
+            )
+
+    # the windows overlap, the same answer can be found in several of them
+    for question_index, question_answers in enumerate(answers):
+        best = dict()
+        for answer in question_answers:
+            span = (answer["start"], answer["end"])
+            if span not in best or best[span]["score"] < answer["score"]:
+                best[span] = answer
+
+        answers[question_index] = sorted(
+            best.values(), key=lambda answer: answer["score"], reverse=True
+        )[:top_k]
+
+    return answers
+
+
+def extract_answers(
+    window: Dict[str, Any],
+    start_logits: torch.Tensor,
+    end_logits: torch.Tensor,
+    text: str,
+    offsets: List[Tuple[int, int]],
+    top_k: int,
+    max_answer_length: int,
+) -> List[Dict[str, Any]]:
+    """
+    Get the most likely answers of a window.
+
+    Args:
+        window (Dict[str, Any]): the window, see build_windows
+        start_logits (torch.Tensor): logits of the answer starting at each token of the window
+        end_logits (torch.Tensor): logits of the answer ending at each token of the window
+        text (str): the truecased context
+        offsets (List[Tuple[int, int]]): character offsets of the tokens of the context
+        top_k (int): number of answers to return
+        max_answer_length (int): maximum number of tokens of an answer
+
+    Returns:
+        List[Dict[str, Any]]: the answers, with their score and their start and end characters in the context
+    """
+
+    is_context = torch.zeros(len(start_logits), dtype=torch.bool)
+    is_context[window["context_positions"]] = True
+
+    # only the tokens of the context can be part of an answer,
+    # the first token stays in the softmax as some models use it for unanswerable questions
+    in_softmax = is_context.clone()
+    in_softmax[0] = True
+
+    start_probabilities = torch.softmax(
+        start_logits.masked_fill(~in_softmax, -10000.0), dim=-1
+    )
+    end_probabilities = torch.softmax(
+        end_logits.masked_fill(~in_softmax, -10000.0), dim=-1
+    )
+
+    # score of every span starting before it ends and not longer than max_answer_length
+    spans = start_probabilities[:, None] * end_probabilities[None, :]
+    spans = torch.triu(spans) - torch.triu(spans, diagonal=max_answer_length)
+    spans = spans * is_context[:, None] * is_context[None, :]
+
+    scores, indices = spans.flatten().topk(min(top_k, spans.numel()))
+
+    # position of the first context token of the window in the inputs
+    first_position = (
+        window["context_positions"][0] if window["context_positions"] else 0
+    )
+
+    answers = []
+    for score, index in zip(scores.tolist(), indices.tolist()):
+        if score <= 0:
+            break
+
+        start_token, end_token = divmod(index, spans.shape[1])
+        start_char = offsets[window["offset"] + start_token - first_position][0]
+        end_char = offsets[window["offset"] + end_token - first_position][1]
+
+        answers.append(
+            {
+                "answer": text[start_char:end_char],
+                "score": score,
+                "start": start_char,
+                "end": end_char,
+            }
+        )
+
+    return answers
@@ -0,0 +1,462 @@
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple
+
+import torch
+from nltk.tokenize import sent_tokenize
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+logger = getLogger(__name__)
+
+# number of sentences kept in memory by the translation memory
+TRANSLATION_MEMORY_SIZE = int(os.getenv("GLADIA_TRANSLATION_MEMORY_SIZE", 100000))
+
+# sqlite database persisting the translation memory, disabled if empty
+TRANSLATION_MEMORY_PATH = os.getenv("GLADIA_TRANSLATION_MEMORY_PATH", "")
+
+# maximum number of tokens of a sentence, the longer ones (unpunctuated or CJK text) being split
+TRANSLATION_MAX_SENTENCE_TOKENS = int(
+    os.getenv("GLADIA_TRANSLATION_MAX_SENTENCE_TOKENS", 256)
+)
+
+# punkt models available for the ISO 639-3 languages, english being used for the others
+PUNKT_LANGUAGES = {
+    "ces": "czech",
+    "dan": "danish",
+    "deu": "german",
+    "ell": "greek",
+    "eng": "english",
+    "est": "estonian",
+    "fin": "finnish",
+    "fra": "french",
+    "ita": "italian",
+    "nld": "dutch",
+    "nob": "norwegian",
+    "nno": "norwegian",
+    "pol": "polish",
+    "por": "portuguese",
+    "rus": "russian",
+    "slv": "slovene",
+    "spa": "spanish",
+    "swe": "swedish",
+    "tur": "turkish",
+}
+
+
+def split_sentences(text: str, language: str = "eng") -> List[List[str]]:
+    """
+    Split a text into paragraphs (on line breaks) and the paragraphs into sentences.
+
+    Args:
+        text (str): text to split
+        language (str): ISO 639-3 code of the language of the text (default: "eng")
+
+    Returns:
+        List[List[str]]: sentences of each paragraph, empty for the empty lines
+    """
+
+    punkt_language = PUNKT_LANGUAGES.get(language, "english")
+
+    return [
+        sent_tokenize(paragraph, language=punkt_language) if paragraph.strip() else []
+        for paragraph in text.split("\n")
+    ]
+
+
+def normalize_sentence(sentence: str) -> str:
+    """
+    Normalize a sentence for the translation memory: unicode composition and whitespaces.
+
+    Args:
+        sentence (str): sentence to normalize
+
+    Returns:
+        str: normalized sentence
+    """
+
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", sentence)).strip()
+
+
+class TranslationMemory(object):
+    """
+    Cache of the translated sentences, keyed by (normalized sentence, source, target, model).
+    The sentences are kept in a bounded in-memory LRU and optionally persisted in a sqlite database.
+
+    Args:
+        max_size (int): maximum number of sentences kept in memory
+        path (str): path to the sqlite database, no persistence if empty
+    """
+
+    def __init__(
+        self,
+        max_size: int = TRANSLATION_MEMORY_SIZE,
+        path: str = TRANSLATION_MEMORY_PATH,
+    ) -> None:
+        """
+        Constructor for TranslationMemory.
+
+        Args:
+            max_size (int): maximum number of sentences kept in memory (default: GLADIA_TRANSLATION_MEMORY_SIZE or 100000)
+            path (str): path to the sqlite database, no persistence if empty (default: GLADIA_TRANSLATION_MEMORY_PATH)
+
+        Returns:
+            None
+        """
+
+        self.max_size = max_size
+        self.sentences = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self.database = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+            self.database = sqlite3.connect(path, check_same_thread=False)
+            self.database.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "sentence TEXT, source TEXT, target TEXT, model TEXT, translation TEXT, "
+                "PRIMARY KEY (sentence, source, target, model))"
+            )
+            self.database.commit()
+
+    def get(self, key: Tuple[str, str, str, str]) -> Optional[str]:
+        """
+        Get the translation of a sentence.
+
+        Args:
+            key (Tuple[str, str, str, str]): (normalized sentence, source, target, model)
+
+        Returns:
+            Optional[str]: the translation, None if the sentence was never translated
+        """
+
+        with self.lock:
+            if key in self.sentences:
+                self.sentences.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self.sentences[key]
+
+            translation = None
+            if self.database is not None:
+                row = self.database.execute(
+                    "SELECT translation FROM translations "
+                    "WHERE sentence = ? AND source = ? AND target = ? AND model = ?",
+                    key,
+                ).fetchone()
+                translation = row[0] if row else None
+
+            if translation is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats["disk_hits"] += 1
+            self._remember(key, translation)
+
+            return translation
+
+    def set(self, items: Dict[Tuple[str, str, str, str], str]) -> None:
+        """
+        Store the translations of sentences.
+
+        Args:
+            items (Dict[Tuple[str, str, str, str], str]): translation of each (normalized sentence, source, target, model)
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            for key, translation in items.items():
+                self._remember(key, translation)
+
+            if self.database is not None and items:
+                self.database.executemany(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                    [(*key, translation) for key, translation in items.items()],
+                )
+                self.database.commit()
+
+    def _remember(self, key: Tuple[str, str, str, str], translation: str) -> None:
+        """
+        Keep a translation in memory, evicting the least recently used ones.
+
+        Args:
+            key (Tuple[str, str, str, str]): (normalized sentence, source, target, model)
+            translation (str): translation of the sentence
+
+        Returns:
+            None
+        """
+
+        self.sentences[key] = translation
+        self.sentences.move_to_end(key)
+
+        while len(self.sentences) > self.max_size:
+            self.sentences.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get the hit and miss counts of the memory and its hit rate.
+
+        Returns:
+            Dict[str, float]: the counts and the hit rate
+        """
+
+        with self.lock:
+            stats = dict(self.stats)
+
+        lookups = sum(stats.values())
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+
+        return stats
+
+
+class TranslationEngine(object):
+    """
+    Translation engine for seq2seq models with language codes (NLLB, M2M100...).
+    Texts are split into sentences which are translated in batches of sentences
+    of similar length, then reassembled into their paragraphs. The sentences longer
+    than max_sentence_tokens are split again, preferably between words.
+    The sentences found in the translation memory are not translated again.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of the model
+        device (Optional[str]): device to run the model on, cuda if available if None
+        memory (Optional[TranslationMemory]): translation memory consulted before translating a sentence
+        max_sentence_tokens (int): maximum number of tokens of a translated sentence
+    """
+
+    def __init__(
+        self,
+        checkpoint: str,
+        device: Optional[str] = None,
+        memory: Optional[TranslationMemory] = None,
+        max_sentence_tokens: int = TRANSLATION_MAX_SENTENCE_TOKENS,
+    ) -> None:
+        """
+        Constructor for TranslationEngine, loading the model and its tokenizer.
+
+        Args:
+            checkpoint (str): huggingface checkpoint of the model
+            device (Optional[str]): device to run the model on, cuda if available if None (default: None)
+            memory (Optional[TranslationMemory]): translation memory consulted before translating a sentence (default: None)
+            max_sentence_tokens (int): maximum number of tokens of a translated sentence (default: GLADIA_TRANSLATION_MAX_SENTENCE_TOKENS or 256)
+
+        Returns:
+            None
+        """
+
+        self.checkpoint = checkpoint
+        self.memory = memory
+
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+        self.tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+        self.model = AutoModelForSeq2SeqLM.from_pretrained(checkpoint)
+        self.model.to(self.device).eval()
+
+        # the special tokens (language code, end of sentence) count in the length limit of the model
+        self.max_sentence_tokens = max(
+            min(
+                max_sentence_tokens,
+                self.tokenizer.model_max_length
+                - self.tokenizer.num_special_tokens_to_add(),
+            ),
+            1,
+        )
+
+        # the source language is an attribute of the tokenizer
+        self.lock = threading.Lock()
+
+    def translate_batch(
+        self, sentences: List[str], source_language: str, target_language: str
+    ) -> List[str]:
+        """
+        Translate a batch of sentences in a single generate call.
+
+        Args:
+            sentences (List[str]): sentences to translate
+            source_language (str): code of the source language for the model (eng_Latn)
+            target_language (str): code of the target language for the model (fra_Latn)
+
+        Returns:
+            List[str]: translated sentences
+        """
+
+        with self.lock:
+            self.tokenizer.src_lang = source_language
+            inputs = self.tokenizer(
+                sentences, return_tensors="pt", padding=True, truncation=True
+            ).to(self.device)
+
+        with torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                forced_bos_token_id=self.tokenizer.convert_tokens_to_ids(
+                    target_language
+                ),
+                # the translation of a sentence is rarely twice as long as the sentence
+                max_new_tokens=inputs["input_ids"].shape[1] * 2 + 16,
+            )
+
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+    def split_long_sentence(self, sentence: str) -> List[str]:
+        """
+        Split a sentence longer than max_sentence_tokens into pieces of at most max_sentence_tokens tokens,
+        cut before a word in the second half of the piece if there is one, within a word otherwise.
+
+        Args:
+            sentence (str): sentence to split
+
+        Returns:
+            List[str]: the pieces of the sentence, the sentence itself if it isn't too long
+        """
+
+        # only the fast tokenizers give the position of the tokens in the text
+        if not self.tokenizer.is_fast:
+            tokens = len(self.tokenizer.tokenize(sentence))
+            if tokens > self.max_sentence_tokens:
+                logger.warning(
+                    f"Sentence of {tokens} tokens not split, it's truncated past the maximum length of the model"
+                )
+            return [sentence]
+
+        offsets = self.tokenizer(
+            sentence, add_special_tokens=False, return_offsets_mapping=True
+        )["offset_mapping"]
+
+        if len(offsets) <= self.max_sentence_tokens:
+            return [sentence]
+
+        def starts_word(token: int) -> bool:
+            # some tokenizers include the preceding space in the token
+            position = offsets[token][0]
+            return any(
+                character.isspace()
+                for character in sentence[max(position - 1, 0) : position + 1]
+            )
+
+        pieces, start = [], 0
+
+        while len(offsets) - start > self.max_sentence_tokens:
+            end = start + self.max_sentence_tokens
+            end = next(
+                (
+                    token
+                    for token in range(end, start + self.max_sentence_tokens // 2, -1)
+                    if starts_word(token)
+                ),
+                end,
+            )
+
+            pieces.append(sentence[offsets[start][0] : offsets[end][0]].strip())
+            start = end
+
+        pieces.append(sentence[offsets[start][0] :].strip())
+
+        logger.debug(
+            f"Split a sentence of {len(offsets)} tokens into {len(pieces)} pieces"
+        )
+
+        return [piece for piece in pieces if piece]
+
+    def translate(
+        self,
+        texts: List[str],
+        source_language: str,
+        target_language: str,
+        language: str = "eng",
+        batch_size: int = 16,
+    ) -> List[str]:
+        """
+        Translate texts of any length.
+
+        Args:
+            texts (List[str]): texts to translate
+            source_language (str): code of the source language for the model (eng_Latn)
+            target_language (str): code of the target language for the model (fra_Latn)
+            language (str): ISO 639-3 code of the source language, to split the sentences (default: "eng")
+            batch_size (int): maximum number of sentences translated at once (default: 16)
+
+        Returns:
+            List[str]: translated texts
+        """
+
+        paragraphs = [
+            [
+                [
+                    piece
+                    for sentence in sentences
+                    for piece in self.split_long_sentence(sentence)
+                ]
+                for sentences in split_sentences(text, language)
+            ]
+            for text in texts
+        ]
+
+        # (text, paragraph, sentence) index of each sentence
+        positions: List[Tuple[int, int, int]] = [
+            (text_index, paragraph_index, sentence_index)
+            for text_index, text_paragraphs in enumerate(paragraphs)
+            for paragraph_index, sentences in enumerate(text_paragraphs)
+            for sentence_index in range(len(sentences))
+        ]
+
+        # the repeated sentences are only translated once
+        # and the ones already in the translation memory aren't translated at all
+        keys = {
+            (t, p, s): (
+                normalize_sentence(paragraphs[t][p][s]),
+                source_language,
+                target_language,
+                self.checkpoint,
+            )
+            for t, p, s in positions
+        }
+
+        translations = dict()
+        for key in set(keys.values()):
+            translation = self.memory.get(key) if self.memory is not None else None
+            if translation is not None:
+                translations[key] = translation
+
+        to_translate = list(
+            {key for key in keys.values() if key not in translations and key[0]}
+        )
+
+        # batching sentences of similar length minimizes the padding
+        to_translate.sort(key=lambda key: (len(self.tokenizer.tokenize(key[0])), key))
+
+        logger.debug(
+            f"Translating {len(to_translate)} of {len(positions)} sentences from {source_language} to {target_language}"
+        )
+
+        new_translations = dict()
+        for start in range(0, len(to_translate), batch_size):
+            batch = to_translate[start : start + batch_size]
+            batch_translations = self.translate_batch(
+                [key[0] for key in batch], source_language, target_language
+            )
+            new_translations.update(zip(batch, batch_translations))
+
+        if self.memory is not None:
+            self.memory.set(new_translations)
+            logger.debug(f"Translation memory: {self.memory.get_stats()}")
+
+        translations.update(new_translations)
+
+        for (t, p, s), key in keys.items():
+            paragraphs[t][p][s] = translations.get(key, paragraphs[t][p][s])
+
+        return [
+            "\n".join(" ".join(sentences) for sentences in text_paragraphs)
+            for text_paragraphs in paragraphs
+        ]
@@ -0,0 +1,390 @@
+import math
+import os
+import re
+import string
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from logging import getLogger
+from typing import Dict, List, Optional
+
+import truecase
+from nltk.tokenize import NLTKWordTokenizer, sent_tokenize
+
+from .model_management import load_resident_model
+
+logger = getLogger(__name__)
+
+# number of truecased texts kept in memory
+TRUECASE_CACHE_SIZE = int(os.getenv("GLADIA_TRUECASE_CACHE_SIZE", 10000))
+
+# whether the texts of the current request are truecased, set per request by the TaskRouter
+truecase_enabled: ContextVar[bool] = ContextVar("truecase_enabled", default=True)
+
+# punkt only splits sentences on these characters
+SENTENCE_END = re.compile(r"[.!?]")
+
+# texts made of words and numbers only, which the treebank tokenizer and detokenizer
+# leave as they are apart from the contractions below
+PLAIN_TEXT = re.compile(r"[A-Za-z0-9 \t\n]*")
+
+# words of a plain text split in two by the treebank tokenizer
+SPLIT_CONTRACTIONS = {"cannot", "gimme", "gonna", "gotta", "lemme", "wanna"}
+
+# smoothing count of the truecase statistical model
+PSEUDO_COUNT = 5.0
+
+
+class Truecaser(object):
+    """
+    Truecaser producing the same output as truecase.get_true_case, loading its statistical model once.
+    The words having a single casing are looked up in a precomputed table, the texts made of
+    words only skip the treebank regexes, punkt is skipped for the texts which can't contain
+    several sentences, and the recent texts are memoized.
+
+    Args:
+        max_size (int): maximum number of truecased texts kept in memory
+    """
+
+    def __init__(self, max_size: int = TRUECASE_CACHE_SIZE) -> None:
+        """
+        Constructor for Truecaser, loading the statistical model of truecase.
+
+        Args:
+            max_size (int): maximum number of truecased texts kept in memory (default: GLADIA_TRUECASE_CACHE_SIZE or 10000)
+
+        Returns:
+            None
+        """
+
+        self.model = truecase.get_truecaser()
+        self.word_tokenizer = NLTKWordTokenizer()
+
+        # the casings of each word in the order truecase iterates over them
+        # and the unigram score of the casings of the words having several ones
+        self.casings: Dict[str, List[str]] = dict()
+        self.single_casings: Dict[str, str] = dict()
+        self.unigram_scores: Dict[str, float] = dict()
+        for word, casings in self.model.word_casing_lookup.items():
+            if len(casings) == 1:
+                self.single_casings[word] = next(iter(casings))
+                continue
+
+            self.casings[word] = list(casings)
+
+            denominator = sum(
+                self.model.uni_dist[casing] + PSEUDO_COUNT for casing in casings
+            )
+            for casing in casings:
+                self.unigram_scores[casing] = math.log(
+                    (self.model.uni_dist[casing] + PSEUDO_COUNT) / denominator
+                )
+
+        self.max_size = max_size
+        self.texts = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "seconds": 0.0}
+
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Tokenize a text as nltk.word_tokenize does.
+
+        Args:
+            text (str): text to tokenize
+
+        Returns:
+            List[str]: tokens of the text
+        """
+
+        # the ~40 regexes of the treebank tokenizer are skipped for the plain texts
+        if PLAIN_TEXT.fullmatch(text) and SPLIT_CONTRACTIONS.isdisjoint(
+            text.lower().split()
+        ):
+            return text.split()
+
+        # a sentence end can only be followed by another sentence if it isn't the last character
+        if SENTENCE_END.search(text.rstrip()[:-1]) is None:
+            sentences = [text]
+        else:
+            sentences = sent_tokenize(text)
+
+        return [
+            token
+            for sentence in sentences
+            for token in self.word_tokenizer.tokenize(sentence)
+        ]
+
+    def detokenize(self, tokens: List[str]) -> str:
+        """
+        Detokenize tokens as nltk's TreebankWordDetokenizer does.
+
+        Args:
+            tokens (List[str]): tokens to detokenize
+
+        Returns:
+            str: detokenized text
+        """
+
+        text = " ".join(tokens)
+
+        if not PLAIN_TEXT.fullmatch(text):
+            return self.model.detknzr.detokenize(tokens)
+
+        # only the contractions can be undone in a plain text
+        text = f" {text} "
+        for regexp in self.model.detknzr.CONTRACTIONS3:
+            text = regexp.sub(r"\1\2", text)
+        for regexp in self.model.detknzr.CONTRACTIONS2:
+            text = regexp.sub(r"\1\2", text)
+
+        return text.strip()
+
+    def get_best_casing(
+        self, prev_token: Optional[str], word: str, next_token: Optional[str]
+    ) -> str:
+        """
+        Get the most probable casing of a word knowing its neighbours, scoring the casings as
+        truecase.TrueCaser.get_score does but computing the normalizations once for all of them.
+
+        Args:
+            prev_token (Optional[str]): the previous truecased token, None for the first token
+            word (str): the lowercased word, having several casings
+            next_token (Optional[str]): the next token, None for the last token
+
+        Returns:
+            str: the casing having the highest score, the first one on ties
+        """
+
+        model = self.model
+        casings = self.casings[word]
+
+        scores = [self.unigram_scores[casing] for casing in casings]
+
+        counts = []
+        if prev_token is not None:
+            counts.append(
+                [
+                    model.backward_bi_dist.get(f"{prev_token}_{casing}", 0)
+                    + PSEUDO_COUNT
+                    for casing in casings
+                ]
+            )
+
+        if next_token is not None:
+            next_token = next_token.lower()
+            counts.append(
+                [
+                    model.forward_bi_dist.get(f"{casing}_{next_token}", 0)
+                    + PSEUDO_COUNT
+                    for casing in casings
+                ]
+            )
+
+        if prev_token is not None and next_token is not None:
+            counts.append(
+                [
+                    model.trigram_dist.get(f"{prev_token}_{casing}_{next_token}", 0)
+                    + PSEUDO_COUNT
+                    for casing in casings
+                ]
+            )
+
+        # the normalization of a distribution is the same for all the casings
+        for casing_counts in counts:
+            denominator = sum(casing_counts)
+            for index, count in enumerate(casing_counts):
+                scores[index] += math.log(count / denominator)
+
+        best_index = max(range(len(casings)), key=scores.__getitem__)
+
+        return casings[best_index]
+
+    def truecase_tokens(self, tokens: List[str]) -> List[str]:
+        """
+        Truecase the tokens of a text, out of vocabulary words being title cased.
+
+        Args:
+            tokens (List[str]): tokens of the text
+
+        Returns:
+            List[str]: truecased tokens
+        """
+
+        tokens_true_case = []
+        for index, token in enumerate(tokens):
+            if token in string.punctuation or token.isdigit():
+                tokens_true_case.append(token)
+                continue
+
+            word = token.lower()
+            if word in self.single_casings:
+                tokens_true_case.append(self.single_casings[word])
+            elif word in self.casings:
+                prev_token = tokens_true_case[index - 1] if index > 0 else None
+                next_token = tokens[index + 1] if index < len(tokens) - 1 else None
+
+                tokens_true_case.append(
+                    self.get_best_casing(prev_token, word, next_token)
+                )
+            else:
+                tokens_true_case.append(word.title())
+                continue
+
+            if index == 0:
+                tokens_true_case[0] = tokens_true_case[0].capitalize()
+
+        return tokens_true_case
+
+    def restore_case(self, text: str) -> str:
+        """
+        Truecase a text changing only the case of its characters, its whitespaces and
+        punctuation being kept so that character offsets in the text remain valid.
+
+        Args:
+            text (str): text to truecase
+
+        Returns:
+            str: truecased text, of the same length as the text
+        """
+
+        tokens = self.tokenize(text)
+        characters = list(text)
+
+        position = 0
+        for token, true_token in zip(tokens, self.truecase_tokens(tokens)):
+            start = text.find(token, position)
+
+            # the quotes are rewritten by the tokenizer and aren't cased anyway
+            if start < 0:
+                continue
+
+            position = start + len(token)
+            if len(true_token) == len(token):
+                characters[start:position] = true_token
+
+        return "".join(characters)
+
+    def get_true_cases(self, texts: List[str]) -> List[str]:
+        """
+        Truecase texts, the recently truecased ones being taken from memory.
+
+        Args:
+            texts (List[str]): texts to truecase
+
+        Returns:
+            List[str]: truecased texts
+        """
+
+        results = dict()
+        with self.lock:
+            for text in texts:
+                if text in self.texts:
+                    self.texts.move_to_end(text)
+                    results[text] = self.texts[text]
+                    self.stats["hits"] += 1
+
+        start = time.perf_counter()
+
+        new_results = dict()
+        for text in texts:
+            if text not in results and text not in new_results:
+                new_results[text] = self.detokenize(
+                    self.truecase_tokens(self.tokenize(text))
+                )
+
+        seconds = time.perf_counter() - start
+
+        with self.lock:
+            self.stats["misses"] += len(new_results)
+            self.stats["seconds"] += seconds
+
+            for text, result in new_results.items():
+                self.texts[text] = result
+                self.texts.move_to_end(text)
+
+            while len(self.texts) > self.max_size:
+                self.texts.popitem(last=False)
+
+        results.update(new_results)
+
+        return [results[text] for text in texts]
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get the hit and miss counts of the memory, its hit rate
+        and the mean time spent truecasing a text which wasn't in memory.
+
+        Returns:
+            Dict[str, float]: the counts, the hit rate and the mean time in seconds
+        """
+
+        with self.lock:
+            stats = dict(self.stats)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["mean_seconds"] = (
+            stats.pop("seconds") / stats["misses"] if stats["misses"] else 0.0
+        )
+
+        return stats
+
+
+def get_truecaser() -> Truecaser:
+    """
+    Get the truecaser, created only once.
+
+    Returns:
+        Truecaser: the truecaser
+    """
+
+    return load_resident_model("truecaser", Truecaser)
+
+
+def get_true_cases(texts: List[str]) -> List[str]:
+    """
+    Truecase texts, unless truecasing was disabled for the current request.
+
+    Args:
+        texts (List[str]): texts to truecase
+
+    Returns:
+        List[str]: truecased texts
+    """
+
+    if not truecase_enabled.get():
+        return list(texts)
+
+    return get_truecaser().get_true_cases(texts)
+
+
+def get_true_case(text: str) -> str:
+    """
+    Truecase a text, unless truecasing was disabled for the current request.
+
+    Args:
+        text (str): text to truecase
+
+    Returns:
+        str: truecased text
+    """
+
+    return get_true_cases([text])[0]
+
+
+def restore_case(text: str) -> str:
+    """
+    Truecase a text keeping its character offsets, unless truecasing was disabled for the current request.
+
+    Args:
+        text (str): text to truecase
+
+    Returns:
+        str: truecased text, of the same length as the text
+    """
+
+    if not truecase_enabled.get():
+        return text
+
+    return get_truecaser().restore_case(text)
@@ -0,0 +1,1079 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .model_management import load_resident_model
+
+logger = getLogger(__name__)
+
+# directory where the collections are persisted
+VECTOR_INDEX_PATH = os.getenv("GLADIA_VECTOR_INDEX_PATH", "/tmp/gladia/vector_indexes")
+
+# below this number of documents the collections are searched exhaustively
+IVF_MIN_SIZE = int(os.getenv("GLADIA_IVF_MIN_SIZE", 4096))
+
+# number of inverted lists searched for each query
+IVF_NPROBE = int(os.getenv("GLADIA_IVF_NPROBE", 8))
+
+COLLECTION_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scale vectors to unit norm, so their dot product is their cosine similarity.
+
+    Args:
+        vectors (np.ndarray): vectors to normalize, one per row
+
+    Returns:
+        np.ndarray: the normalized vectors
+    """
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def reserve(
+    buffer: Optional[np.ndarray], size: int, shape: Tuple[int, ...], dtype: Any
+) -> np.ndarray:
+    """
+    Get a buffer of at least size rows, doubling its capacity when it's too small
+    so that appending rows one batch at a time only copies it a logarithmic number of times.
+
+    Args:
+        buffer (Optional[np.ndarray]): the current buffer, None if there is none
+        size (int): number of rows needed
+        shape (Tuple[int, ...]): shape of a row
+        dtype (Any): type of the values
+
+    Returns:
+        np.ndarray: the buffer, or a larger one starting with its rows
+    """
+
+    capacity = 0 if buffer is None else len(buffer)
+    if size <= capacity:
+        return buffer
+
+    new_buffer = np.empty((max(size, 2 * capacity, 1024), *shape), dtype=dtype)
+    if capacity:
+        new_buffer[:capacity] = buffer
+
+    return new_buffer
+
+
+def write_file(path: str, write: Callable[[Any], None]) -> None:
+    """
+    Write a file atomically: it's written to a unique temporary file of the same directory
+    which then replaces it, so that a reader never sees a partially written file.
+
+    Args:
+        path (str): path of the file
+        write (Callable[[Any], None]): function writing the content to the binary file it's given
+
+    Returns:
+        None
+    """
+
+    descriptor, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}."
+    )
+
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Get the indices of the k highest scores, from the highest.
+
+    Args:
+        scores (np.ndarray): scores
+        k (int): number of indices to return
+
+    Returns:
+        np.ndarray: the indices
+    """
+
+    k = min(k, len(scores))
+    if k == 0:
+        return np.array([], dtype=np.int64)
+
+    indices = np.argpartition(-scores, k - 1)[:k]
+
+    return indices[np.argsort(-scores[indices])]
+
+
+class IVFIndex(object):
+    """
+    Inverted file index over unit vectors: the vectors are clustered with spherical k-means
+    and a query is only compared to the vectors of its nprobe closest clusters.
+    The clusters are trained again when the number of vectors doubles, the vectors added
+    in between are only assigned to their cluster and the inverted lists are rebuilt on the next query.
+
+    Args:
+        nprobe (int): number of clusters searched for each query
+    """
+
+    def __init__(self, nprobe: int = IVF_NPROBE) -> None:
+        """
+        Constructor for IVFIndex.
+
+        Args:
+            nprobe (int): number of clusters searched for each query (default: GLADIA_IVF_NPROBE or 8)
+
+        Returns:
+            None
+        """
+
+        self.nprobe = nprobe
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.array([], dtype=np.int32)
+        self.assignments_buffer: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self.lists_outdated = False
+        self.trained_size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        """
+        Whether the clusters were trained.
+
+        Returns:
+            bool: True if the clusters were trained
+        """
+
+        return self.centroids is not None
+
+    @property
+    def clusters(self) -> int:
+        """
+        Number of clusters.
+
+        Returns:
+            int: the number of clusters, 0 if the clusters weren't trained
+        """
+
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def train(self, vectors: np.ndarray, iterations: int = 10) -> None:
+        """
+        Cluster the vectors, about sqrt(n) clusters being used.
+
+        Args:
+            vectors (np.ndarray): all the vectors of the collection
+            iterations (int): number of k-means iterations (default: 10)
+
+        Returns:
+            None
+        """
+
+        random = np.random.default_rng(0)
+        clusters = int(min(max(np.sqrt(len(vectors)), 1), 1024))
+
+        # the clusters are learned on a sample, then every vector is assigned
+        sample = vectors[
+            random.choice(len(vectors), min(len(vectors), clusters * 64), replace=False)
+        ]
+        centroids = sample[random.choice(len(sample), clusters, replace=False)]
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            # empty clusters keep their centroid
+            empty = np.bincount(labels, minlength=clusters) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+
+        self.centroids = centroids
+        self.trained_size = len(vectors)
+        self.assign(vectors)
+
+    def assign(self, vectors: np.ndarray) -> None:
+        """
+        Assign every vector to its closest cluster and rebuild the inverted lists.
+
+        Args:
+            vectors (np.ndarray): all the vectors of the collection
+
+        Returns:
+            None
+        """
+
+        self.assignments_buffer = None
+        self.add(vectors, np.arange(len(vectors)))
+
+    def add(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        """
+        Assign new or replaced vectors to their closest cluster.
+
+        Args:
+            vectors (np.ndarray): all the vectors of the collection
+            rows (np.ndarray): rows of the vectors to assign
+
+        Returns:
+            None
+        """
+
+        size = len(vectors)
+        self.assignments_buffer = reserve(self.assignments_buffer, size, (), np.int32)
+
+        for start in range(0, len(rows), 65536):
+            batch = rows[start : start + 65536]
+            self.assignments_buffer[batch] = np.argmax(
+                vectors[batch] @ self.centroids.T, axis=1
+            )
+
+        self.assignments = self.assignments_buffer[:size]
+        self.lists_outdated = True
+
+    def _build_lists(self) -> None:
+        """
+        Group the vectors of each cluster.
+
+        Returns:
+            None
+        """
+
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(
+            self.assignments[order], np.arange(len(self.centroids) + 1)
+        )
+
+        self.lists = [order[bounds[i] : bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """
+        Get the vectors of the clusters closest to a query.
+
+        Args:
+            query (np.ndarray): unit query vector
+
+        Returns:
+            np.ndarray: indices of the candidate vectors
+        """
+
+        if self.lists_outdated:
+            self._build_lists()
+            self.lists_outdated = False
+
+        clusters = top_k(self.centroids @ query, self.nprobe)
+
+        return np.concatenate([self.lists[cluster] for cluster in clusters])
+
+    def load(
+        self,
+        centroids: np.ndarray,
+        assignments_buffer: np.ndarray,
+        size: int,
+        trained_size: int,
+    ) -> None:
+        """
+        Use persisted clusters and assignments.
+
+        Args:
+            centroids (np.ndarray): centroids of the clusters
+            assignments_buffer (np.ndarray): buffer of the assignments, with room for the vectors added later
+            size (int): number of assigned vectors
+            trained_size (int): number of vectors the clusters were trained on
+
+        Returns:
+            None
+        """
+
+        self.centroids = centroids
+        self.assignments_buffer = assignments_buffer
+        self.assignments = assignments_buffer[:size]
+        self.trained_size = trained_size
+        self.lists_outdated = True
+
+
+class Collection(object):
+    """
+    Named set of documents and of their embeddings, searched by cosine similarity.
+
+    The collection is persisted as generations of files which are only appended to: the embeddings
+    (and the cluster of each embedding once the index is trained) are rows of memory-mapped arrays
+    preallocated with room for as many new rows, and the documents are lines of a log, a replaced
+    document being appended again and its previous row ignored. An upsert only writes its own rows,
+    the cost of writing the whole collection is only paid when a new generation is written:
+    once its arrays are full or the index must be trained again, i.e. whenever the collection doubled
+    in size, the documents being compacted. collection.json, replaced last, holds the number of valid
+    rows of the current generation.
+
+    A collection can be used by several processes: its files are only written under an exclusive
+    file lock, and a process reads the rows appended by another one as soon as collection.json
+    was replaced, rereading the whole collection only after a new generation.
+
+    Args:
+        name (str): name of the collection
+        model (str): model embedding the documents of the collection
+        path (str): directory where the collection is persisted
+    """
+
+    def __init__(self, name: str, model: str, path: str) -> None:
+        """
+        Constructor for Collection.
+
+        Args:
+            name (str): name of the collection
+            model (str): model embedding the documents of the collection
+            path (str): directory where the collection is persisted
+
+        Returns:
+            None
+        """
+
+        self.name = name
+        self.model = model
+        self.path = path
+
+        # id, text and metadata of each row, the rows of replaced documents not being alive anymore
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = dict()
+        self.texts: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.alive = np.array([], dtype=bool)
+        self.alive_buffer: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.vectors_buffer: Optional[np.ndarray] = None
+        self.index = IVFIndex()
+
+        # unique id of the collection (a collection can be deleted and created again),
+        # generation of its files, size of the log of the documents read or written
+        # and version of collection.json
+        self.uid = uuid.uuid4().hex
+        self.generation = 0
+        self.log_size = 0
+        self.version: Optional[Tuple[int, int, int]] = None
+
+        self.lock = threading.RLock()
+        self.metrics = {
+            "build_count": 0,
+            "last_build_ms": 0.0,
+            "query_count": 0,
+            "total_query_ms": 0.0,
+            "last_query_ms": 0.0,
+        }
+
+    def __len__(self) -> int:
+        """
+        Number of documents of the collection.
+
+        Returns:
+            int: the number of documents
+        """
+
+        return len(self.rows)
+
+    def get_file_path(self, kind: str, generation: Optional[int] = None) -> str:
+        """
+        Get the path of a file of a generation of the collection.
+
+        Args:
+            kind (str): kind of file: vectors, documents, centroids or assignments
+            generation (Optional[int]): generation of the file, the current one if None (default: None)
+
+        Returns:
+            str: the path of the file
+        """
+
+        generation = self.generation if generation is None else generation
+        extension = "jsonl" if kind == "documents" else "npy"
+
+        return os.path.join(self.path, f"{kind}-{generation}.{extension}")
+
+    @contextmanager
+    def file_lock(self) -> Iterator[None]:
+        """
+        Lock the files of the collection for the other threads and processes, the collection
+        being reloaded first if another process changed it.
+
+        Returns:
+            Iterator[None]: the locked context
+
+        Raises:
+            KeyError: if the collection was deleted
+        """
+
+        with self.lock:
+            try:
+                lock_file = open(os.path.join(self.path, ".lock"), "a")
+            except FileNotFoundError:
+                raise KeyError(f"Collection {self.name} does not exist")
+
+            with lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_version(self) -> Tuple[int, int, int]:
+        """
+        Get the version of collection.json, which changes whenever it's replaced.
+
+        Returns:
+            Tuple[int, int, int]: its inode, modification time and size
+
+        Raises:
+            KeyError: if the collection was deleted
+        """
+
+        try:
+            stat = os.stat(os.path.join(self.path, "collection.json"))
+        except FileNotFoundError:
+            raise KeyError(f"Collection {self.name} does not exist")
+
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def refresh(self) -> None:
+        """
+        Reload the collection if another process changed it since it was read or written.
+
+        Returns:
+            None
+
+        Raises:
+            KeyError: if the collection was deleted
+        """
+
+        with self.lock:
+            # a generation can be removed between reading collection.json and its files
+            for attempt in range(3):
+                version = self.read_version()
+                if version == self.version:
+                    return
+
+                try:
+                    self.read()
+                except FileNotFoundError:
+                    if attempt == 2:
+                        raise
+                    continue
+
+                self.version = version
+                return
+
+    def read(self) -> None:
+        """
+        Read the files of the collection: only the rows appended since it was last read or written
+        if the generation didn't change, the whole generation otherwise.
+
+        Returns:
+            None
+        """
+
+        with open(os.path.join(self.path, "collection.json"), "r") as file:
+            manifest = json.load(file)
+
+        if (
+            manifest["uid"] != self.uid
+            or manifest["generation"] != self.generation
+            or manifest["size"] < len(self.ids)
+        ):
+            self._read_generation(manifest)
+
+        with open(self.get_file_path("documents"), "rb") as file:
+            file.seek(self.log_size)
+            lines = file.read(manifest["log_size"] - self.log_size).splitlines()
+
+        for line in lines:
+            document = json.loads(line)
+            self._add_row(document["id"], document["text"], document["metadata"])
+
+        self.log_size = manifest["log_size"]
+        self.model = manifest["model"]
+
+        size = len(self.ids)
+        if self.vectors_buffer is not None:
+            self.vectors = self.vectors_buffer[:size]
+        if self.index.is_trained:
+            self.index.load(
+                self.index.centroids,
+                self.index.assignments_buffer,
+                size,
+                self.index.trained_size,
+            )
+
+    def _read_generation(self, manifest: Dict[str, Any]) -> None:
+        """
+        Forget the rows of the collection and map the arrays of the generation of collection.json.
+
+        Args:
+            manifest (Dict[str, Any]): content of collection.json
+
+        Returns:
+            None
+        """
+
+        self.uid = manifest["uid"]
+        self.generation = manifest["generation"]
+        self.log_size = 0
+
+        self.ids = []
+        self.rows = dict()
+        self.texts = []
+        self.metadata = []
+        self.alive = np.array([], dtype=bool)
+        self.alive_buffer = None
+
+        self.vectors = None
+        self.vectors_buffer = None
+        if os.path.exists(self.get_file_path("vectors")):
+            self.vectors_buffer = np.load(self.get_file_path("vectors"), mmap_mode="r+")
+
+        self.index = IVFIndex()
+        if manifest["trained_size"]:
+            self.index.load(
+                np.load(self.get_file_path("centroids")),
+                np.load(self.get_file_path("assignments"), mmap_mode="r+"),
+                0,
+                manifest["trained_size"],
+            )
+
+    def _add_row(self, document_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """
+        Add a row for a new or replaced document, the previous row of a replaced one not being alive anymore.
+
+        Args:
+            document_id (str): id of the document
+            text (str): text of the document
+            metadata (Dict[str, Any]): metadata of the document
+
+        Returns:
+            None
+        """
+
+        row = len(self.ids)
+        self.alive_buffer = reserve(self.alive_buffer, row + 1, (), bool)
+
+        previous = self.rows.get(document_id, None)
+        if previous is not None:
+            self.alive_buffer[previous] = False
+
+        self.alive_buffer[row] = True
+        self.rows[document_id] = row
+        self.ids.append(document_id)
+        self.texts.append(text)
+        self.metadata.append(metadata)
+
+        self.alive = self.alive_buffer[: row + 1]
+
+    def upsert(
+        self,
+        documents: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+    ) -> None:
+        """
+        Add documents to the collection, the documents with an existing id being replaced,
+        and persist the collection: their rows are appended to the files of the current generation,
+        a new generation being written when its arrays are full or the index must be trained again.
+
+        Args:
+            documents (List[Dict[str, Any]]): documents, with an "id", a "text" and an optional "metadata"
+            embeddings (np.ndarray): embedding of each document
+
+        Returns:
+            None
+
+        Raises:
+            KeyError: if the collection was deleted
+        """
+
+        if not documents:
+            return
+
+        embeddings = normalize(embeddings)
+
+        with self.file_lock():
+            start = len(self.ids)
+
+            try:
+                # a document upserted twice in the request keeps its last row
+                for document in documents:
+                    self._add_row(
+                        str(document["id"]),
+                        document.get("text", ""),
+                        document.get("metadata") or {},
+                    )
+
+                size = len(self.ids)
+                capacity = (
+                    0 if self.vectors_buffer is None else len(self.vectors_buffer)
+                )
+
+                if size > capacity or self._index_outdated():
+                    vectors = np.empty((size, embeddings.shape[1]), dtype=np.float32)
+                    if start:
+                        vectors[:start] = self.vectors
+                    vectors[start:] = embeddings
+                    self.vectors = vectors
+
+                    self.save()
+                else:
+                    self._append(start, embeddings)
+
+            except BaseException:
+                # the rows which may not have been written are read again
+                self.version = None
+                raise
+
+    def _index_outdated(self) -> bool:
+        """
+        Whether the index must be trained: the collection became large enough or doubled in size since the last training.
+
+        Returns:
+            bool: True if the index must be trained
+        """
+
+        return len(self) >= IVF_MIN_SIZE and (
+            not self.index.is_trained or len(self) >= 2 * self.index.trained_size
+        )
+
+    def _append(self, start: int, embeddings: np.ndarray) -> None:
+        """
+        Write the rows added from start to the files of the current generation,
+        then collection.json with the new number of rows.
+
+        Args:
+            start (int): first row to write
+            embeddings (np.ndarray): normalized embeddings of the rows
+
+        Returns:
+            None
+        """
+
+        size = len(self.ids)
+
+        self.vectors_buffer[start:size] = embeddings
+        self.vectors_buffer.flush()
+        self.vectors = self.vectors_buffer[:size]
+
+        if self.index.is_trained:
+            self.index.add(self.vectors, np.arange(start, size))
+            self.index.assignments_buffer.flush()
+
+        with open(self.get_file_path("documents"), "r+b") as file:
+            # drops what a writer which failed may have appended
+            file.truncate(self.log_size)
+            file.seek(self.log_size)
+            file.write(self._serialize_rows(range(start, size)))
+            self.log_size = file.tell()
+
+        self._write_manifest()
+
+    def _serialize_rows(self, rows: Iterable[int]) -> bytes:
+        """
+        Get the lines of the log of the documents of some rows.
+
+        Args:
+            rows (Iterable[int]): the rows
+
+        Returns:
+            bytes: the lines
+        """
+
+        return b"".join(
+            json.dumps(
+                {
+                    "id": self.ids[row],
+                    "text": self.texts[row],
+                    "metadata": self.metadata[row],
+                }
+            ).encode("utf-8")
+            + b"\n"
+            for row in rows
+        )
+
+    def _write_manifest(self) -> None:
+        """
+        Replace collection.json, which makes the rows written before it visible to the other processes.
+
+        Returns:
+            None
+        """
+
+        manifest = {
+            "name": self.name,
+            "model": self.model,
+            "uid": self.uid,
+            "generation": self.generation,
+            "size": len(self.ids),
+            "log_size": self.log_size,
+            "trained_size": self.index.trained_size if self.index.is_trained else 0,
+        }
+        write_file(
+            os.path.join(self.path, "collection.json"),
+            lambda file: file.write(json.dumps(manifest).encode("utf-8")),
+        )
+
+        self.version = self.read_version()
+
+    def _update_index(self) -> None:
+        """
+        Train the index once the collection is large enough and whenever it doubled in size,
+        only assign the vectors to the existing clusters otherwise.
+
+        Returns:
+            None
+        """
+
+        if self._index_outdated():
+            start = time.perf_counter()
+
+            self.index.train(self.vectors)
+            self.metrics["build_count"] += 1
+            self.metrics["last_build_ms"] = (time.perf_counter() - start) * 1000
+
+            logger.info(
+                f"Trained the index of {self.name} on {len(self)} documents in {self.metrics['last_build_ms']:.1f}ms"
+            )
+        elif self.index.is_trained:
+            self.index.assign(self.vectors)
+
+    def query(self, embedding: np.ndarray, k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the documents closest to an embedding.
+
+        Args:
+            embedding (np.ndarray): embedding of the query
+            k (int): number of documents to return (default: 10)
+
+        Returns:
+            List[Dict[str, Any]]: the documents, from the closest, with their id, text, metadata and similarity score
+
+        Raises:
+            KeyError: if the collection was deleted
+        """
+
+        start = time.perf_counter()
+        query = normalize(embedding.reshape(1, -1))[0]
+
+        with self.lock:
+            self.refresh()
+
+            if self.vectors is None:
+                return []
+
+            if self.index.is_trained:
+                candidates = self.index.candidates(query)
+                candidates = candidates[self.alive[candidates]]
+                scores = self.vectors[candidates] @ query
+                rows = candidates[top_k(scores, k)]
+                scores = self.vectors[rows] @ query
+            else:
+                scores = self.vectors @ query
+                scores[~self.alive] = -np.inf
+                rows = top_k(scores, min(k, len(self)))
+                scores = scores[rows]
+
+            results = [
+                {
+                    "id": self.ids[row],
+                    "text": self.texts[row],
+                    "metadata": self.metadata[row],
+                    "score": float(score),
+                }
+                for row, score in zip(rows, scores)
+            ]
+
+            elapsed = (time.perf_counter() - start) * 1000
+            self.metrics["query_count"] += 1
+            self.metrics["total_query_ms"] += elapsed
+            self.metrics["last_query_ms"] = elapsed
+
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the size of the collection and the latencies of its index.
+
+        Returns:
+            Dict[str, Any]: the statistics of the collection
+
+        Raises:
+            KeyError: if the collection was deleted
+        """
+
+        with self.lock:
+            self.refresh()
+
+            metrics = dict(self.metrics)
+
+            return {
+                "name": self.name,
+                "model": self.model,
+                "documents": len(self),
+                "index": "ivf" if self.index.is_trained else "exhaustive",
+                "clusters": self.index.clusters,
+                **metrics,
+                "mean_query_ms": metrics["total_query_ms"] / metrics["query_count"]
+                if metrics["query_count"]
+                else 0.0,
+            }
+
+    def save(self) -> None:
+        """
+        Persist the collection as a new generation of files, the rows of the replaced documents being dropped
+        and the arrays having room for as many rows as there are documents. collection.json is replaced last
+        so that it only ever points to complete files, the files of the previous generation are kept
+        for the processes which may still be reading them.
+
+        Returns:
+            None
+        """
+
+        with self.lock:
+            generation = self.generation + 1
+
+            rows = np.flatnonzero(self.alive)
+            ids = [self.ids[row] for row in rows]
+            texts = [self.texts[row] for row in rows]
+            metadata = [self.metadata[row] for row in rows]
+            vectors = None if self.vectors is None else self.vectors[rows]
+            capacity = max(2 * len(rows), 1024)
+
+            write_file(
+                self.get_file_path("documents", generation),
+                lambda file: file.write(self._serialize_rows(rows)),
+            )
+            log_size = os.path.getsize(self.get_file_path("documents", generation))
+
+            self.generation = generation
+            self.log_size = log_size
+            self.ids, self.rows, self.texts, self.metadata = [], dict(), [], []
+            self.alive = np.array([], dtype=bool)
+            self.alive_buffer = None
+
+            for document_id, text, document_metadata in zip(ids, texts, metadata):
+                self._add_row(document_id, text, document_metadata)
+
+            if vectors is not None:
+                self.vectors_buffer = np.lib.format.open_memmap(
+                    self.get_file_path("vectors"),
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(capacity, vectors.shape[1]),
+                )
+                self.vectors_buffer[: len(vectors)] = vectors
+                self.vectors_buffer.flush()
+                self.vectors = self.vectors_buffer[: len(vectors)]
+
+                self._update_index()
+
+            if self.index.is_trained:
+                write_file(
+                    self.get_file_path("centroids"),
+                    lambda file: np.save(file, self.index.centroids),
+                )
+
+                assignments_buffer = np.lib.format.open_memmap(
+                    self.get_file_path("assignments"),
+                    mode="w+",
+                    dtype=np.int32,
+                    shape=(capacity,),
+                )
+                assignments_buffer[: len(ids)] = self.index.assignments
+                assignments_buffer.flush()
+
+                self.index.load(
+                    self.index.centroids,
+                    assignments_buffer,
+                    len(ids),
+                    self.index.trained_size,
+                )
+
+            self._write_manifest()
+
+            for file_name in os.listdir(self.path):
+                match = re.fullmatch(
+                    r"(?:vectors|documents|centroids|assignments)-(\d+)\.(?:npy|jsonl)",
+                    file_name,
+                )
+                if match and int(match.group(1)) < generation - 1:
+                    os.remove(os.path.join(self.path, file_name))
+
+    @classmethod
+    def load(cls, name: str, path: str) -> "Collection":
+        """
+        Load a persisted collection, its embeddings being memory-mapped.
+
+        Args:
+            name (str): name of the collection
+            path (str): directory where the collection is persisted
+
+        Returns:
+            Collection: the collection
+
+        Raises:
+            KeyError: if the collection doesn't exist
+        """
+
+        collection = cls(name, "", path)
+        collection.refresh()
+
+        return collection
+
+
+class CollectionManager(object):
+    """
+    Collections of the semantic search, shared by the processes of the server through their directory:
+    the collections created or deleted by another process are seen on their next use.
+
+    Args:
+        path (str): directory where the collections are persisted
+    """
+
+    def __init__(self, path: str = VECTOR_INDEX_PATH) -> None:
+        """
+        Constructor for CollectionManager.
+
+        Args:
+            path (str): directory where the collections are persisted (default: GLADIA_VECTOR_INDEX_PATH)
+
+        Returns:
+            None
+        """
+
+        self.path = path
+        self.collections: Dict[str, Collection] = dict()
+        self.lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+
+    def create(self, name: str, model: str) -> Collection:
+        """
+        Create an empty collection.
+
+        Args:
+            name (str): name of the collection
+            model (str): model embedding the documents of the collection
+
+        Returns:
+            Collection: the collection
+
+        Raises:
+            ValueError: if the name is invalid or already used
+        """
+
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise ValueError(
+                f"Invalid collection name {name}, only letters, digits, - and _ are allowed"
+            )
+
+        # creating the directory fails if another process already created the collection
+        try:
+            os.mkdir(os.path.join(self.path, name))
+        except FileExistsError:
+            raise ValueError(f"Collection {name} already exists")
+
+        collection = Collection(name, model, os.path.join(self.path, name))
+        collection.save()
+
+        with self.lock:
+            self.collections[name] = collection
+
+        return collection
+
+    def get(self, name: str) -> Collection:
+        """
+        Get a collection, up to date with the changes of the other processes.
+
+        Args:
+            name (str): name of the collection
+
+        Returns:
+            Collection: the collection
+
+        Raises:
+            KeyError: if the collection doesn't exist
+        """
+
+        if not COLLECTION_NAME_PATTERN.match(name):
+            raise KeyError(f"Collection {name} does not exist")
+
+        with self.lock:
+            collection = self.collections.get(name, None)
+
+            try:
+                if collection is None:
+                    collection = Collection.load(name, os.path.join(self.path, name))
+                    self.collections[name] = collection
+                else:
+                    collection.refresh()
+            except KeyError:
+                self.collections.pop(name, None)
+                raise
+
+        return collection
+
+    def delete(self, name: str) -> None:
+        """
+        Delete a collection and its files.
+
+        Args:
+            name (str): name of the collection
+
+        Returns:
+            None
+
+        Raises:
+            KeyError: if the collection doesn't exist
+        """
+
+        collection = self.get(name)
+
+        with collection.file_lock():
+            shutil.rmtree(collection.path, ignore_errors=True)
+
+        with self.lock:
+            self.collections.pop(name, None)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Get the statistics of every collection.
+
+        Returns:
+            List[Dict[str, Any]]: the statistics of the collections
+        """
+
+        stats = []
+        for name in sorted(os.listdir(self.path)):
+            try:
+                stats.append(self.get(name).get_stats())
+            except KeyError:
+                # the directory of a collection being created or deleted
+                continue
+
+        return stats
+
+
+def get_collection_manager() -> CollectionManager:
+    """
+    Get the collections, created only once per process.
+
+    Returns:
+        CollectionManager: the collections
+    """
+
+    return load_resident_model("semantic-search-collections", CollectionManager)
@@ -0,0 +1,361 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from .model_management import load_resident_model
+
+logger = getLogger(__name__)
+
+# maximum number of (text, hypothesis) pairs scored in a forward pass, all requests included
+ZERO_SHOT_MAX_BATCH_SIZE = int(os.getenv("GLADIA_ZERO_SHOT_MAX_BATCH_SIZE", 32))
+
+# number of tokenized hypotheses kept in memory
+ZERO_SHOT_HYPOTHESIS_CACHE_SIZE = int(
+    os.getenv("GLADIA_ZERO_SHOT_HYPOTHESIS_CACHE_SIZE", 4096)
+)
+
+# hypothesis template of the transformers zero-shot-classification pipeline
+DEFAULT_HYPOTHESIS_TEMPLATE = "This example is {}."
+
+
+class ClassificationRequest(object):
+    """
+    (text, hypothesis) pairs submitted to a ZeroShotClassifier, whose logits are
+    filled in by the forward passes they end up in.
+
+    Args:
+        pairs (List[Dict[str, List[int]]]): model inputs of each pair, special tokens included
+    """
+
+    def __init__(self, pairs: List[Dict[str, List[int]]]) -> None:
+        """
+        Constructor for ClassificationRequest.
+
+        Args:
+            pairs (List[Dict[str, List[int]]]): model inputs of each pair, special tokens included
+
+        Returns:
+            None
+        """
+
+        self.pairs = pairs
+        self.logits: List[Optional[torch.Tensor]] = [None] * len(pairs)
+        self.remaining = len(pairs)
+
+        self.condition = threading.Condition()
+        self.error = None
+
+    def set_logits(self, index: int, logits: torch.Tensor) -> None:
+        """
+        Set the logits of a pair.
+
+        Args:
+            index (int): index of the pair
+            logits (torch.Tensor): logits of the pair
+
+        Returns:
+            None
+        """
+
+        with self.condition:
+            self.logits[index] = logits
+            self.remaining -= 1
+            self.condition.notify_all()
+
+    def fail(self, error: Exception) -> None:
+        """
+        Fail the request, raising the error to the caller waiting for the result.
+
+        Args:
+            error (Exception): the error which occurred
+
+        Returns:
+            None
+        """
+
+        with self.condition:
+            self.error = error
+            self.condition.notify_all()
+
+    def result(self) -> torch.Tensor:
+        """
+        Wait for the logits of all the pairs.
+
+        Returns:
+            torch.Tensor: the logits of each pair
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.remaining == 0 or self.error)
+
+        if self.error is not None:
+            raise self.error
+
+        return torch.stack(self.logits)
+
+
+class ZeroShotClassifier(object):
+    """
+    Zero-shot classifier scoring whether a text entails a hypothesis built from each label
+    with an NLI model, as the transformers zero-shot-classification pipeline does.
+    The pairs of every request are queued and scored together in batched forward passes
+    by a single thread, the texts are tokenized once for all their labels
+    and the tokenized hypotheses are cached.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of an NLI model
+        device (Optional[str]): device to run the model on, cuda if available if None
+        max_batch_size (int): maximum number of pairs per forward pass
+    """
+
+    def __init__(
+        self,
+        checkpoint: str,
+        device: Optional[str] = None,
+        max_batch_size: int = ZERO_SHOT_MAX_BATCH_SIZE,
+    ) -> None:
+        """
+        Constructor for ZeroShotClassifier, loading the model and its tokenizer.
+
+        Args:
+            checkpoint (str): huggingface checkpoint of an NLI model
+            device (Optional[str]): device to run the model on, cuda if available if None (default: None)
+            max_batch_size (int): maximum number of pairs per forward pass (default: GLADIA_ZERO_SHOT_MAX_BATCH_SIZE or 32)
+
+        Returns:
+            None
+        """
+
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.max_batch_size = max_batch_size
+
+        self.tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+        self.model = AutoModelForSequenceClassification.from_pretrained(checkpoint)
+        self.model.to(self.device).eval()
+
+        labels = {
+            label.lower(): index for label, index in self.model.config.label2id.items()
+        }
+        self.entailment_id = next(
+            index for label, index in labels.items() if label.startswith("entail")
+        )
+        self.contradiction_id = next(
+            index for label, index in labels.items() if label.startswith("contra")
+        )
+
+        self.hypotheses = OrderedDict()
+        self.hypotheses_lock = threading.Lock()
+
+        self.waiting = deque()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def encode_hypothesis(self, template: str, label: str) -> List[int]:
+        """
+        Tokenize the hypothesis of a label, without special tokens.
+
+        Args:
+            template (str): hypothesis template, the label replacing its "{}"
+            label (str): label to build the hypothesis of
+
+        Returns:
+            List[int]: tokens of the hypothesis
+        """
+
+        key = (template, label)
+
+        with self.hypotheses_lock:
+            if key in self.hypotheses:
+                self.hypotheses.move_to_end(key)
+                return self.hypotheses[key]
+
+        hypothesis_ids = self.tokenizer(
+            template.format(label), add_special_tokens=False
+        )["input_ids"]
+
+        with self.hypotheses_lock:
+            self.hypotheses[key] = hypothesis_ids
+
+            while len(self.hypotheses) > ZERO_SHOT_HYPOTHESIS_CACHE_SIZE:
+                self.hypotheses.popitem(last=False)
+
+        return hypothesis_ids
+
+    def encode_pairs(
+        self, text: str, hypotheses: List[List[int]]
+    ) -> List[Dict[str, List[int]]]:
+        """
+        Build the (text, hypothesis) pairs of a text, the text being tokenized once
+        and truncated so that each pair fits in the model.
+
+        Args:
+            text (str): the text to classify
+            hypotheses (List[List[int]]): tokens of each hypothesis
+
+        Returns:
+            List[Dict[str, List[int]]]: model inputs of each pair (input ids, token type ids, ...), special tokens included
+        """
+
+        text_ids = self.tokenizer(text, add_special_tokens=False, verbose=False)[
+            "input_ids"
+        ]
+
+        max_text_length = (
+            self.tokenizer.model_max_length
+            - self.tokenizer.num_special_tokens_to_add(pair=True)
+            - max(len(hypothesis_ids) for hypothesis_ids in hypotheses)
+        )
+
+        if len(text_ids) > max_text_length:
+            logger.warning(
+                f"Text of {len(text_ids)} tokens truncated to {max_text_length} tokens"
+            )
+            text_ids = text_ids[:max_text_length]
+
+        # the token types of the hypotheses are the ones the pipeline gives the models using them
+        return [
+            self.tokenizer.prepare_for_model(
+                text_ids, hypothesis_ids, return_attention_mask=False
+            )
+            for hypothesis_ids in hypotheses
+        ]
+
+    def submit(self, pairs: List[Dict[str, List[int]]]) -> ClassificationRequest:
+        """
+        Queue pairs to be scored with the pairs of the other requests.
+
+        Args:
+            pairs (List[Dict[str, List[int]]]): model inputs of each pair, special tokens included
+
+        Returns:
+            ClassificationRequest: the request, to wait for
+        """
+
+        request = ClassificationRequest(pairs)
+
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+            self.waiting.extend((request, index) for index in range(len(pairs)))
+            self.condition.notify()
+
+        return request
+
+    def _run(self) -> None:
+        """
+        Scoring loop: take the oldest waiting pairs, whatever their request,
+        and score them in a single forward pass.
+
+        Returns:
+            None
+        """
+
+        # no_grad is thread local
+        with torch.no_grad():
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.waiting)
+
+                    batch: List[Tuple[ClassificationRequest, int]] = [
+                        self.waiting.popleft()
+                        for _ in range(min(self.max_batch_size, len(self.waiting)))
+                    ]
+
+                try:
+                    inputs = self.tokenizer.pad(
+                        [request.pairs[index] for request, index in batch],
+                        return_tensors="pt",
+                    ).to(self.device)
+
+                    logits = self.model(**inputs).logits.float().cpu()
+
+                except Exception as error:
+                    logger.exception("Zero-shot classification batch failed")
+
+                    for request in {request for request, _ in batch}:
+                        request.fail(error)
+
+                    continue
+
+                for (request, index), pair_logits in zip(batch, logits):
+                    request.set_logits(index, pair_logits)
+
+    def classify(
+        self,
+        texts: List[str],
+        labels: List[str],
+        hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE,
+        multi_label: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify texts into labels given at inference time.
+
+        Args:
+            texts (List[str]): texts to classify
+            labels (List[str]): candidate labels
+            hypothesis_template (str): hypothesis template, the label replacing its "{}" (default: "This example is {}.")
+            multi_label (bool): score each label independently instead of making the labels compete (default: False)
+
+        Returns:
+            List[Dict[str, Any]]: for each text, the text ("sequence"), the labels ("labels")
+                and their score ("scores"), from the most likely label
+        """
+
+        if not labels:
+            raise ValueError("At least one label is required")
+
+        if not texts:
+            return []
+
+        hypotheses = [
+            self.encode_hypothesis(hypothesis_template, label) for label in labels
+        ]
+
+        pairs = [pair for text in texts for pair in self.encode_pairs(text, hypotheses)]
+        logits = self.submit(pairs).result().view(len(texts), len(labels), -1)
+
+        if multi_label:
+            scores = torch.softmax(
+                logits[..., [self.contradiction_id, self.entailment_id]], dim=-1
+            )[..., 1]
+        else:
+            scores = torch.softmax(logits[..., self.entailment_id], dim=-1)
+
+        predictions = []
+        for text, text_scores in zip(texts, scores.tolist()):
+            ranking = sorted(
+                zip(labels, text_scores), key=lambda item: item[1], reverse=True
+            )
+            predictions.append(
+                {
+                    "sequence": text,
+                    "labels": [label for label, _ in ranking],
+                    "scores": [score for _, score in ranking],
+                }
+            )
+
+        return predictions
+
+
+def get_zero_shot_classifier(checkpoint: str) -> ZeroShotClassifier:
+    """
+    Get the zero-shot classifier of a model, loaded only once per process
+    and shared by all the tasks using the model.
+
+    Args:
+        checkpoint (str): huggingface checkpoint of an NLI model
+
+    Returns:
+        ZeroShotClassifier: the zero-shot classifier
+    """
+
+    return load_resident_model(
+        f"zero-shot-{checkpoint}", lambda: ZeroShotClassifier(checkpoint)
+    )
@@ -43,6 +43,8 @@ setup(
         "opencv-python",
         "python-forge",
         "python-multipart",
+        "pypdfium2",
+        "langid",
         "tritonclient",
         "tritonclient[http]",
     ],
@@ -1,31 +1,44 @@
-from typing import Dict
+import time
+from typing import Any, Dict, List, Union
 
-from gladia_api_utils.io import _open
+from gladia_api_utils.CoquiEngineHelper import SpeechToTextPool
+from gladia_api_utils.model_management import load_resident_model
 
 
-def predict(audio: bytes, language: str = "en") -> Dict[str, str]:
+def predict(
+    audio: bytes, language: str = "en"
+) -> Dict[str, Union[str, List[Dict[str, Any]], Dict[str, float]]]:
     """
     Predict the text from the audio: audio -> text for a given language.
+    The audio is split on its silences and its speech segments are transcribed in parallel.
 
     Args:
         audio (bytes): The bytes audio to be transcribed.
         language (str): The language of the audio to be transcribed. (default: "en")
 
     Returns:
-        Dict[str, str]: The text transcription of the audio.
+        Dict[str, Union[str, List[Dict[str, Any]], Dict[str, float]]]: The text transcription of the audio,
+        its segments with their start and end in seconds and the duration of each stage in milliseconds.
     """
 
-    from gladia_api_utils.CoquiEngineHelper import SpeechToTextEngine
+    start = time.perf_counter()
 
-    # Load app configs and initialize STT model
-    engine = SpeechToTextEngine(
-        model_uri="english/coqui/v1.0.0-huge-vocab",
-        model="model.tflite",
-        scorer="huge-vocabulary.scorer",
+    # the models and their huge vocabulary scorer are only loaded by the first call
+    pool = load_resident_model(
+        "coqui-english-huge-vocab",
+        lambda: SpeechToTextPool(
+            model_uri="english/coqui/v1.0.0-huge-vocab",
+            model="model.tflite",
+            scorer="huge-vocabulary.scorer",
+        ),
     )
 
-    audio = _open(audio)
+    loading = (time.perf_counter() - start) * 1000
 
-    text = engine.run(audio)
+    segments, timings = pool.transcribe(audio)
 
-    return {"prediction": text, "prediction_raw": text}
+    return {
+        "prediction": " ".join(segment["text"] for segment in segments),
+        "prediction_raw": segments,
+        "timings": {"loading": loading, **timings},
+    }
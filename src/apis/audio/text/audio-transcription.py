@@ -1,5 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, WebSocket
+from gladia_api_utils.model_management import load_resident_model
 from gladia_api_utils.submodules import TaskRouter
+from starlette.concurrency import run_in_threadpool
 
 inputs = [
     {
@@ -33,3 +35,51 @@ router = APIRouter()
 TaskRouter(
     router=router, input=inputs, output=output, default_model="coqui_english_huge_vocab"
 )
+
+
+@router.websocket("/stream")
+async def stream(
+    websocket: WebSocket,
+    audio_format: str = "pcm",
+    sample_rate: int = 16000,
+    partial_interval_ms: int = 500,
+):
+    """
+    Live transcription: the client sends audio chunks as binary messages (raw int16 mono pcm,
+    or an ogg/webm opus stream) then the "EOS" text message, and receives partial then final
+    transcripts as json messages.
+
+    Args:
+        websocket (WebSocket): the websocket
+        audio_format (str): "pcm" or any streamable format like "opus" (default: "pcm")
+        sample_rate (int): sample rate of the pcm chunks (default: 16000)
+        partial_interval_ms (int): duration of audio between two partial transcripts (default: 500)
+    """
+
+    # imported here so that the server starts even if coqui is not installed
+    from gladia_api_utils.CoquiEngineHelper import (
+        SpeechToTextEngine,
+        transcribe_websocket,
+    )
+
+    await websocket.accept()
+
+    # the streaming contexts need the model in this process,
+    # the batch transcriptions use the decoding processes of the model
+    engine = await run_in_threadpool(
+        load_resident_model,
+        "coqui-english-huge-vocab-stream",
+        lambda: SpeechToTextEngine(
+            model_uri="english/coqui/v1.0.0-huge-vocab",
+            model="model.tflite",
+            scorer="huge-vocabulary.scorer",
+        ),
+    )
+
+    await transcribe_websocket(
+        websocket,
+        engine,
+        audio_format=audio_format,
+        sample_rate=sample_rate,
+        partial_interval_ms=partial_interval_ms,
+    )
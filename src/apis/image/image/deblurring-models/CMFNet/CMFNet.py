@@ -5,9 +5,9 @@ import numpy as np
 import requests
 import torch
 import torch.nn.functional as F
-import torchvision.transforms.functional as TF
 from gladia_api_utils.io import _open
 from gladia_api_utils.model_management import download_model
+from gladia_api_utils.tiling import tiled_inference
 from natsort import natsorted
 from PIL import Image
 from skimage import img_as_ubyte
@@ -44,12 +44,18 @@ def load_checkpoint(model: torch.nn.Module, weights: str) -> None:
         model.load_state_dict(new_state_dict)
 
 
-def predict(image: bytes) -> Image:
+def predict(
+    image: bytes, tile_size: int = 256, tile_overlap: int = 32, batch_size: int = 4
+) -> Image:
     """
     deblurs an image using CMFNet
+    The image is processed at full resolution by overlapping tiles to bound the memory usage.
 
     Args:
         image (bytes): Image to deblur.
+        tile_size (int): Size of the tiles the image is split into. (default: 256)
+        tile_overlap (int): Overlap between the tiles used to blend the seams. (default: 32)
+        batch_size (int): Number of tiles processed at once. (default: 4)
 
     Returns:
         Image: Deblurred image.
@@ -57,11 +63,6 @@ def predict(image: bytes) -> Image:
 
     image = _open(image).convert("RGB")
 
-    basewidth = 512
-    wpercent = basewidth / float(image.size[0])
-    hsize = int((float(image.size[1]) * float(wpercent)))
-    image = image.resize((basewidth, hsize), Image.BILINEAR)
-
     model = CMFNet()
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     model = model.to(device)
@@ -70,22 +71,31 @@ def predict(image: bytes) -> Image:
 
     mul = 8
 
-    img = image
-    input_ = TF.to_tensor(img).unsqueeze(0).to(device)
+    def restore(tiles: np.ndarray) -> np.ndarray:
+        input_ = torch.from_numpy(tiles).permute(0, 3, 1, 2).to(device)
+
+        # Pad the input if not_multiple_of 8
+        h, w = input_.shape[2], input_.shape[3]
+        H, W = ((h + mul) // mul) * mul, ((w + mul) // mul) * mul
+        padh = H - h if h % mul != 0 else 0
+        padw = W - w if w % mul != 0 else 0
+        input_ = F.pad(input_, (0, padw, 0, padh), "reflect")
+
+        with torch.no_grad():
+            restored = model(input_)
 
-    # Pad the input if not_multiple_of 8
-    h, w = input_.shape[2], input_.shape[3]
-    H, W = ((h + mul) // mul) * mul, ((w + mul) // mul) * mul
-    padh = H - h if h % mul != 0 else 0
-    padw = W - w if w % mul != 0 else 0
-    input_ = F.pad(input_, (0, padw, 0, padh), "reflect")
+        restored = torch.clamp(restored, 0, 1)
+        restored = restored[:, :, :h, :w]
 
-    with torch.no_grad():
-        restored = model(input_)
+        return restored.permute(0, 2, 3, 1).cpu().detach().numpy()
 
-    restored = torch.clamp(restored, 0, 1)
-    restored = restored[:, :, :h, :w]
-    restored = restored.permute(0, 2, 3, 1).cpu().detach().numpy()
-    restored = img_as_ubyte(restored[0])
+    restored = tiled_inference(
+        np.asarray(image, dtype=np.float32) / 255.0,
+        process=restore,
+        tile_size=tile_size,
+        overlap=tile_overlap,
+        batch_size=batch_size,
+    )
+    restored = img_as_ubyte(np.clip(restored, 0, 1))
 
     return Image.fromarray(restored)
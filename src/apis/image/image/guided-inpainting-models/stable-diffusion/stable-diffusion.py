@@ -1,40 +1,45 @@
-from io import BytesIO
-
-import PIL
-import requests
-import torch
-from diffusers import StableDiffusionInpaintPipeline
-from gladia_api_utils import SECRETS
+from gladia_api_utils.diffusion_helper import get_generator, get_pipeline
 from gladia_api_utils.io import _open
-from torch import autocast
-
-
-def download_image(url):
-    response = requests.get(url)
-    return PIL.Image.open(BytesIO(response.content))
+from PIL import Image
+
+
+def predict(
+    original_image: bytes,
+    mask_image: bytes,
+    prompt: str = "",
+    steps: int = 50,
+    strength: float = 0.75,
+    seed: int = 396916372,
+    scheduler: str = "pndm",
+) -> Image:
+    """
+    Inpaint the masked area of an image guided by a prompt using the stable diffusion model.
+
+    Args:
+        original_image (bytes): The image to inpaint
+        mask_image (bytes): The mask of the area to inpaint (white to inpaint, black to keep)
+        prompt (str): The prompt guiding the inpainting (default: "")
+        steps (int): The number of steps to use for the generation (default: 50)
+        strength (float): How much the masked area is transformed, between 0.0 and 1.0 (default: 0.75)
+        seed (int): The seed to use for the generation (default: 396916372)
+        scheduler (str): The scheduler to use, "dpm" or "euler" give good results with 20 to 25 steps (default: "pndm")
+
+    Returns:
+        Image: The inpainted image
+    """
 
-
-def predict(original_image: bytes, mask_image: bytes, prompt: str = ""):
     original_image = _open(original_image).convert("RGB").resize((512, 512))
     mask_image = _open(mask_image).convert("RGB").resize((512, 512))
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model_id_or_path = "CompVis/stable-diffusion-v1-4"
-    pipe = StableDiffusionInpaintPipeline.from_pretrained(
-        model_id_or_path,
-        revision="fp16",
-        torch_dtype=torch.float16,
-        use_auth_token=SECRETS["HUGGINGFACE_ACCESS_TOKEN"],
-    )
-
-    pipe = pipe.to(device)
-
-    with autocast("cuda"):
-        images = pipe(
-            prompt=prompt,
-            init_image=original_image,
-            mask_image=mask_image,
-            strength=0.75,
-        ).images
+    pipe = get_pipeline("inpainting", scheduler=scheduler)
+
+    images = pipe(
+        prompt=prompt,
+        image=original_image,
+        mask_image=mask_image,
+        strength=strength,
+        num_inference_steps=steps,
+        generator=get_generator(seed),
+    ).images
 
     return images[0]
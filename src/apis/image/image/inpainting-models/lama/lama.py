@@ -24,11 +24,13 @@ def predict(original_image: bytes, mask_image: bytes):
     config = Config(
         ldm_steps=25,
         ldm_sampler="plms",
-        hd_strategy="Resize",
+        hd_strategy="Tile",
         zits_wireframe=True,
         hd_strategy_crop_margin=128,
         hd_strategy_crop_trigger_size=2048,
         hd_strategy_resize_limit=2048,
+        hd_strategy_tile_size=2048,
+        hd_strategy_tile_overlap=128,
     )
 
     model = ModelManager(name="lama")
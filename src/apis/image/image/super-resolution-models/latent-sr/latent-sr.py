@@ -4,23 +4,26 @@ import torch
 import torchvision
 from einops import rearrange, repeat
 from gladia_api_utils.io import _open
-from gladia_api_utils.model_management import download_model
+from gladia_api_utils.model_management import download_model, load_resident_model
+from gladia_api_utils.tiling import tiled_inference
 from notebook_helpers import load_model_from_config, run
 from omegaconf import OmegaConf
 from PIL import Image
 
+# ratio between the size of the upscaled image and the original one (see notebook_helpers.get_cond)
+UPSCALE_FACTOR = 4
 
-def predict(image: Image, steps: int = 10) -> Image:
+
+def load_model(device: torch.device) -> torch.nn.Module:
     """
-    Returns the image with a resolution twice the original one.
+    Download the checkpoint and the config of the model and load it on the given device.
 
     Args:
-        image (Image): Image to upscale
-        steps (int): Number of steps to upscale the image
+        device (torch.device): device to load the model on
+
     Returns:
-        Image: Upscaled image
+        torch.nn.Module: the loaded model
     """
-    # Adapted from https://colab.research.google.com/drive/1xqzUi2iXQXDqXBHQGP9Mqt2YrYW6cx-J?usp=sharing#scrollTo=frCfhXDtegZj
 
     path_ckpt = download_model(
         url="https://heibox.uni-heidelberg.de/f/578df07c8fc04ffbadf3/?dl=1",
@@ -35,20 +38,83 @@ def predict(image: Image, steps: int = 10) -> Image:
     )
 
     config = OmegaConf.load(path_conf)
-    model, step = load_model_from_config(config, path_ckpt)
+    model, step = load_model_from_config(config, path_ckpt, device=device)
 
-    logs = run(
-        model["model"],
-        _open(image).convert("RGB"),
-        "superresolution",
-        custom_steps=steps,
-    )
+    return model["model"]
+
+
+def predict(
+    image: Image,
+    steps: int = 10,
+    eta: float = 1.0,
+    tile_size: int = 128,
+    tile_overlap: int = 16,
+    split_input_tile: int = 128,
+    split_input_stride: int = 64,
+) -> Image:
+    """
+    Returns the image with a resolution twice the original one.
+    The image is upscaled by overlapping tiles to bound the memory usage.
+
+    Args:
+        image (Image): Image to upscale
+        steps (int): Number of DDIM steps to upscale the image
+        eta (float): DDIM eta, 0 makes the sampling deterministic
+        tile_size (int): Size of the tiles the input image is split into
+        tile_overlap (int): Overlap between the tiles used to blend the seams
+        split_input_tile (int): Size of the patches the model splits its upscaled input into
+        split_input_stride (int): Stride between the patches the model splits its upscaled input into
+    Returns:
+        Image: Upscaled image
+    Raises:
+        ValueError: if a sampling or tiling parameter is out of its range
+    """
+    # Adapted from https://colab.research.google.com/drive/1xqzUi2iXQXDqXBHQGP9Mqt2YrYW6cx-J?usp=sharing#scrollTo=frCfhXDtegZj
+
+    if min(steps, tile_size, split_input_tile, split_input_stride) <= 0:
+        raise ValueError(
+            "steps, tile_size, split_input_tile and split_input_stride must be positive"
+        )
+
+    if not 0 <= tile_overlap < tile_size:
+        raise ValueError("tile_overlap must be between 0 and tile_size - 1")
+
+    if eta < 0:
+        raise ValueError("eta must be positive or 0")
 
-    sample = logs["sample"]
-    sample = sample.detach().cpu()
-    sample = torch.clamp(sample, -1.0, 1.0)
-    sample = (sample + 1.0) / 2.0 * 255
-    sample = sample.numpy().astype(np.uint8)
-    sample = np.transpose(sample, (0, 2, 3, 1))
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    model = load_resident_model(f"latent-sr-{device}", lambda: load_model(device))
+
+    def upscale(tiles: np.ndarray) -> np.ndarray:
+        samples = []
+
+        for tile in tiles:
+            logs = run(
+                model,
+                Image.fromarray(tile),
+                "superresolution",
+                custom_steps=steps,
+                eta=eta,
+                split_input_tile=split_input_tile,
+                split_input_stride=split_input_stride,
+            )
+
+            sample = logs["sample"]
+            sample = sample.detach().cpu()
+            sample = torch.clamp(sample, -1.0, 1.0)
+            sample = (sample + 1.0) / 2.0 * 255
+            samples.append(np.transpose(sample.numpy(), (0, 2, 3, 1))[0])
+
+        return np.stack(samples)
+
+    sample = tiled_inference(
+        np.asarray(_open(image).convert("RGB")),
+        process=upscale,
+        tile_size=tile_size,
+        overlap=tile_overlap,
+        batch_size=1,
+        scale=UPSCALE_FACTOR,
+    )
 
-    return Image.fromarray(sample[0])
+    return Image.fromarray(np.clip(sample, 0, 255).astype(np.uint8))
@@ -3,6 +3,10 @@
 import numpy as np
 import torch
 from ldm.modules.diffusionmodules.util import (
+    SCHEDULE_BUFFERS,
+    cache_schedule,
+    get_cached_schedule,
+    get_schedule_key,
     make_ddim_sampling_parameters,
     make_ddim_timesteps,
     noise_like,
@@ -19,8 +23,8 @@ class PLMSSampler(object):
 
     def register_buffer(self, name, attr):
         if type(attr) == torch.Tensor:
-            if attr.device != torch.device("cuda"):
-                attr = attr.to(torch.device("cuda"))
+            if attr.device != self.model.device:
+                attr = attr.to(self.model.device)
         setattr(self, name, attr)
 
     def make_schedule(
@@ -28,6 +32,15 @@ class PLMSSampler(object):
     ):
         if ddim_eta != 0:
             raise ValueError("ddim_eta must be 0 for PLMS")
+
+        # the schedule buffers are shared by the calls using the same parameters
+        key = get_schedule_key(self.model, ddim_num_steps, ddim_discretize, ddim_eta)
+        cached_buffers = get_cached_schedule(key)
+        if cached_buffers is not None:
+            for name, buffer in cached_buffers.items():
+                self.register_buffer(name, buffer)
+            return
+
         self.ddim_timesteps = make_ddim_timesteps(
             ddim_discr_method=ddim_discretize,
             num_ddim_timesteps=ddim_num_steps,
@@ -85,6 +98,8 @@ class PLMSSampler(object):
             "ddim_sigmas_for_original_num_steps", sigmas_for_original_sampling_steps
         )
 
+        cache_schedule(key, {name: getattr(self, name) for name in SCHEDULE_BUFFERS})
+
     @torch.no_grad()
     def sample(
         self,
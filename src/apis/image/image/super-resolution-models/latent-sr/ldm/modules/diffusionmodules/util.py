@@ -9,6 +9,7 @@
 
 
 import math
+from collections import OrderedDict
 
 import numpy as np
 import torch
@@ -52,6 +53,56 @@ def make_beta_schedule(
     return betas.numpy()
 
 
+# buffers computed by the samplers make_schedule, cached per schedule
+SCHEDULE_BUFFERS = (
+    "ddim_timesteps",
+    "betas",
+    "alphas_cumprod",
+    "alphas_cumprod_prev",
+    "sqrt_alphas_cumprod",
+    "sqrt_one_minus_alphas_cumprod",
+    "log_one_minus_alphas_cumprod",
+    "sqrt_recip_alphas_cumprod",
+    "sqrt_recipm1_alphas_cumprod",
+    "ddim_sigmas",
+    "ddim_alphas",
+    "ddim_alphas_prev",
+    "ddim_sqrt_one_minus_alphas",
+    "ddim_sigmas_for_original_num_steps",
+)
+
+# schedules only depend on the model noise schedule and on the sampling parameters
+# so they are shared by all the samplers instead of being recomputed per call
+schedule_cache = OrderedDict()
+schedule_cache_max_size = 16
+
+
+def get_schedule_key(model, ddim_num_steps, ddim_discretize, ddim_eta):
+    return (
+        model.num_timesteps,
+        model.linear_start,
+        model.linear_end,
+        str(model.device),
+        ddim_num_steps,
+        ddim_discretize,
+        float(ddim_eta),
+    )
+
+
+def get_cached_schedule(key):
+    if key not in schedule_cache:
+        return None
+    schedule_cache.move_to_end(key)
+    return schedule_cache[key]
+
+
+def cache_schedule(key, buffers):
+    schedule_cache[key] = buffers
+    schedule_cache.move_to_end(key)
+    while len(schedule_cache) > schedule_cache_max_size:
+        schedule_cache.popitem(last=False)
+
+
 def make_ddim_timesteps(
     ddim_discr_method, num_ddim_timesteps, num_ddpm_timesteps, verbose=True
 ):
@@ -12,14 +12,14 @@ from omegaconf import OmegaConf
 from PIL import Image
 
 
-def load_model_from_config(config, ckpt):
+def load_model_from_config(config, ckpt, device=torch.device("cpu")):
     print(f"Loading model from {ckpt}")
     pl_sd = torch.load(ckpt, map_location="cpu")
     global_step = pl_sd["global_step"]
     sd = pl_sd["state_dict"]
     model = instantiate_from_config(config.model)
     m, u = model.load_state_dict(sd, strict=False)
-    model.cuda()
+    model.to(device)
     model.eval()
     return {"model": model}, global_step
 
@@ -48,7 +48,7 @@ def get_cond_options(mode):
     return path, onlyfiles
 
 
-def get_cond(mode, image: Image) -> dict:
+def get_cond(mode, image: Image, device=torch.device("cpu")) -> dict:
     example = dict()
     if mode == "superresolution":
         up_f = 4
@@ -62,7 +62,7 @@ def get_cond(mode, image: Image) -> dict:
         c = rearrange(c, "1 c h w -> 1 h w c")
         c = 2.0 * c - 1.0
 
-        c = c.to(torch.device("cuda"))
+        c = c.to(device)
         example["LR_image"] = c
         example["image"] = c_up
 
@@ -74,12 +74,15 @@ def run(
     image: Image,
     task,
     custom_steps,
+    eta=1.0,
+    split_input_tile=128,
+    split_input_stride=64,
     resize_enabled=False,
     classifier_ckpt=None,
     global_step=None,
 ):
 
-    example = get_cond(task, image)
+    example = get_cond(task, image, device=model.device)
 
     save_intermediate_vid = False
     n_runs = 1
@@ -89,16 +92,15 @@ def run(
     mode = "ddim"
     ddim_use_x0_pred = False
     temperature = 1.0
-    eta = 1.0
     make_progrow = True
     custom_shape = None
 
     height, width = example["image"].shape[1:3]
-    split_input = height >= 128 and width >= 128
+    split_input = height >= split_input_tile and width >= split_input_tile
 
     if split_input:
-        ks = 128
-        stride = 64
+        ks = split_input_tile
+        stride = split_input_stride
         vqf = 4  #
         model.split_input_params = {
             "ks": (ks, ks),
@@ -218,10 +220,12 @@ def make_convolutional_sample(
 ):
     log = dict()
 
-    z, c, x, xrec, xc = model.get_input(
+    # the first stage outputs (input and its reconstruction) are not returned
+    # to avoid decoding the latent twice
+    z, c, xc = model.get_input(
         batch,
         model.first_stage_key,
-        return_first_stage_outputs=True,
+        return_first_stage_outputs=False,
         force_c_encode=not (
             hasattr(model, "split_input_params")
             and model.cond_stage_key == "coordinates_bbox"
@@ -237,18 +241,15 @@ def make_convolutional_sample(
 
     z0 = None
 
-    log["input"] = x
-    log["reconstruction"] = xrec
-
     if ismap(xc):
         log["original_conditioning"] = model.to_rgb(xc)
         if hasattr(model, "cond_stage_key"):
             log[model.cond_stage_key] = model.to_rgb(xc)
 
     else:
-        log["original_conditioning"] = xc if xc is not None else torch.zeros_like(x)
+        log["original_conditioning"] = xc if xc is not None else torch.zeros_like(z)
         if model.cond_stage_model:
-            log[model.cond_stage_key] = xc if xc is not None else torch.zeros_like(x)
+            log[model.cond_stage_key] = xc if xc is not None else torch.zeros_like(z)
             if model.cond_stage_key == "class_label":
                 log[model.cond_stage_key] = xc[model.cond_stage_key]
 
@@ -280,13 +281,6 @@ def make_convolutional_sample(
 
     x_sample = model.decode_first_stage(sample)
 
-    try:
-        x_sample_noquant = model.decode_first_stage(sample, force_not_quantize=True)
-        log["sample_noquant"] = x_sample_noquant
-        log["sample_diff"] = torch.abs(x_sample_noquant - x_sample)
-    except:
-        pass
-
     log["sample"] = x_sample
     log["time"] = t1 - t0
 
@@ -11,7 +11,49 @@ inputs = [
         "example": task_metadata["inputs_example"]["image_url"]["default_example"],
         "examples": task_metadata["inputs_example"]["image_url"]["examples"],
         "placeholder": "Image to restore",
-    }
+    },
+    {
+        "type": "integer",
+        "name": "steps",
+        "default": 10,
+        "example": 10,
+        "placeholder": "Number of sampling steps, more is slower but sharper",
+    },
+    {
+        "type": "float",
+        "name": "eta",
+        "default": 1.0,
+        "example": 1.0,
+        "placeholder": "DDIM eta, 0 makes the sampling deterministic",
+    },
+    {
+        "type": "integer",
+        "name": "tile_size",
+        "default": 128,
+        "example": 128,
+        "placeholder": "Size of the tiles the image is upscaled by",
+    },
+    {
+        "type": "integer",
+        "name": "tile_overlap",
+        "default": 16,
+        "example": 16,
+        "placeholder": "Overlap between the tiles, blending their seams",
+    },
+    {
+        "type": "integer",
+        "name": "split_input_tile",
+        "default": 128,
+        "example": 128,
+        "placeholder": "Size of the patches the model splits its input into",
+    },
+    {
+        "type": "integer",
+        "name": "split_input_stride",
+        "default": 64,
+        "example": 64,
+        "placeholder": "Stride between the patches the model splits its input into",
+    },
 ]
 
 output = {"name": "enhanced_image", "type": "image", "example": "enhanced_image"}
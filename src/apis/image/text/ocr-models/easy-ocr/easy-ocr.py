@@ -1,8 +1,18 @@
-from typing import Dict, List, Union
+import os
+from collections import defaultdict
+from logging import getLogger
+from typing import Dict, List, Tuple, Union
 
 import easyocr
 import numpy as np
-from gladia_api_utils.io import _open
+import torch
+from gladia_api_utils.model_management import load_resident_model
+from gladia_api_utils.page_management import get_pages
+
+logger = getLogger(__name__)
+
+# maximum number of pages (and of text boxes for the recognition) processed at once
+EASYOCR_BATCH_SIZE = int(os.getenv("GLADIA_EASYOCR_BATCH_SIZE", 4))
 
 codes_as_string = """abq	Abaza	abq
 ady	Adyghe	ady
@@ -97,28 +107,131 @@ for code in codes_as_string:
     easy_ocr_codes_mapping[lang_code] = lang_code
 
 
+def parse_languages(source_language: str) -> Tuple[List[str], List[str]]:
+    """
+    Parse a list of languages separated by "," or "+" (eng+fre) into easyocr language codes.
+
+    Args:
+        source_language (str): The languages of the image
+
+    Returns:
+        Tuple[List[str], List[str]]: The sorted easyocr codes of the known languages and the unknown languages
+    """
+
+    languages = source_language.replace("+", ",").split(",")
+    languages = [language.strip() for language in languages if language.strip()]
+
+    known = sorted(
+        {
+            easy_ocr_codes_mapping[language]
+            for language in languages
+            if language in easy_ocr_codes_mapping
+        }
+    )
+    unknown = [
+        language for language in languages if language not in easy_ocr_codes_mapping
+    ]
+
+    return known, unknown
+
+
+def get_reader(languages: List[str]) -> easyocr.Reader:
+    """
+    Get an easyocr reader for a combination of languages, loaded only once.
+    The CRAFT detector doesn't depend on the languages so it's loaded once and shared by all the readers.
+
+    Args:
+        languages (List[str]): The sorted easyocr codes of the languages
+
+    Returns:
+        easyocr.Reader: The reader
+    """
+
+    gpu = torch.cuda.is_available()
+    device = "cuda" if gpu else "cpu"
+
+    detector = load_resident_model(
+        f"easyocr-detector-{device}",
+        lambda: easyocr.Reader(["en"], gpu=gpu, recognizer=False).detector,
+    )
+
+    def load_reader() -> easyocr.Reader:
+        reader = easyocr.Reader(languages, gpu=gpu, detector=False)
+        reader.detector = detector
+
+        return reader
+
+    return load_resident_model(
+        f"easyocr-reader-{'+'.join(languages)}-{device}", load_reader
+    )
+
+
+def read_pages(
+    reader: easyocr.Reader, pages: List[np.ndarray], batch_size: int
+) -> List[List[str]]:
+    """
+    Run the detection and the recognition over the pages, batching the pages of the same size together.
+
+    Args:
+        reader (easyocr.Reader): The reader
+        pages (List[np.ndarray]): The pages to process
+        batch_size (int): The maximum number of pages (and of text boxes for the recognition) processed at once
+
+    Returns:
+        List[List[str]]: The lines of text of each page
+    """
+
+    pages_by_shape = defaultdict(list)
+    for index, page in enumerate(pages):
+        pages_by_shape[page.shape].append(index)
+
+    texts = [None] * len(pages)
+
+    for indices in pages_by_shape.values():
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start : start + batch_size]
+
+            results = reader.readtext_batched(
+                [pages[index] for index in batch], batch_size=batch_size, detail=0
+            )
+
+            for index, result in zip(batch, results):
+                texts[index] = result
+
+    return texts
+
+
 def predict(
     image: bytes, source_language: str = "eng"
 ) -> Dict[str, Union[str, List[str]]]:
     """
-    Call the EasyOcr package and return the text detected in the image by the ocr
+    Call the EasyOcr package and return the text detected in the image by the ocr.
+    The image can also be a pdf or a multi-frame image, all their pages being processed
+    in batches of GLADIA_EASYOCR_BATCH_SIZE.
 
     Args:
-        image (bytes): The image to be processed
-        source_language (str): The language of the image
+        image (bytes): The image (or pdf) to be processed
+        source_language (str): The languages of the image, separated by "," or "+" (eng+fre)
 
     Returns:
         Dict[str, Union[str, List[str]]]: The text detected in the image by the ocr
     """
 
-    if source_language not in easy_ocr_codes_mapping:
-        plain_text = "Unknown language"
-        text = plain_text
-    else:
-        image = _open(image)
-        image = np.array(image)
-        reader = easyocr.Reader([easy_ocr_codes_mapping[source_language]], gpu=True)
-        text = reader.readtext(image, detail=False)
-        plain_text = "\n".join(text)
+    languages, unknown_languages = parse_languages(source_language)
+
+    if unknown_languages or not languages:
+        plain_text = f"Unknown language {', '.join(unknown_languages)}".strip()
+        return {"prediction": plain_text, "prediction_raw": plain_text}
+
+    reader = get_reader(languages)
+    pages = [np.array(page) for page in get_pages(image)]
+
+    logger.debug(f"Running easyocr on {len(pages)} pages with {languages}")
+
+    texts = read_pages(reader, pages, batch_size=max(EASYOCR_BATCH_SIZE, 1))
+
+    # the pages are separated by an empty line
+    plain_text = "\n\n".join("\n".join(text) for text in texts)
+    text = [line for page_text in texts for line in page_text]
 
     return {"prediction": plain_text, "prediction_raw": text}
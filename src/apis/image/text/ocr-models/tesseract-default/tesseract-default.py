@@ -3,38 +3,56 @@ from typing import Dict, List, Union
 
 import cv2
 import numpy as np
-import pytesseract
-from gladia_api_utils.io import _open
+from gladia_api_utils.page_management import get_pages
+from gladia_api_utils.tesseract_helper import recognize_pages
+from PIL import Image
 
 
-def predict(image: bytes, source_language: str) -> Dict[str, Union[str, List[str]]]:
+def preprocess(page: Image.Image) -> Image.Image:
     """
-    Call the tesseract ocr and return the text detected in the image
+    Convert to grayscale and binarize a page with an Otsu threshold
 
     Args:
-        image (bytes): The image to be processed
-        source_language (str): The language of the image (unused)
+        page (Image.Image): The page to preprocess
 
     Returns:
-        Dict[str, str]: The text detected in the image by the ocr
+        Image.Image: The preprocessed page
     """
 
-    del source_language
-
-    image = _open(image).convert("RGB")
-
-    np_image = np.array(image)
-
-    gray_image = cv2.cvtColor(np_image, cv2.COLOR_BGR2GRAY)
+    gray_image = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2GRAY)
 
     gray_thresh = cv2.threshold(
         src=gray_image, thresh=0, maxval=255, type=cv2.THRESH_BINARY | cv2.THRESH_OTSU
     )[1]
 
-    text = pytesseract.image_to_string(gray_thresh)
+    return Image.fromarray(gray_thresh)
+
+
+def predict(
+    image: bytes, source_language: str = "eng"
+) -> Dict[str, Union[str, List[str]]]:
+    """
+    Call the tesseract ocr and return the text detected in the image.
+    The image can also be a pdf or a multi-frame tiff, their pages being processed in parallel.
+
+    Args:
+        image (bytes): The image (or pdf) to be processed
+        source_language (str): The ISO 639-2 languages of the image, separated by "," or "+" (eng+fre) (default: "eng")
+
+    Returns:
+        Dict[str, Union[str, List[str]]]: The text detected in the image by the ocr
+    """
+
+    pages = [preprocess(page) for page in get_pages(image)]
+
+    results = recognize_pages(pages, source_language=source_language)
 
-    out = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]", "", text)
+    # keep the non ascii characters of the other languages, only remove the control ones
+    texts = [
+        re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", result).strip()
+        for result in results
+    ]
 
-    result = out.strip()
+    result = "\n\n".join(texts)
 
     return {"prediction": result, "prediction_raw": result.split("\n")}
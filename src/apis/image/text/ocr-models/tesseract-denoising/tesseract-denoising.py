@@ -3,37 +3,55 @@ from typing import Dict, List, Union
 
 import cv2
 import numpy as np
-import pytesseract
-from gladia_api_utils.io import _open
+from gladia_api_utils.page_management import get_pages
+from gladia_api_utils.tesseract_helper import recognize_pages
+from PIL import Image
 
 
-def predict(image: bytes, source_language: str) -> Dict[str, Union[str, List[str]]]:
+def preprocess(page: Image.Image) -> Image.Image:
     """
-    Call the tesseract ocr, apply a median blurring filter to the input image to remove noise
-    and return the text detected in the image
+    Convert to grayscale and remove the noise of a page with a median blurring filter
 
     Args:
-        image (bytes): The image to be processed
-        source_language (str): The language of the image (unused)
+        page (Image.Image): The page to preprocess
 
     Returns:
-        Dict[str, str]: The text detected in the image by the ocr
+        Image.Image: The preprocessed page
     """
 
-    del source_language
+    gray_image = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2GRAY)
 
-    image = _open(image).convert("RGB")
+    gray_thresh = cv2.medianBlur(gray_image, 3)
 
-    np_image = np.array(image)
+    return Image.fromarray(gray_thresh)
 
-    gray_image = cv2.cvtColor(np_image, cv2.COLOR_BGR2GRAY)
 
-    gray_thresh = cv2.medianBlur(gray_image, 3)
+def predict(
+    image: bytes, source_language: str = "eng"
+) -> Dict[str, Union[str, List[str]]]:
+    """
+    Call the tesseract ocr, apply a median blurring filter to the input image to remove noise
+    and return the text detected in the image.
+    The image can also be a pdf or a multi-frame tiff, their pages being processed in parallel.
+
+    Args:
+        image (bytes): The image (or pdf) to be processed
+        source_language (str): The ISO 639-2 languages of the image, separated by "," or "+" (eng+fre) (default: "eng")
+
+    Returns:
+        Dict[str, Union[str, List[str]]]: The text detected in the image by the ocr
+    """
+
+    pages = [preprocess(page) for page in get_pages(image)]
 
-    text = str(pytesseract.image_to_string(gray_thresh))
+    results = recognize_pages(pages, source_language=source_language)
 
-    out = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\xff]", "", text)
+    # keep the non ascii characters of the other languages, only remove the control ones
+    texts = [
+        re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", result).strip()
+        for result in results
+    ]
 
-    result = out.strip()
+    result = "\n\n".join(texts)
 
     return {"prediction": result, "prediction_raw": result.split("\n")}
@@ -1,6 +1,9 @@
 from typing import Dict
 
-from transformers import AutoModelWithLMHead, AutoTokenizer
+from gladia_api_utils.generation_helper import TextGenerator
+from gladia_api_utils.model_management import load_resident_model
+
+MODEL_NAME = "flexudy/t5-base-multi-sentence-doctor"
 
 
 def predict(sentence: str) -> Dict[str, str]:
@@ -14,22 +17,10 @@ def predict(sentence: str) -> Dict[str, str]:
         Dict[str, str]: The corrected sentence.
     """
 
-    model_name = "flexudy/t5-base-multi-sentence-doctor"
-
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelWithLMHead.from_pretrained(model_name)
+    generator = load_resident_model(MODEL_NAME, lambda: TextGenerator(MODEL_NAME))
 
     input_text = f"repair_sentence: {sentence}</s>"
 
-    input_ids = tokenizer.encode(input_text, return_tensors="pt")
-
-    outputs = model.generate(input_ids, max_length=32, num_beams=1)
-
-    sentence = tokenizer.decode(
-        outputs[0], skip_special_tokens=True, clean_up_tokenization_spaces=True
-    )
-
-    del model
-    del tokenizer
+    sentence = generator.generate(input_text, max_new_tokens=32, temperature=0)
 
     return {"prediction": sentence, "prediction_raw": sentence}
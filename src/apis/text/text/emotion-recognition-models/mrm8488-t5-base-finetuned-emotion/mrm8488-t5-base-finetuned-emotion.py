@@ -1,7 +1,10 @@
 from typing import Dict
 
-import truecase
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from gladia_api_utils.generation_helper import TextGenerator
+from gladia_api_utils.model_management import load_resident_model
+from gladia_api_utils.truecase_helper import get_true_case
+
+MODEL_NAME = "mrm8488/t5-base-finetuned-emotion"
 
 
 def predict(text: str) -> Dict[str, str]:
@@ -21,20 +24,8 @@ def predict(text: str) -> Dict[str, str]:
         Dict[str, str]: The detected emotion (sadness, joy, love, anger, fear, surprise).
     """
 
-    model_name = "mrm8488/t5-base-finetuned-emotion"
-
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-
-    input_ids = tokenizer.encode(truecase.get_true_case(text), return_tensors="pt")
-
-    outputs = model.generate(input_ids)
-
-    decoded = tokenizer.decode(
-        outputs[0], skip_special_tokens=True, clean_up_tokenization_spaces=True
-    )
+    generator = load_resident_model(MODEL_NAME, lambda: TextGenerator(MODEL_NAME))
 
-    del model
-    del tokenizer
+    decoded = generator.generate(get_true_case(text), max_new_tokens=20, temperature=0)
 
     return {"prediction": decoded, "prediction_raw": decoded}
@@ -1,11 +1,11 @@
 from typing import Dict, Union
 
 import numpy as np
-import truecase
 from gladia_api_utils.triton_helper import (
     TritonClient,
     check_if_model_needs_to_be_preloaded,
 )
+from gladia_api_utils.truecase_helper import get_true_case
 from transformers import BertTokenizer
 
 
@@ -32,7 +32,7 @@ def predict(text: str) -> Dict[str, Union[str, Dict[str, float]]]:
     tokenizer = BertTokenizer.from_pretrained(TOKENIZER_NAME)
 
     input_ids = tokenizer(
-        truecase.get_true_case(text),
+        get_true_case(text),
         return_tensors="pt",
         max_length=256,
         padding="max_length",
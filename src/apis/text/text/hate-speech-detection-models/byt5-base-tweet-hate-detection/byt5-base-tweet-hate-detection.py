@@ -1,43 +1,66 @@
-from typing import Dict, Union
+from typing import Dict, List, Tuple, Union
 
-import truecase
-from torch import cuda, device
+import torch
+from gladia_api_utils.model_management import load_resident_model
+from gladia_api_utils.tokenization_helper import encode_batches
+from gladia_api_utils.truecase_helper import get_true_cases
 from transformers import ByT5Tokenizer, T5ForConditionalGeneration
 
+CHECKPOINT = "Narrativa/byt5-base-tweet-hate-detection"
 
-def predict(text: str) -> Dict[str, Union[str, Dict[str, float]]]:
+
+def load_model() -> Tuple[T5ForConditionalGeneration, ByT5Tokenizer, str]:
+    """
+    Load the model and its tokenizer, in eval mode.
+
+    Returns:
+        Tuple[T5ForConditionalGeneration, ByT5Tokenizer, str]: the model, its tokenizer and its device
+    """
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    tokenizer = ByT5Tokenizer.from_pretrained(CHECKPOINT)
+    model = T5ForConditionalGeneration.from_pretrained(CHECKPOINT).to(device).eval()
+
+    return model, tokenizer, device
+
+
+def predict(
+    text: Union[str, List[str]], batch_size: int = 16
+) -> Dict[str, Union[str, List[str]]]:
     """
     Detect hate from a given text
 
     Args:
-        text (str): The text to be detect hate in
+        text (Union[str, List[str]]): The text (or texts) to be detect hate in
+        batch_size (int): The number of texts per generate call (default: 16)
 
     Returns:
-        Dict[str, Union[str, Dict[str, float]]]: The level of hate in the text (normal, hate-speech, offensive)
+        Dict[str, Union[str, List[str]]]: The level of hate in the text (normal, hate-speech, offensive), for each text
     """
 
-    device_to_use = device("cuda" if cuda.is_available() else "cpu")
+    model, tokenizer, device = load_resident_model(CHECKPOINT, load_model)
 
-    ckpt = "Narrativa/byt5-base-tweet-hate-detection"
+    texts = [text] if isinstance(text, str) else text
+    outputs = [""] * len(texts)
 
-    tokenizer = ByT5Tokenizer.from_pretrained(ckpt)
-    model = T5ForConditionalGeneration.from_pretrained(ckpt).to(device_to_use)
+    # byt5 works on bytes, padding to 512 tokens would make the short texts as slow as the long ones
+    for indices, inputs in encode_batches(
+        tokenizer, get_true_cases(texts), batch_size, max_length=512, device=device
+    ):
+        with torch.no_grad():
+            generated = model.generate(**inputs)
 
-    inputs = tokenizer(
-        truecase.get_true_case(text),
-        return_tensors="pt",
-        max_length=512,
-        truncation=True,
-        padding="max_length",
-    )
+        for index, output in zip(
+            indices, tokenizer.batch_decode(generated, skip_special_tokens=True)
+        ):
+            outputs[index] = output
 
-    input_ids = inputs.input_ids.to(device_to_use)
-    attention_mask = inputs.attention_mask.to(device_to_use)
+    predictions = [
+        "normal" if output == "no-hate-speech" else output for output in outputs
+    ]
 
-    output = model.generate(input_ids, attention_mask=attention_mask)
-    output = tokenizer.decode(output[0], skip_special_tokens=True)
+    if isinstance(text, str):
+        return {"prediction": predictions[0], "prediction_raw": outputs[0]}
 
-    return {
-        "prediction": "normal" if output == "no-hate-speech" else output,
-        "prediction_raw": output,
-    }
+    return {"prediction": predictions, "prediction_raw": outputs}
@@ -1,11 +1,11 @@
 from typing import Dict, Union
 
-import truecase
 from gladia_api_utils.triton_helper import (
     TritonClient,
     check_if_model_needs_to_be_preloaded,
     data_processing,
 )
+from gladia_api_utils.truecase_helper import get_true_case
 from numpy import array as nparray
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
@@ -63,7 +63,7 @@ def predict(text: str, top_k: int = 10) -> Dict[str, Union[str, Dict[str, float]
         preload_model=check_if_model_needs_to_be_preloaded(MODEL_NAME),
     )
 
-    text_preprocessed = data_processing.text_to_numpy(truecase.get_true_case(text))
+    text_preprocessed = data_processing.text_to_numpy(get_true_case(text))
     client.set_input(name="TEXT", shape=text_preprocessed.shape, datatype="BYTES")
     text_embeddings = nparray(
         client(text_preprocessed, load_model=True, unload_model=False)[0]
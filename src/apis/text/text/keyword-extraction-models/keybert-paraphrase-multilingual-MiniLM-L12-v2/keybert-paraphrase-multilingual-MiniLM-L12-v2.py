@@ -1,6 +1,6 @@
 from typing import Dict, Union
 
-import truecase
+from gladia_api_utils.truecase_helper import get_true_case
 from keybert import KeyBERT
 from sentence_transformers import SentenceTransformer
 
@@ -20,7 +20,7 @@ def predict(text: str, top_k: int = 10) -> Dict[str, Union[str, Dict[str, float]
     kw_model = KeyBERT(model=model)
 
     out = kw_model.extract_keywords(
-        truecase.get_true_case(text),
+        get_true_case(text),
         keyphrase_ngram_range=(1, 1),
         stop_words=None,
         top_n=top_k,
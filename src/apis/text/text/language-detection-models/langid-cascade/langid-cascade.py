@@ -0,0 +1,65 @@
+import importlib.machinery
+import os
+from typing import Dict, Union
+
+from gladia_api_utils.language_detection_helper import CascadeLanguageDetector
+from gladia_api_utils.model_management import load_resident_model
+
+FALLBACK_MODEL = "xlm-roberta-base-language-detection"
+
+
+def get_detector() -> CascadeLanguageDetector:
+    """
+    Get the cascade detector, created only once, escalating to xlm-roberta-base-language-detection.
+    The n-gram detector is restricted to the languages of xlm-roberta-base-language-detection,
+    so that both stages detect the same 20 languages.
+
+    Returns:
+        CascadeLanguageDetector: the cascade detector
+    """
+
+    def load_detector() -> CascadeLanguageDetector:
+        fallback_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            FALLBACK_MODEL,
+            f"{FALLBACK_MODEL}.py",
+        )
+        fallback_module = importlib.machinery.SourceFileLoader(
+            FALLBACK_MODEL, fallback_path
+        ).load_module()
+
+        return CascadeLanguageDetector(
+            fallback=lambda text: fallback_module.predict(text)["prediction_raw"],
+            languages=fallback_module.LANGUAGES,
+        )
+
+    return load_resident_model("language-detection-cascade", load_detector)
+
+
+def get_stats() -> Dict[str, float]:
+    """
+    Get the escalation metrics of the cascade detector.
+
+    Returns:
+        Dict[str, float]: the counts, the escalation rate and the mean latencies in seconds
+    """
+
+    return get_detector().get_stats()
+
+
+def predict(text: str) -> Dict[str, Union[str, Dict[str, float]]]:
+    """
+    Detect the language of a text with a character n-gram classifier,
+    falling back to xlm-roberta-base-language-detection for short texts or when it is unsure.
+    Only the 20 languages of xlm-roberta-base-language-detection are detected.
+
+    Args:
+        text (str): The text to detect the language of
+
+    Returns:
+        Dict[str, Union[str, Dict[str, float]]]: The language of the text and the probability of the text to be of each language
+    """
+
+    prediction, prediction_raw = get_detector().detect(text)
+
+    return {"prediction": prediction, "prediction_raw": prediction_raw}
@@ -8,6 +8,31 @@ from gladia_api_utils.triton_helper import (
 )
 
 
+# languages of the outputs of the model
+LANGUAGES = [
+    "ja",
+    "nl",
+    "ar",
+    "pl",
+    "de",
+    "it",
+    "pt",
+    "tr",
+    "es",
+    "hi",
+    "el",
+    "ur",
+    "bg",
+    "en",
+    "fr",
+    "zh",
+    "ru",
+    "th",
+    "sw",
+    "vi",
+]
+
+
 def softmax(x):
     return np.exp(x) / np.sum(np.exp(x), axis=0)
 
@@ -29,29 +54,6 @@ def predict(text: str) -> Dict[str, Union[str, Dict[str, float]]]:
         "language-detection_papluca_xlm-roberta-base-language-detection_tensorrt_tokenize",
     ]
 
-    LANGUAGES = [
-        "ja",
-        "nl",
-        "ar",
-        "pl",
-        "de",
-        "it",
-        "pt",
-        "tr",
-        "es",
-        "hi",
-        "el",
-        "ur",
-        "bg",
-        "en",
-        "fr",
-        "zh",
-        "ru",
-        "th",
-        "sw",
-        "vi",
-    ]
-
     client = TritonClient(
         model_name=MODEL_NAME,
         sub_parts=MODEL_SUB_PARTS,
@@ -1,5 +1,10 @@
+import importlib.machinery
+import os
+from typing import Dict
+
 from fastapi import APIRouter
 from gladia_api_utils.submodules import TaskRouter
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
@@ -14,9 +19,39 @@ inputs = [
 
 output = {"name": "generated_text", "type": "string", "example": "en"}
 
-TaskRouter(
+task_router = TaskRouter(
     router=router,
     input=inputs,
     output=output,
     default_model="xlm-roberta-base-language-detection",
 )
+
+CASCADE_MODEL_PATH = os.path.join(
+    os.path.dirname(__file__),
+    "language-detection-models",
+    "langid-cascade",
+    "langid-cascade.py",
+)
+
+
+@router.get(
+    "/cascade/stats",
+    summary="Get the escalation metrics of the langid-cascade model",
+    tags=[task_router.tags],
+)
+async def cascade_stats() -> Dict[str, float]:
+    """
+    Get the number of texts detected by the langid-cascade model, how many of them were escalated
+    to the transformer (because they were too short or the n-gram detector was unsure),
+    the escalation rate and the mean latency of both stages.
+
+    Returns:
+        Dict[str, float]: the counts, the escalation rate and the mean latencies in seconds
+    """
+
+    this_module = importlib.machinery.SourceFileLoader(
+        "langid-cascade", CASCADE_MODEL_PATH
+    ).load_module()
+
+    # the first call loads the n-gram model so it's kept out of the event loop
+    return await run_in_threadpool(this_module.get_stats)
@@ -1,28 +1,76 @@
-from typing import Dict, Union
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-import truecase
-from transformers import pipeline
+from gladia_api_utils.generation_helper import TextGenerator
+from gladia_api_utils.model_management import load_resident_model
+from gladia_api_utils.truecase_helper import get_true_case
 
+CHECKPOINT = "EleutherAI/gpt-neo-2.7B"
 
-def predict(text: str) -> Dict[str, Union[str, Dict[str, str]]]:
+
+def get_generator() -> TextGenerator:
+    """
+    Get the generator, loaded only once.
+
+    Returns:
+        TextGenerator: the generator
+    """
+
+    return load_resident_model(CHECKPOINT, lambda: TextGenerator(CHECKPOINT))
+
+
+def predict(
+    text: str,
+    max_new_tokens: int = 50,
+    temperature: float = 0.9,
+    stop: Optional[List[str]] = None,
+) -> Dict[str, Union[str, List[Dict[str, Any]]]]:
     """
     Generate the continuation of the sentence
 
     Args:
         text (str): The sentence to generate the continuation of
+        max_new_tokens (int): maximum number of generated tokens (default: 50)
+        temperature (float): sampling temperature, greedy decoding if 0 (default: 0.9)
+        stop (Optional[List[str]]): sequences ending the generation (default: None)
 
     Returns:
-        Dict[str, Union[str, Dict[str, str]]]: The continuation of the sentence
+        Dict[str, Union[str, List[Dict[str, Any]]]]: The continuation of the sentence
     """
 
-    generator = pipeline("text-generation", model="EleutherAI/gpt-neo-2.7B")
+    text = get_true_case(text)
 
-    res = generator(
-        truecase.get_true_case(text), max_length=50, do_sample=True, temperature=0.9
+    prediction = text + get_generator().generate(
+        text, max_new_tokens=max_new_tokens, temperature=temperature, stop=stop
     )
 
-    del generator
+    return {
+        "prediction": prediction,
+        "prediction_raw": [{"generated_text": prediction}],
+    }
 
-    prediction = res[0]["generated_text"]
 
-    return {"prediction": prediction, "prediction_raw": res}
+def stream(
+    text: str,
+    max_new_tokens: int = 50,
+    temperature: float = 0.9,
+    stop: Optional[List[str]] = None,
+) -> Iterator[str]:
+    """
+    Generate the continuation of the sentence, streamed as the tokens are produced
+
+    Args:
+        text (str): The sentence to generate the continuation of
+        max_new_tokens (int): maximum number of generated tokens (default: 50)
+        temperature (float): sampling temperature, greedy decoding if 0 (default: 0.9)
+        stop (Optional[List[str]]): sequences ending the generation (default: None)
+
+    Returns:
+        Iterator[str]: the pieces of the continuation
+    """
+
+    return get_generator().stream(
+        get_true_case(text),
+        max_new_tokens=max_new_tokens,
+        temperature=temperature,
+        stop=stop,
+    )
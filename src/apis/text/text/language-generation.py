@@ -1,5 +1,13 @@
-from fastapi import APIRouter
+import importlib.machinery
+import os
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from gladia_api_utils.generation_helper import to_server_sent_events
 from gladia_api_utils.submodules import TaskRouter
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
@@ -14,4 +22,53 @@ inputs = [
 
 output = {"name": "detected_language", "type": "string", "example": "generated_text"}
 
-TaskRouter(router=router, input=inputs, output=output, default_model="bloom-560m")
+task_router = TaskRouter(
+    router=router, input=inputs, output=output, default_model="bloom-560m"
+)
+
+MODELS_PATH = os.path.join(os.path.dirname(__file__), "language-generation-models")
+
+
+class StreamInput(BaseModel):
+    text: str
+    max_new_tokens: int = 50
+    temperature: float = 0.9
+    stop: List[str] = []
+
+
+@router.post(
+    "/stream",
+    summary="Stream the generation of the language-generation task as server-sent events",
+    tags=[task_router.tags],
+)
+async def stream(
+    stream_input: StreamInput,
+    model: str = Query(task_router.default_model, enum=set(task_router.versions)),
+):
+    """
+    Generate the continuation of a text, each generated piece of text being sent as
+    a server-sent event ({"token": ...}) as soon as it is produced, then a {"done": true} event.
+
+    Args:
+        stream_input (StreamInput): the text, the maximum number of new tokens, the temperature and the stop sequences
+        model (str): the model to generate with (default: bloom-560m)
+
+    Returns:
+        StreamingResponse: the text/event-stream response
+    """
+
+    module_path = os.path.join(MODELS_PATH, model, f"{model}.py")
+    if not os.path.exists(module_path):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model {model} does not exist",
+        )
+
+    this_module = importlib.machinery.SourceFileLoader(model, module_path).load_module()
+
+    # the first call loads the model so it's kept out of the event loop
+    pieces = await run_in_threadpool(this_module.stream, **stream_input.dict())
+
+    return StreamingResponse(
+        to_server_sent_events(pieces), media_type="text/event-stream"
+    )
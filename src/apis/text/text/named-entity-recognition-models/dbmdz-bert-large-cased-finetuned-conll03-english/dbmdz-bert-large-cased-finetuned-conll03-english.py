@@ -1,54 +1,59 @@
-import json
-from typing import Dict, List, Union
+import os
+from typing import Any, Dict, List, Union
 
-import truecase
-from gladia_api_utils.triton_helper import (
-    TritonClient,
-    check_if_model_needs_to_be_preloaded,
-    data_processing,
-)
+from gladia_api_utils.model_management import load_resident_model
+from gladia_api_utils.ner_helper import TritonNERService
 
+MODEL_NAME = "named-entity-recognition_dbmdz_bert-large-cased-finetuned-conll03-english_tensorrt_inference"
+MODEL_SUB_PARTS = [
+    "named-entity-recognition_dbmdz_bert-large-cased-finetuned-conll03-english_tensorrt_model",
+]
 
-def predict(text: str) -> Dict[str, Union[List[Dict[str, Union[str, float]]], str]]:
+
+def get_ner_service() -> TritonNERService:
+    """
+    Get the named entity recognition service of the model, created only once.
+
+    Returns:
+        TritonNERService: the named entity recognition service
+    """
+
+    return load_resident_model(
+        MODEL_NAME,
+        lambda: TritonNERService(
+            MODEL_NAME,
+            MODEL_SUB_PARTS,
+            current_path=os.path.dirname(os.path.abspath(__file__)),
+            tokenizer_name="dbmdz/bert-large-cased-finetuned-conll03-english",
+        ),
+    )
+
+
+def predict(
+    text: Union[str, List[str]]
+) -> Dict[str, Union[List[Dict[str, Any]], List[List[Dict[str, Any]]]]]:
     """
-    Apply NER on the given task and return each token within the sentence associated to its label.
+    Apply NER on the given text (or texts) and return its entities with their label and their position in the text.
+    Texts longer than the model are split into overlapping windows whose entities are merged back.
 
     **Labels**:
-    O : Outside of a named entity
-    B-MISC : Beginning of a miscellaneous entity right after another miscellaneous entity
-    I-MISC : Miscellaneous entity
-    B-PER : Beginning of a person's name right after another person's name
-    I-PER : Person's name
-    B-ORG : Beginning of an organisation right after another organisation
-    I-ORG : Organisation
-    B-LOC : Beginning of a location right after another location
-    I-LOC : Location
+    MISC : Miscellaneous entity
+    PER : Person's name
+    ORG : Organisation
+    LOC : Location
 
     Args:
-        text (str): The text to apply NER on
+        text (Union[str, List[str]]): The text (or texts) to apply NER on
 
     Returns:
-        Dict[str, Union[List[Dict[str, Union[str, float]]], str]]: The text with the NER applied (O, B-MISC, I-MISC, B-PER, I-PER, B-ORG, I-ORG, B-LOC, I-LOC)
+        Dict[str, Union[List[Dict[str, Any]], List[List[Dict[str, Any]]]]]: The entities of the text (entity_group, score, word, start and end character), for each text
     """
 
-    MODEL_NAME = "named-entity-recognition_dbmdz_bert-large-cased-finetuned-conll03-english_tensorrt_inference"
-    MODEL_SUB_PARTS = [
-        "named-entity-recognition_dbmdz_bert-large-cased-finetuned-conll03-english_tensorrt_model",
-    ]
-
-    client = TritonClient(
-        model_name=MODEL_NAME,
-        sub_parts=MODEL_SUB_PARTS,
-        output_name="output",
-        preload_model=check_if_model_needs_to_be_preloaded(MODEL_NAME),
-    )
-
-    np_output = data_processing.text_to_numpy(truecase.get_true_case(text))
+    texts = [text] if isinstance(text, str) else text
 
-    client.set_input(name="TEXT", shape=np_output.shape, datatype="BYTES")
+    entities = get_ner_service().recognize(texts)
 
-    prediction_raw = client(np_output)
-    prediction_decode = prediction_raw[0].decode("utf8")
-    prediction = json.loads(prediction_decode)[0]
+    if isinstance(text, str):
+        return {"prediction": entities[0], "prediction_raw": entities[0]}
 
-    return {"prediction": prediction, "prediction_raw": prediction_raw}
+    return {"prediction": entities, "prediction_raw": entities}
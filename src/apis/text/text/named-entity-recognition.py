@@ -1,5 +1,11 @@
-from fastapi import APIRouter
+import importlib.machinery
+import os
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, Query, status
 from gladia_api_utils.submodules import TaskRouter
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
@@ -18,9 +24,51 @@ output = {
     "example": '{"prediction":[{"entity_group": "ORG", "score": 0.5587025284767151, "word": "Gladia", "start": 26, "end": 32}]',
 }
 
-TaskRouter(
+task_router = TaskRouter(
     router=router,
     input=inputs,
     output=output,
     default_model="dbmdz-bert-large-cased-finetuned-conll03-english",
 )
+
+MODELS_PATH = os.path.join(os.path.dirname(__file__), "named-entity-recognition-models")
+
+
+class DocumentsInput(BaseModel):
+    documents: List[str]
+
+
+@router.post(
+    "/documents",
+    summary="Apply the named-entity-recognition task to a batch of documents of any length",
+    tags=[task_router.tags],
+)
+async def documents(
+    documents_input: DocumentsInput,
+    model: str = Query(task_router.default_model, enum=set(task_router.versions)),
+) -> Dict[str, List[List[Dict[str, Any]]]]:
+    """
+    Recognize the entities of several documents. The documents longer than the model are split
+    into overlapping windows, the windows of all the documents being sent in a single inference,
+    and their entities are merged back with offsets relative to the documents.
+
+    Args:
+        documents_input (DocumentsInput): the documents
+        model (str): the model to recognize the entities with (default: dbmdz-bert-large-cased-finetuned-conll03-english)
+
+    Returns:
+        Dict[str, List[List[Dict[str, Any]]]]: the entities of each document (entity_group, score, word, start and end character)
+    """
+
+    module_path = os.path.join(MODELS_PATH, model, f"{model}.py")
+    if not os.path.exists(module_path):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model {model} does not exist",
+        )
+
+    this_module = importlib.machinery.SourceFileLoader(model, module_path).load_module()
+
+    result = await run_in_threadpool(this_module.predict, documents_input.documents)
+
+    return {"prediction": result["prediction"]}
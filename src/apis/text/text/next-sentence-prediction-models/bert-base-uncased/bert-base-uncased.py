@@ -1,22 +1,28 @@
-from typing import Dict
+from typing import Dict, List, Union
 
-from happytransformer import HappyNextSentence
+from gladia_api_utils.transformers_helper import predict_next_sentences
 
+CHECKPOINT = "bert-base-uncased"
 
-def predict(sentence_1: str, sentence_2: str) -> Dict[str, float]:
+
+def predict(
+    sentence_1: Union[str, List[str]], sentence_2: Union[str, List[str]]
+) -> Dict[str, Union[float, List[float]]]:
     """
-    Tell for a given sencence_2, whether or not it follows sentence_1
+    Tell for a given sencence_2, whether or not it follows sentence_1.
+    Lists of sentences are compared pair by pair.
 
     Args:
-        sentence_1 (str): Preceding sentence
-        sentence_2 (str): Sentence to check
+        sentence_1 (Union[str, List[str]]): Preceding sentence (or sentences)
+        sentence_2 (Union[str, List[str]]): Sentence (or sentences) to check
 
     Returns:
-        Dict[str, float]: confidence score, >= 0.5 if sentence_2 follows sentence_1, else < 0
+        Dict[str, Union[float, List[float]]]: confidence score (for each pair), >= 0.5 if sentence_2 follows sentence_1, else < 0.5
     """
 
-    happy_ns = HappyNextSentence("BERT", "bert-base-uncased")
-
-    result = happy_ns.predict_next_sentence(sentence_1, sentence_2)
+    if isinstance(sentence_1, str):
+        result = predict_next_sentences(CHECKPOINT, [(sentence_1, sentence_2)])[0]
+    else:
+        result = predict_next_sentences(CHECKPOINT, list(zip(sentence_1, sentence_2)))
 
     return {"prediction": result, "prediction_raw": result}
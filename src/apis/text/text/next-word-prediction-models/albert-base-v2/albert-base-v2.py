@@ -1,26 +1,34 @@
-from typing import Dict, Union
+from typing import Dict, List, Union
 
-from happytransformer import HappyWordPrediction
+from gladia_api_utils.transformers_helper import predict_masks
 
+CHECKPOINT = "albert-base-v2"
 
-def predict(sentence: str, top_k: int = 3) -> Dict[str, Union[str, Dict[str, float]]]:
+
+def predict(
+    sentence: Union[str, List[str]], top_k: int = 3
+) -> Dict[str, Union[str, List[str], Dict, List]]:
     """
     For a given sentence, predict the next word.
 
     Args:
-        sentence (str): The sentence to predict the next word from.
+        sentence (Union[str, List[str]]): The sentence (or sentences) to predict the next word from.
+        top_k (int): The number of words to return.
 
     Returns:
-        Dict[str, Union[str, Dict[str, float]]]: The next word predicted and score from the sentence.
+        Dict[str, Union[str, List[str], Dict, List]]: The next word predicted and score from the sentence (or for each sentence).
     """
 
-    happy_wp = HappyWordPrediction(model_type="ALBERT", model_name="albert-base-v2")
+    sentences = [sentence] if isinstance(sentence, str) else sentence
 
-    result = happy_wp.predict_mask(f"{sentence} [MASK]", top_k=top_k)
+    results = predict_masks(
+        CHECKPOINT, [f"{text} [MASK]" for text in sentences], top_k=top_k
+    )
 
-    prediction_raw = {word.token: word.score for word in result}
-    prediction = result[0].token
+    prediction = [result[0][0] for result in results]
+    prediction_raw = [{word: score for word, score in result} for result in results]
 
-    del happy_wp
+    if isinstance(sentence, str):
+        return {"prediction": prediction[0], "prediction_raw": prediction_raw[0]}
 
     return {"prediction": prediction, "prediction_raw": prediction_raw}
@@ -1,31 +1,33 @@
-from typing import Dict, Union
+from typing import Dict, List, Union
 
-from transformers import AutoModelForMaskedLM, DistilBertTokenizerFast, FillMaskPipeline
+from gladia_api_utils.transformers_helper import predict_masks
 
+CHECKPOINT = "distilbert-base-uncased"
 
-def predict(sentence: str, top_k: int = 3) -> Dict[str, Union[str, Dict[str, float]]]:
+
+def predict(
+    sentence: Union[str, List[str]], top_k: int = 3
+) -> Dict[str, Union[str, List[str], Dict, List]]:
     """
     For a given sentence, predict the next word.
 
     Args:
-        sentence (str): The sentence to predict the next word from.
+        sentence (Union[str, List[str]]): The sentence (or sentences) to predict the next word from.
+        top_k (int): The number of words to return.
 
     Returns:
-        Dict[str, Union[str, Dict[str, float]]]: The next word predicted and score from the sentence.
+        Dict[str, Union[str, List[str], Dict, List]]: The next word predicted and score from the sentence (or for each sentence).
     """
 
-    model_checkpoint = "distilbert-base-uncased"
+    sentences = [sentence] if isinstance(sentence, str) else sentence
 
-    pipeline = FillMaskPipeline(
-        model=AutoModelForMaskedLM.from_pretrained(model_checkpoint),
-        tokenizer=DistilBertTokenizerFast.from_pretrained(model_checkpoint),
+    results = predict_masks(
+        CHECKPOINT, [f"{text} [MASK]" for text in sentences], top_k=top_k
     )
 
-    answers = pipeline(f"{sentence} [MASK]", top_k=top_k)
+    prediction = [result[0][0] for result in results]
+
+    if isinstance(sentence, str):
+        return {"prediction": prediction[0], "prediction_raw": results[0]}
 
-    return {
-        "prediction": answers[0]["token_str"],
-        "prediction_raw": [
-            (answer["token_str"], answer["score"]) for answer in answers
-        ],
-    }
+    return {"prediction": prediction, "prediction_raw": results}
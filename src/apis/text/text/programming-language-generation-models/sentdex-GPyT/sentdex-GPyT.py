@@ -1,29 +1,35 @@
 from typing import Dict, Tuple, Union
 
-import torch
-from transformers import (
-    AutoModelWithLMHead,
-    AutoTokenizer,
-    PreTrainedModel,
-    PreTrainedTokenizer,
-)
+from gladia_api_utils.generation_helper import TextGenerator
+from gladia_api_utils.model_management import load_resident_model
+
+MODEL_NAME = "Sentdex/GPyT"
+
+
+def get_generator() -> TextGenerator:
+    """
+    Get the generator, loaded only once.
+
+    Returns:
+        TextGenerator: the generator
+    """
+
+    return load_resident_model(MODEL_NAME, lambda: TextGenerator(MODEL_NAME))
 
 
 def generate(
     code: str,
-    tokenizer: PreTrainedTokenizer,
-    model: PreTrainedModel,
+    generator: TextGenerator,
     max_length: int = 100,
 ) -> Tuple:
     """
     Takes input code, replaces newline chars with <N>,
-    tokenizes, feeds through model, decodes, then reformat the newlines back in.
+    generates its continuation, then reformat the newlines back in.
 
     Args:
         code (str): The code to generate the continuation of
-        tokenizer (PreTrainedTokenizer): The tokenizer to use
-        model (PreTrainedModel): The model to use
-        max_length (int): The maximum length of the generated code
+        generator (TextGenerator): The generator to use
+        max_length (int): The maximum length of the generated code, in tokens
 
     Returns:
         str: The generated code
@@ -31,15 +37,13 @@ def generate(
 
     new_line_token = "<N>"
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = model.to(device)
-
     converted = code.replace("\n", new_line_token)
 
-    tokenized = tokenizer.encode(converted, return_tensors="pt").to(device)
-    resp = model.generate(tokenized, max_length=max_length).to(device)
+    prompt_length = len(generator.tokenizer(converted)["input_ids"])
 
-    decoded = tokenizer.decode(resp[0])
+    decoded = converted + generator.generate(
+        converted, max_new_tokens=max(max_length - prompt_length, 1), temperature=0
+    )
     reformatted = decoded.replace(new_line_token, "\n")
 
     return reformatted, decoded
@@ -56,14 +60,6 @@ def predict(code_snippet: str) -> Dict[str, Union[str, Dict[str, float]]]:
         Dict[str, str]: The generated code
     """
 
-    model_name = "Sentdex/GPyT"
-
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelWithLMHead.from_pretrained(model_name)
-
-    result, result_raw = generate(code_snippet, tokenizer, model)
-
-    del model
-    del tokenizer
+    result, result_raw = generate(code_snippet, get_generator())
 
     return {"prediction": result, "prediction_raw": result_raw}
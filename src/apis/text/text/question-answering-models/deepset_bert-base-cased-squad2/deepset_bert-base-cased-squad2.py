@@ -1,67 +1,32 @@
-from typing import Dict, List, Tuple, Union
+from typing import Dict, List, Union
 
-import torch
-import truecase
-from transformers import (
-    AutoModelForQuestionAnswering,
-    AutoTokenizer,
-    PreTrainedModel,
-    PreTrainedTokenizer,
-)
+from gladia_api_utils.transformers_helper import answer_questions
 
-
-def load_model() -> Tuple[PreTrainedTokenizer, PreTrainedModel]:
-    """
-    Load `deepset/bert-base-cased-squad2` tokenizer and model.
-
-
-    :return: tuple containing both the tokenizer and the model
-    """
-
-    model_name = "deepset/bert-base-cased-squad2"
-
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForQuestionAnswering.from_pretrained(model_name)
-
-    return tokenizer, model
+CHECKPOINT = "deepset/bert-base-cased-squad2"
 
 
 def predict(
-    context: str, question: str, top_k: int = 1
-) -> Dict[str, Union[str, List[Dict[str, Union[str, float, int]]]]]:
+    context: str, question: Union[str, List[str]], top_k: int = 1
+) -> Dict[str, Union[str, List[str], List[Dict], List[List[Dict]]]]:
     """
     Using the given `context`, answer the provided `question`.
-
-    Note: The score is not provided in the return value.
+    Several questions (as a list or one per line) can be asked about the same context at once.
 
     Args:
-        context (str): The context to answer the question in
-        question (str): The question to answer
+        context (str): The context to use for answering the question.
+        question (Union[str, List[str]]): The question (or questions) to answer.
+        top_k (int): The number of answers to return for each question.
 
     Returns:
-       Dict[str, Union[str, List[Dict[str, Union[str, float, int]]]]]: The answer to the question
+        Dict[str, Union[str, List[str], List[Dict], List[List[Dict]]]]: The answer to the question (or to each question), the associated score and the start and end position of the answer.
     """
 
-    tokenizer, model = load_model()
-
-    inputs = tokenizer.encode_plus(
-        truecase.get_true_case(question),
-        truecase.get_true_case(context),
-        add_special_tokens=True,
-        return_tensors="pt",
-    )
-    input_ids = inputs["input_ids"].tolist()[0]
-
-    answer_start_scores, answer_end_scores = model(**inputs, return_dict=False)
-
-    answer_start = torch.argmax(answer_start_scores)
-    answer_end = torch.argmax(answer_end_scores) + 1
+    questions = question.strip().split("\n") if isinstance(question, str) else question
 
-    result = tokenizer.convert_tokens_to_string(
-        tokenizer.convert_ids_to_tokens(input_ids[answer_start:answer_end])
-    )
+    prediction_raw = answer_questions(CHECKPOINT, context, questions, top_k=top_k)
+    prediction = [answers[0]["answer"] if answers else "" for answers in prediction_raw]
 
-    del tokenizer
-    del model
+    if isinstance(question, str) and len(questions) == 1:
+        return {"prediction": prediction[0], "prediction_raw": prediction_raw[0]}
 
-    return {"prediction": result, "prediction_raw": result}
+    return {"prediction": prediction, "prediction_raw": prediction_raw}
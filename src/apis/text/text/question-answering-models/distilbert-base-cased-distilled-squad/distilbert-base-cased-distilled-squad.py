@@ -1,43 +1,32 @@
 from typing import Dict, List, Union
 
-import truecase
-from happytransformer import HappyQuestionAnswering
+from gladia_api_utils.transformers_helper import answer_questions
+
+CHECKPOINT = "distilbert-base-cased-distilled-squad"
 
 
 def predict(
-    context: str, question: str, top_k: int = 1
-) -> Dict[str, Union[str, List[Dict[str, Union[str, float, int]]]]]:
+    context: str, question: Union[str, List[str]], top_k: int = 1
+) -> Dict[str, Union[str, List[str], List[Dict], List[List[Dict]]]]:
     """
     Using the given `context`, answer the provided `question`.
+    Several questions (as a list or one per line) can be asked about the same context at once.
 
     Args:
         context (str): The context to use for answering the question.
-        question (str): The question to answer.
+        question (Union[str, List[str]]): The question (or questions) to answer.
+        top_k (int): The number of answers to return for each question.
 
     Returns:
-        Dict[str, Union[str, List[Dict[str, Union[str, float, int]]]]]: The answer to the question, the associated score and the start and end position of the answer.
+        Dict[str, Union[str, List[str], List[Dict], List[List[Dict]]]]: The answer to the question (or to each question), the associated score and the start and end position of the answer.
     """
 
-    happy_qa = HappyQuestionAnswering(
-        "DISTILBERT", "distilbert-base-cased-distilled-squad"
-    )
-    result = happy_qa.answer_question(
-        truecase.get_true_case(context),
-        truecase.get_true_case(question),
-        top_k=top_k,
-    )
-
-    prediction_raw = [
-        {
-            "answer": answer.answer,
-            "score": answer.score,
-            "start": answer.start,
-            "end": answer.end,
-        }
-        for answer in result
-    ]
-    prediction = result[0].answer
-
-    del happy_qa
+    questions = question.strip().split("\n") if isinstance(question, str) else question
+
+    prediction_raw = answer_questions(CHECKPOINT, context, questions, top_k=top_k)
+    prediction = [answers[0]["answer"] if answers else "" for answers in prediction_raw]
+
+    if isinstance(question, str) and len(questions) == 1:
+        return {"prediction": prediction[0], "prediction_raw": prediction_raw[0]}
 
     return {"prediction": prediction, "prediction_raw": prediction_raw}
@@ -14,7 +14,7 @@ inputs = [
         "type": "string",
         "name": "question",
         "example": "What's my name?",
-        "placeholder": "Insert the question to be answered",
+        "placeholder": "Insert the question to be answered, one per line to ask several",
     },
     {
         "type": "integer",
@@ -0,0 +1,125 @@
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+from fastapi import HTTPException, status
+from gladia_api_utils.embedding_helper import EmbeddingCache, EmbeddingService
+from gladia_api_utils.model_management import load_resident_model
+from gladia_api_utils.vector_search_helper import get_collection_manager
+
+MODEL_NAME = "sentence-transformers_all-MiniLM-L6-v2_tensorrt_inference"
+MODEL_SUB_PARTS = [
+    "sentence-transformers_all-MiniLM-L6-v2_tensorrt_model",
+    "sentence-transformers_all-MiniLM-L6-v2_tensorrt_tokenize",
+]
+
+
+def get_embedding_service() -> EmbeddingService:
+    """
+    Get the embedding service of the model, created only once.
+
+    Returns:
+        EmbeddingService: the embedding service
+    """
+
+    return load_resident_model(
+        MODEL_NAME,
+        lambda: EmbeddingService(
+            MODEL_NAME,
+            MODEL_SUB_PARTS,
+            current_path=os.path.dirname(os.path.abspath(__file__)),
+            cache=load_resident_model("embedding-cache", EmbeddingCache),
+        ),
+    )
+
+
+def get_collection(collection: str):
+    """
+    Get a collection, raising a 404 error if it doesn't exist.
+
+    Args:
+        collection (str): name of the collection
+
+    Returns:
+        Collection: the collection
+    """
+
+    try:
+        return get_collection_manager().get(collection)
+    except KeyError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.args[0])
+
+
+def upsert(
+    collection: str, documents: List[Dict[str, Any]], batch_size: int = 64
+) -> Dict[str, Any]:
+    """
+    Embed documents in batches and add them all at once to a collection, the documents with an existing id being replaced.
+
+    Args:
+        collection (str): name of the collection
+        documents (List[Dict[str, Any]]): documents, with an "id", a "text" and an optional "metadata"
+        batch_size (int): number of documents embedded per inference (default: 64)
+
+    Returns:
+        Dict[str, Any]: the statistics of the collection
+
+    Raises:
+        ValueError: if batch_size isn't positive
+    """
+
+    if batch_size <= 0:
+        raise ValueError(f"batch_size must be positive, got {batch_size}")
+
+    this_collection = get_collection(collection)
+    embedding_service = get_embedding_service()
+
+    if not documents:
+        return this_collection.get_stats()
+
+    # the collection is written once for the whole request
+    embeddings = np.concatenate(
+        [
+            embedding_service.embed(
+                [document["text"] for document in documents[start : start + batch_size]]
+            )
+            for start in range(0, len(documents), batch_size)
+        ]
+    )
+
+    try:
+        this_collection.upsert(documents, embeddings)
+        return this_collection.get_stats()
+    except KeyError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.args[0])
+
+
+def predict(collection: str, query: str, top_k: int = 10) -> Dict[str, List[Dict]]:
+    """
+    Find the documents of a collection closest to a query.
+
+    Args:
+        collection (str): name of the collection to search
+        query (str): text to search for
+        top_k (int): number of documents to return (default: 10)
+
+    Returns:
+        Dict[str, List[Dict]]: the documents from the closest, with their id, text, metadata and similarity score
+
+    Raises:
+        ValueError: if top_k isn't positive
+    """
+
+    if top_k <= 0:
+        raise ValueError(f"top_k must be positive, got {top_k}")
+
+    this_collection = get_collection(collection)
+
+    embedding = get_embedding_service().embed([query])[0]
+
+    try:
+        results = this_collection.query(embedding, k=top_k)
+    except KeyError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.args[0])
+
+    return {"prediction": results, "prediction_raw": results}
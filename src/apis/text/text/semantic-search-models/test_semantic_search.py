@@ -0,0 +1,199 @@
+from typing import Iterator, List
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from gladia_api_utils.model_management import (
+    load_resident_model,
+    unload_resident_model,
+)
+from gladia_api_utils.vector_search_helper import CollectionManager
+
+from main import app
+
+client = TestClient(app)
+
+EMBEDDING_MODEL_NAME = "sentence-transformers_all-MiniLM-L6-v2_tensorrt_inference"
+
+DOCUMENTS = [
+    {"id": "1", "text": "I like banana", "metadata": {"fruit": True}},
+    {"id": "2", "text": "The weather is sunny today"},
+    {"id": "3", "text": "Paris is the capital of France"},
+]
+
+
+class StubEmbeddingService:
+    """
+    Embedding service counting the letters of the texts, used instead of the triton model
+    """
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts as their letter counts
+
+        Args:
+            texts (List[str]): texts to embed
+
+        Returns:
+            np.ndarray: the embedding of each text
+        """
+
+        embeddings = np.zeros((len(texts), 26), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for character in text.lower():
+                if "a" <= character <= "z":
+                    embeddings[row, ord(character) - ord("a")] += 1
+
+        return embeddings
+
+
+@pytest.fixture(autouse=True)
+def resident_models(tmp_path) -> Iterator[None]:
+    """
+    Replace the embedding model by a stub and keep the collections in a temporary directory
+
+    Args:
+        tmp_path (Path): directory of the collections
+
+    Yields:
+        None
+    """
+
+    for key in [EMBEDDING_MODEL_NAME, "semantic-search-collections"]:
+        unload_resident_model(key)
+
+    load_resident_model(EMBEDDING_MODEL_NAME, StubEmbeddingService)
+    load_resident_model(
+        "semantic-search-collections", lambda: CollectionManager(str(tmp_path))
+    )
+
+    yield
+
+    for key in [EMBEDDING_MODEL_NAME, "semantic-search-collections"]:
+        unload_resident_model(key)
+
+
+class TestSemanticSearch:
+    """
+    Class to test the semantic search endpoints
+    """
+
+    target_url = "/text/text/semantic-search/"
+
+    def test_collection_lifecycle(self) -> None:
+        """
+        Test creating a collection, adding and replacing documents, searching it and deleting it
+
+        Returns:
+            None
+        """
+
+        response = client.post(f"{self.target_url}collections", json={"name": "fruits"})
+        assert response.status_code == 200
+        assert response.json()["documents"] == 0
+
+        response = client.put(
+            f"{self.target_url}collections/fruits/documents",
+            json={"documents": DOCUMENTS, "batch_size": 2},
+        )
+        assert response.status_code == 200
+        assert response.json()["documents"] == 3
+
+        response = client.post(
+            self.target_url,
+            data={"collection": "fruits", "query": "I like bananas", "top_k": 2},
+        )
+        assert response.status_code == 200
+
+        prediction = response.json()["prediction"]
+        assert [document["id"] for document in prediction][:1] == ["1"]
+        assert prediction[0]["metadata"] == {"fruit": True}
+        assert len(prediction) == 2
+
+        response = client.put(
+            f"{self.target_url}collections/fruits/documents",
+            json={"documents": [{"id": "1", "text": "I like bananas"}]},
+        )
+        assert response.json()["documents"] == 3
+
+        response = client.post(
+            self.target_url,
+            data={"collection": "fruits", "query": "I like bananas", "top_k": 1},
+        )
+        assert response.json()["prediction"][0]["text"] == "I like bananas"
+        assert response.json()["prediction"][0]["score"] == pytest.approx(1.0)
+
+        response = client.get(f"{self.target_url}collections")
+        assert [collection["name"] for collection in response.json()] == ["fruits"]
+
+        response = client.get(f"{self.target_url}collections/fruits")
+        assert response.status_code == 200
+        assert response.json()["index"] == "exhaustive"
+
+        response = client.delete(f"{self.target_url}collections/fruits")
+        assert response.status_code == 200
+
+        response = client.get(f"{self.target_url}collections/fruits")
+        assert response.status_code == 404
+
+    def test_unknown_collection(self) -> None:
+        """
+        Test that the endpoints return a 404 error for a collection which doesn't exist
+
+        Returns:
+            None
+        """
+
+        response = client.post(
+            self.target_url, data={"collection": "missing", "query": "banana"}
+        )
+        assert response.status_code == 404
+
+        response = client.put(
+            f"{self.target_url}collections/missing/documents",
+            json={"documents": DOCUMENTS},
+        )
+        assert response.status_code == 404
+
+        response = client.get(f"{self.target_url}collections/missing")
+        assert response.status_code == 404
+
+        response = client.delete(f"{self.target_url}collections/missing")
+        assert response.status_code == 404
+
+    def test_invalid_requests(self) -> None:
+        """
+        Test that the invalid names, models, batch sizes and number of results return a 400 error
+
+        Returns:
+            None
+        """
+
+        response = client.post(f"{self.target_url}collections", json={"name": "fruits"})
+        assert response.status_code == 200
+
+        response = client.post(f"{self.target_url}collections", json={"name": "fruits"})
+        assert response.status_code == 400
+
+        response = client.post(
+            f"{self.target_url}collections", json={"name": "not a valid name"}
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            f"{self.target_url}collections",
+            json={"name": "other", "model": "missing-model"},
+        )
+        assert response.status_code == 400
+
+        response = client.put(
+            f"{self.target_url}collections/fruits/documents",
+            json={"documents": DOCUMENTS, "batch_size": 0},
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            self.target_url,
+            data={"collection": "fruits", "query": "banana", "top_k": 0},
+        )
+        assert response.status_code == 400
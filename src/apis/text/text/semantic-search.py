@@ -0,0 +1,196 @@
+import importlib.machinery
+import os
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, HTTPException, status
+from gladia_api_utils.submodules import TaskRouter
+from gladia_api_utils.vector_search_helper import get_collection_manager
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+router = APIRouter()
+
+inputs = [
+    {
+        "type": "string",
+        "name": "collection",
+        "example": "my-collection",
+        "placeholder": "Insert the name of the collection to search",
+    },
+    {
+        "type": "string",
+        "name": "query",
+        "example": "I like banana",
+        "placeholder": "Insert the text to search for",
+    },
+    {
+        "type": "integer",
+        "name": "top_k",
+        "default": 10,
+        "example": 10,
+        "placeholder": "Number of documents to return",
+    },
+]
+
+output = {
+    "name": "documents",
+    "type": "array",
+    "example": '[{"id": "1", "text": "I like banana", "metadata": {}, "score": 0.73}]',
+}
+
+task_router = TaskRouter(
+    router=router, input=inputs, output=output, default_model="all-MiniLM-L6-v2"
+)
+
+MODELS_PATH = os.path.join(os.path.dirname(__file__), "semantic-search-models")
+
+
+class CollectionInput(BaseModel):
+    name: str
+    model: str = "all-MiniLM-L6-v2"
+
+
+class Document(BaseModel):
+    id: str
+    text: str
+    metadata: Dict[str, Any] = {}
+
+
+class DocumentsInput(BaseModel):
+    documents: List[Document]
+    batch_size: int = 64
+
+
+def get_collection_or_404(name: str):
+    """
+    Get a collection, raising a 404 error if it doesn't exist.
+
+    Args:
+        name (str): name of the collection
+
+    Returns:
+        Collection: the collection
+    """
+
+    try:
+        return get_collection_manager().get(name)
+    except KeyError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.args[0])
+
+
+@router.get("/collections", summary="List the collections", tags=[task_router.tags])
+async def list_collections() -> List[Dict[str, Any]]:
+    """
+    List the collections with their size and index latencies.
+
+    Returns:
+        List[Dict[str, Any]]: the statistics of each collection
+    """
+
+    return get_collection_manager().list()
+
+
+@router.post("/collections", summary="Create a collection", tags=[task_router.tags])
+async def create_collection(collection_input: CollectionInput) -> Dict[str, Any]:
+    """
+    Create an empty collection, its documents being embedded with the given model.
+
+    Args:
+        collection_input (CollectionInput): the name of the collection and its model
+
+    Returns:
+        Dict[str, Any]: the statistics of the collection
+    """
+
+    if collection_input.model not in task_router.versions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model {collection_input.model} does not exist",
+        )
+
+    try:
+        collection = get_collection_manager().create(
+            collection_input.name, collection_input.model
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    return collection.get_stats()
+
+
+@router.get(
+    "/collections/{name}",
+    summary="Get the statistics of a collection",
+    tags=[task_router.tags],
+)
+async def get_collection(name: str) -> Dict[str, Any]:
+    """
+    Get the size of a collection and the latencies of its index.
+
+    Args:
+        name (str): name of the collection
+
+    Returns:
+        Dict[str, Any]: the statistics of the collection
+    """
+
+    return get_collection_or_404(name).get_stats()
+
+
+@router.delete(
+    "/collections/{name}", summary="Delete a collection", tags=[task_router.tags]
+)
+async def delete_collection(name: str) -> Dict[str, str]:
+    """
+    Delete a collection and its documents.
+
+    Args:
+        name (str): name of the collection
+
+    Returns:
+        Dict[str, str]: the name of the deleted collection
+    """
+
+    try:
+        get_collection_manager().delete(name)
+    except KeyError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=error.args[0])
+
+    return {"deleted": name}
+
+
+@router.put(
+    "/collections/{name}/documents",
+    summary="Add or replace documents of a collection",
+    tags=[task_router.tags],
+)
+async def upsert_documents(
+    name: str, documents_input: DocumentsInput
+) -> Dict[str, Any]:
+    """
+    Embed documents in batches and add them to a collection,
+    the documents with an existing id being replaced.
+
+    Args:
+        name (str): name of the collection
+        documents_input (DocumentsInput): the documents and the number of documents embedded per inference
+
+    Returns:
+        Dict[str, Any]: the statistics of the collection
+    """
+
+    model = get_collection_or_404(name).model
+
+    this_module = importlib.machinery.SourceFileLoader(
+        model, os.path.join(MODELS_PATH, model, f"{model}.py")
+    ).load_module()
+
+    try:
+        return await run_in_threadpool(
+            this_module.upsert,
+            name,
+            [document.dict() for document in documents_input.documents],
+            documents_input.batch_size,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
@@ -1,6 +1,7 @@
 from typing import Dict
 
-import truecase
+from gladia_api_utils.tokenization_helper import encode_text
+from gladia_api_utils.truecase_helper import get_true_case
 from torch import device as get_device
 from torch.cuda import is_available as is_cuda_available
 from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
@@ -27,15 +28,10 @@ def predict(context: str, top_k: int = 1) -> Dict[str, str]:
 
     tokenizer = AutoTokenizer.from_pretrained(model_name)
 
-    text = f"paraphrase: {truecase.get_true_case(context)}</s>"
+    text = f"paraphrase: {get_true_case(context)}</s>"
 
-    encoding = tokenizer.encode_plus(
-        text, max_length=128, padding="max_length", return_tensors="pt"
-    )
-    input_ids, attention_mask = (
-        encoding["input_ids"].to(device),
-        encoding["attention_mask"].to(device),
-    )
+    encoding = encode_text(tokenizer, text, device=device)
+    input_ids, attention_mask = encoding["input_ids"], encoding["attention_mask"]
 
     beam_outputs = model.generate(
         input_ids=input_ids,
@@ -1,27 +1,30 @@
-from typing import Dict, Union
+from typing import Dict, List, Union
 
-import truecase
-from happytransformer import HappyTextClassification
+from gladia_api_utils.transformers_helper import classify_texts
+from gladia_api_utils.truecase_helper import get_true_cases
 
+CHECKPOINT = "distilbert-base-uncased-finetuned-sst-2-english"
 
-def predict(text: str) -> Dict[str, Union[str, Dict[str, Union[str, float]]]]:
+
+def predict(
+    text: Union[str, List[str]]
+) -> Dict[str, Union[str, List[str], Dict, List]]:
     """
     For a given text, predict if it's POSITIVE or NEGATIVE
 
     Args:
-        text (str): The text to predict the label for.
+        text (Union[str, List[str]]): The text (or texts) to predict the label for.
 
     Returns:
-        Dict[str, Union[str, Dict[str, Union[str, float]]]]: The predicted label and the associated score POSITIVE or NEGATIVE.
+        Dict[str, Union[str, List[str], Dict, List]]: The predicted label and the associated score POSITIVE or NEGATIVE (for each text).
     """
 
-    happy_tc = HappyTextClassification(
-        model_type="DISTILBERT",
-        model_name="distilbert-base-uncased-finetuned-sst-2-english",
-    )
+    texts = [text] if isinstance(text, str) else text
 
-    result = happy_tc.classify_text(truecase.get_true_case(text))
+    prediction_raw = classify_texts(CHECKPOINT, get_true_cases(texts))
+    prediction = [result["label"] for result in prediction_raw]
 
-    prediction_raw = {"label": result.label, "score": result.score}
+    if isinstance(text, str):
+        return {"prediction": prediction[0], "prediction_raw": prediction_raw[0]}
 
-    return {"prediction": result.label, "prediction_raw": prediction_raw}
+    return {"prediction": prediction, "prediction_raw": prediction_raw}
@@ -1,11 +1,11 @@
 from typing import Dict, List, Union
 
-import truecase
 from gladia_api_utils.triton_helper import (
     TritonClient,
     check_if_model_needs_to_be_preloaded,
     data_processing,
 )
+from gladia_api_utils.truecase_helper import get_true_case
 
 
 def predict(text: str) -> Dict[str, Union[str, List[float]]]:
@@ -32,7 +32,7 @@ def predict(text: str) -> Dict[str, Union[str, List[float]]]:
         preload_model=check_if_model_needs_to_be_preloaded(MODEL_NAME),
     )
 
-    numpy_input = data_processing.text_to_numpy(truecase.get_true_case(text))
+    numpy_input = data_processing.text_to_numpy(get_true_case(text))
 
     client.set_input(name="TEXT", shape=numpy_input.shape, datatype="BYTES")
 
@@ -1,11 +1,14 @@
 from typing import Dict, List, Union
 
-import numpy as np
-import truecase
-from transformers import pipeline
+from gladia_api_utils.truecase_helper import get_true_case
+from gladia_api_utils.zero_shot_helper import get_zero_shot_classifier
 
+CHECKPOINT = "facebook/bart-large-mnli"
 
-def predict(text: str) -> Dict[str, Union[str, List[float]]]:
+LABELS = ["POSITIVE", "NEUTRAL", "NEGATIVE"]
+
+
+def predict(text: str) -> Dict[str, Union[str, Dict[str, Union[str, List]]]]:
     """
     For a given text, predict if it's POSITIVE, NEUTRAL or NEGATIVE
 
@@ -13,15 +16,11 @@ def predict(text: str) -> Dict[str, Union[str, List[float]]]:
         text (str): The text to predict the label for.
 
     Returns:
-        Dict[str, Union[str, List[float]]]: The predicted label and the associated score POSITIVE, NEUTRAL or NEGATIVE.
+        Dict[str, Union[str, Dict[str, Union[str, List]]]]: The predicted label and the associated score POSITIVE, NEUTRAL or NEGATIVE.
     """
 
-    classifier = pipeline("zero-shot-classification")
-    prediction = classifier(
-        truecase.get_true_case(text),
-        candidate_labels=["POSITIVE", "NEUTRAL", "NEGATIVE"],
-    )
-
-    label = prediction["labels"][np.argmax(prediction["scores"])]
+    prediction = get_zero_shot_classifier(CHECKPOINT).classify(
+        [get_true_case(text)], LABELS
+    )[0]
 
-    return {"prediction": label, "prediction_raw": prediction}
+    return {"prediction": prediction["labels"][0], "prediction_raw": prediction}
@@ -1,66 +1,87 @@
-from typing import Dict
+import os
+from typing import Dict, List, Union
 
-from gladia_api_utils.triton_helper import (
-    TritonClient,
-    check_if_model_needs_to_be_preloaded,
-    data_processing,
+from gladia_api_utils.embedding_helper import (
+    EmbeddingCache,
+    EmbeddingService,
+    cosine_similarity_matrix,
 )
-from torch import mm, tensor
-from torch.nn.functional import normalize
+from gladia_api_utils.model_management import load_resident_model
 
+MODEL_NAME = "sentence-transformers_all-MiniLM-L6-v2_tensorrt_inference"
+MODEL_SUB_PARTS = [
+    "sentence-transformers_all-MiniLM-L6-v2_tensorrt_model",
+    "sentence-transformers_all-MiniLM-L6-v2_tensorrt_tokenize",
+]
 
-def cos_sim(first_sentence_embedding: list, second_sentence_embedding: list) -> float:
+
+def get_embedding_service() -> EmbeddingService:
+    """
+    Get the embedding service of the model, created only once.
+
+    Returns:
+        EmbeddingService: the embedding service
     """
-    For two given sentences embeddings a and b, computes the cosine similarity
+
+    return load_resident_model(
+        MODEL_NAME,
+        lambda: EmbeddingService(
+            MODEL_NAME,
+            MODEL_SUB_PARTS,
+            current_path=os.path.dirname(os.path.abspath(__file__)),
+            cache=load_resident_model("embedding-cache", EmbeddingCache),
+        ),
+    )
+
+
+def to_sentences(sentences: Union[str, List[str]]) -> List[str]:
+    """
+    Get the sentences of an input: a list of sentences or a single text, whatever its lines.
 
     Args:
-        first_sentence_embedding (list): first sentence embedding to compare
-        second_sentence_embedding (list): second sentence embedding to compare
+        sentences (Union[str, List[str]]): the input
 
     Returns:
-        float: cosine similarity score between 0 and 1
+        List[str]: the sentences
     """
-    return mm(
-        normalize(tensor(first_sentence_embedding), p=2, dim=1),
-        normalize(tensor(second_sentence_embedding), p=2, dim=1).transpose(0, 1),
-    )
+
+    if isinstance(sentences, str):
+        return [sentences]
+
+    return list(sentences)
 
 
-def predict(sentence_1: str, sentence_2: str) -> Dict[float, float]:
+def predict(
+    sentence_1: Union[str, List[str]], sentence_2: Union[str, List[str]]
+) -> Dict[str, Union[float, List[List[float]]]]:
     """
     For two given sentences, say whether they are similar or not.
     The similarity is computed with the cosine similarity.
+    Several sentences (as a list) can be compared at once (one-to-many or many-to-many),
+    all the sentences being embedded in a single inference.
+    The similarity task sends single texts, the lists are left to the direct callers.
 
     Args:
-        sentence_1 (str): first sentence to compare
-        sentence_2 (str): second sentence to compare
+        sentence_1 (Union[str, List[str]]): first sentence (or sentences) to compare
+        sentence_2 (Union[str, List[str]]): second sentence (or sentences) to compare
 
     Returns:
-        Dict[str, float]: the similarity score between 0 and 1
+        Dict[str, Union[float, List[List[float]]]]: the similarity score between 0 and 1,
+            or the similarity matrix (a row per first sentence, a column per second sentence) for lists of sentences
     """
 
-    MODEL_NAME = "sentence-transformers_all-MiniLM-L6-v2_tensorrt_inference"
-    MODEL_SUB_PARTS = [
-        "sentence-transformers_all-MiniLM-L6-v2_tensorrt_model",
-        "sentence-transformers_all-MiniLM-L6-v2_tensorrt_tokenize",
-    ]
-
-    client = TritonClient(
-        model_name=MODEL_NAME,
-        sub_parts=MODEL_SUB_PARTS,
-        output_name="output",
-        preload_model=check_if_model_needs_to_be_preloaded(MODEL_NAME),
-    )
-
-    sentence_1_preprocessed = data_processing.text_to_numpy(sentence_1)
-    sentence_2_preprocessed = data_processing.text_to_numpy(sentence_2)
+    sentences_1 = to_sentences(sentence_1)
+    sentences_2 = to_sentences(sentence_2)
 
-    client.set_input(name="TEXT", shape=sentence_1_preprocessed.shape, datatype="BYTES")
-    sentence_1_embeddings = client(sentence_1_preprocessed)[0]
+    embeddings = get_embedding_service().embed(sentences_1 + sentences_2)
 
-    client.set_input(name="TEXT", shape=sentence_2_preprocessed.shape, datatype="BYTES")
-    sentence_2_embeddings = client(sentence_2_preprocessed)[0]
+    cosine_scores = cosine_similarity_matrix(
+        embeddings[: len(sentences_1)], embeddings[len(sentences_1) :]
+    )
 
-    cosine_scores = cos_sim(sentence_1_embeddings, sentence_2_embeddings)
+    if isinstance(sentence_1, str) and isinstance(sentence_2, str):
+        result = float(cosine_scores[0, 0])
+    else:
+        result = cosine_scores.tolist()
 
-    return {"prediction": cosine_scores.item(), "prediction_raw": cosine_scores.item()}
+    return {"prediction": result, "prediction_raw": result}
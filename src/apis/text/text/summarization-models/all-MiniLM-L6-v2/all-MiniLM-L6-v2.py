@@ -1,10 +1,38 @@
 # inspired from https://huggingface.co/spaces/ml6team/post-processing-summarization/
-import itertools
+import os
+from logging import getLogger
+from typing import Any, List
 
-import numpy as np
 import torch
-from sentence_transformers import SentenceTransformer
-from transformers import AutoModelForTokenClassification, AutoTokenizer, pipeline
+from gladia_api_utils.model_management import load_resident_model
+from nltk.tokenize import sent_tokenize
+from transformers import pipeline
+
+logger = getLogger(__name__)
+
+MODEL_NAME = "google/pegasus-cnn_dailymail"
+
+# generation parameters of each decoding strategy
+DECODING_PRESETS = {
+    "greedy": {"num_beams": 1, "do_sample": False},
+    "beam": {
+        "num_beams": 4,
+        "do_sample": False,
+        "no_repeat_ngram_size": 3,
+        "early_stopping": True,
+    },
+    "sampling": {"do_sample": True, "top_k": 50, "top_p": 0.95},
+}
+
+# length of the summary of each chunk of a long document
+CHUNK_SUMMARY_MIN_LENGTH = 30
+CHUNK_SUMMARY_MAX_LENGTH = 128
+
+# a long document is reduced at most this number of times before the final summary
+MAX_REDUCE_STEPS = 3
+
+# number of chunks of a long document summarized at once
+SUMMARIZATION_BATCH_SIZE = int(os.getenv("GLADIA_SUMMARIZATION_BATCH_SIZE", 8))
 
 
 def get_summarizer_model():
@@ -14,76 +42,88 @@ def get_summarizer_model():
     Returns:
       summarizer_model (pipeline): summarizer model
     """
-    model_name = "google/pegasus-cnn_dailymail"
 
     summarizer_model = pipeline(
         "summarization",
-        model=model_name,
-        tokenizer=model_name,
+        model=MODEL_NAME,
+        tokenizer=MODEL_NAME,
         device=0 if torch.cuda.is_available() else -1,
     )
 
     return summarizer_model
 
 
-def generate_abstractive_summary(
+def chunk_text(text: str, tokenizer: Any, max_tokens: int) -> List[str]:
+    """
+    Split a text into chunks of whole sentences fitting in the model input
+
+    Args:
+      text (str): text to split
+      tokenizer (Any): tokenizer of the model
+      max_tokens (int): maximum number of tokens of a chunk
+
+    Returns:
+      chunks (List[str]): chunks of the text, a sentence longer than max_tokens being a chunk on its own
+    """
+
+    chunks = list()
+    chunk, chunk_length = list(), 0
+
+    for sentence in sent_tokenize(text):
+        length = len(tokenizer.tokenize(sentence))
+
+        if chunk and chunk_length + length > max_tokens:
+            chunks.append(" ".join(chunk))
+            chunk, chunk_length = list(), 0
+
+        chunk.append(sentence)
+        chunk_length += length
+
+    if chunk:
+        chunks.append(" ".join(chunk))
+
+    return chunks
+
+
+def generate_abstractive_summaries(
     summarization_model: pipeline,
-    text: str,
-    type: str,
+    texts: List[str],
+    decoding: str = "beam",
     min_len: int = 120,
     max_len: int = 512,
-    **kwargs
-):
+    batch_size: int = 8,
+) -> List[str]:
     """
-    Generates an abstractive summary
+    Generates the abstractive summaries of texts in batches
 
     Args:
       summarization_model (pipeline): summarization model
-      text (str): text to summarize
-      type (str): type of summarization
-      min_len (int): minimum length of the summary
-      max_len (int): maximum length of the summary
-      **kwargs: additional arguments
+      texts (List[str]): texts to summarize
+      decoding (str): decoding preset, one of DECODING_PRESETS
+      min_len (int): minimum length of the summaries
+      max_len (int): maximum length of the summaries
+      batch_size (int): number of texts summarized at once
 
     Returns:
-      summary (str): summary
+      summaries (List[str]): summaries
     """
 
-    text = text.strip().replace("\n", " ")
-    if type == "top_p":
-        text = summarization_model(
-            text,
-            min_length=min_len,
-            max_length=max_len,
-            top_k=50,
-            top_p=0.95,
-            clean_up_tokenization_spaces=True,
-            truncation=True,
-            **kwargs
-        )
-    elif type in ["greedy", "beam"]:
-        text = summarization_model(
-            text,
-            min_length=min_len,
-            max_length=max_len,
-            clean_up_tokenization_spaces=True,
-            truncation=True,
-            **kwargs
-        )
-    elif type == "top_k":
-        text = summarization_model(
-            text,
-            min_length=min_len,
-            max_length=max_len,
-            top_k=50,
-            clean_up_tokenization_spaces=True,
-            truncation=True,
-            **kwargs
+    if decoding not in DECODING_PRESETS:
+        raise ValueError(
+            f"Unknown decoding {decoding}, should be one of {list(DECODING_PRESETS)}"
         )
 
-    summary = text[0]["summary_text"].replace("<n>", " ")
+    outputs = summarization_model(
+        [text.strip().replace("\n", " ") for text in texts],
+        min_length=min_len,
+        max_length=max_len,
+        clean_up_tokenization_spaces=True,
+        truncation=True,
+        batch_size=batch_size,
+        **DECODING_PRESETS[decoding],
+    )
 
-    return summary
+    return [output["summary_text"].replace("<n>", " ") for output in outputs]
 
 
 def predict(
@@ -91,31 +131,60 @@ def predict(
     source_language: str = "eng",
     min_length: int = 120,
     max_length: int = 512,
-):
+    decoding: str = "beam",
+) -> str:
     """
-    Predict the summary of a text
+    Predict the summary of a text.
+    Texts longer than the model input are split into chunks of sentences which are summarized
+    in batches, the concatenation of their summaries being summarized again (map-reduce).
 
     Args:
       text (str): text to summarize
       source_language (str): language of the text
-      min_len (int): minimum length of the summary
-      max_len (int): maximum length of the summary
+      min_length (int): minimum length of the summary
+      max_length (int): maximum length of the summary
+      decoding (str): decoding preset: "greedy", "beam" (4 beams) or "sampling" (default: "beam")
 
     Returns:
       summary (str): summary
     """
 
-    summarization_model = get_summarizer_model()
+    if decoding not in DECODING_PRESETS:
+        raise ValueError(
+            f"Unknown decoding {decoding}, should be one of {list(DECODING_PRESETS)}"
+        )
+
+    summarization_model = load_resident_model(MODEL_NAME, get_summarizer_model)
+
+    tokenizer = summarization_model.tokenizer
+    max_tokens = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+
+    chunks = chunk_text(text, tokenizer, max_tokens)
+
+    for step in range(MAX_REDUCE_STEPS):
+        if len(chunks) <= 1:
+            break
+
+        logger.debug(f"Summarizing {len(chunks)} chunks (reduce step {step})")
 
-    summary = generate_abstractive_summary(
+        summaries = generate_abstractive_summaries(
+            summarization_model=summarization_model,
+            texts=chunks,
+            decoding=decoding,
+            min_len=CHUNK_SUMMARY_MIN_LENGTH,
+            max_len=CHUNK_SUMMARY_MAX_LENGTH,
+            batch_size=SUMMARIZATION_BATCH_SIZE,
+        )
+
+        chunks = chunk_text(" ".join(summaries), tokenizer, max_tokens)
+
+    # the remaining text is truncated to the model input if the reduce steps weren't enough
+    summary = generate_abstractive_summaries(
         summarization_model=summarization_model,
-        text=text,
-        type="beam",
+        texts=[" ".join(chunks)],
+        decoding=decoding,
         min_len=min_length,
         max_len=max_length,
-        do_sample=True,
-        num_beams=15,
-        no_repeat_ngram_size=4,
-    )
+    )[0]
 
     return summary
@@ -30,6 +30,13 @@ inputs = [
         "example": 512,
         "placeholder": "Maximum lenght of the summary",
     },
+    {
+        "type": "string",
+        "name": "decoding",
+        "default": "beam",
+        "example": "beam",
+        "placeholder": "Decoding strategy: greedy, beam or sampling",
+    },
 ]
 
 output = {"name": "summarized_text", "type": "string", "example": "summarized_text"}
@@ -1,10 +1,14 @@
+import os
 from typing import Dict
 
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+from gladia_api_utils.model_management import load_resident_model
+from gladia_api_utils.translation_helper import TranslationEngine, TranslationMemory
 
-TASK = "translation"
 CKPT = "facebook/nllb-200-distilled-600M"
 
+# maximum number of sentences translated at once
+TRANSLATION_BATCH_SIZE = int(os.getenv("GLADIA_TRANSLATION_BATCH_SIZE", 16))
+
 
 # https://github.com/facebookresearch/flores/blob/main/flores200/README.md
 codes_as_string = """ace	Acehnese (Arabic script)	ace_Arab
@@ -212,19 +216,29 @@ zho	Chinese (Traditional)	zho_Hant
 zsm	Standard Malay	zsm_Latn
 zul	zu	zul_Latn"""
 
-codes_as_string = codes_as_string.split("\n")
 
-flores_codes_mapping = {}
-for code in codes_as_string:
-    iso_3, lang, lang_code = code.split("\t")
-    flores_codes_mapping[iso_3] = lang_code
+def get_flores_codes_mapping() -> Dict[str, str]:
+    """
+    Map the ISO 639-3 codes to the flores 200 codes.
+
+    Returns:
+        Dict[str, str]: the flores 200 code of each ISO 639-3 code
+    """
+
+    flores_codes_mapping = {}
+    for code in codes_as_string.split("\n"):
+        iso_3, lang, lang_code = code.split("\t")
+        flores_codes_mapping[iso_3] = lang_code
+
+    return flores_codes_mapping
 
 
 def predict(
     input_string: str, source_language: str, target_language: str
 ) -> Dict[str, str]:
     """
-    Translate the text from source lang to target lang
+    Translate the text from source lang to target lang.
+    The text is split into sentences, translated in batches, so long texts are not truncated.
 
     Args:
         input_string (str): the text to translate
@@ -232,29 +246,27 @@ def predict(
         target_language (str): the language to translate to 3-letters ISO code representation of the source language to translate from
 
     Returns:
-        str: the translated text
+        Dict[str, str]: the translated text
     """
-    max_length = 400
-
-    model = AutoModelForSeq2SeqLM.from_pretrained(CKPT)
-    tokenizer = AutoTokenizer.from_pretrained(CKPT)
 
     # mapping ISO CODE 3 letter (ISO 639-3) to flores 200 code
     # https://github.com/facebookresearch/flores/blob/main/flores200/README.md
+    flores_codes_mapping = load_resident_model(
+        "flores200-codes", get_flores_codes_mapping
+    )
     flores200_source_language = flores_codes_mapping[source_language]
     flores200_target_language = flores_codes_mapping[target_language]
 
-    translation_pipeline = pipeline(
-        TASK,
-        model=model,
-        tokenizer=tokenizer,
-        src_lang=flores200_source_language,
-        tgt_lang=flores200_target_language,
-        max_length=max_length,
-    )
+    # the translation memory is shared by the translation models
+    memory = load_resident_model("translation-memory", TranslationMemory)
+    engine = load_resident_model(CKPT, lambda: TranslationEngine(CKPT, memory=memory))
+
+    result = engine.translate(
+        [input_string],
+        flores200_source_language,
+        flores200_target_language,
+        language=source_language,
+        batch_size=max(TRANSLATION_BATCH_SIZE, 1),
+    )[0]
 
-    result = translation_pipeline(input_string)
-    return {
-        "prediction": result[0]["translation_text"],
-        "prediction_raw": result[0]["translation_text"],
-    }
+    return {"prediction": result, "prediction_raw": result}
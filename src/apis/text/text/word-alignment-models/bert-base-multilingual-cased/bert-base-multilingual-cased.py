@@ -1,161 +1,201 @@
-import itertools
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 
 import torch
-from transformers import BertModel, BertTokenizer, PreTrainedTokenizer
+from gladia_api_utils.model_management import load_resident_model
+from transformers import BertModel, BertTokenizerFast
 
+MODEL_NAME = "bert-base-multilingual-cased"
 
-def get_tokens(
-    input_string: str, tokenizer: PreTrainedTokenizer
-) -> Tuple[List[str], List[List[str]]]:
-    """
-    Tokenize an input string
-
-    Args:
-        input_string (str): string to tokenize
-        tokenizer (PreTrainedTokenizer): tokenizer to use
-
-    Returns:
-        Tuple[List[str], List[List[str]]]: tuple contained the string splited by space and the tokenized string
-    """
+# the alignments are extracted from the output of this layer,
+# the following ones are never run
+ALIGN_LAYER = 8
 
-    sentence = input_string.strip().split()
-    token = [tokenizer.tokenize(word) for word in sentence]
+THRESHOLD = 1e-3
 
-    return sentence, token
 
-
-def tokens_to_tensor(
-    tokens: List[List[str]], tokenizer: PreTrainedTokenizer
-) -> torch.Tensor:
+def load_model() -> Tuple[BertModel, BertTokenizerFast, str]:
     """
-    From a given tokenized sentence, return it as a Tensor
-
-    Args:
-        tokens (List[List[str]]): tokenized sentence
-        tokenizer (PreTrainedTokenizer): tokenizer used to tokenize the text
+    Load the model truncated to its first ALIGN_LAYER layers, and its tokenizer.
 
     Returns:
-        torch.Tensor: tensor containing the tokenized sentence
+        Tuple[BertModel, BertTokenizerFast, str]: the model, the tokenizer and the device of the model
     """
 
-    ids = [tokenizer.convert_tokens_to_ids(t) for t in tokens]
+    device = "cuda" if torch.cuda.is_available() else "cpu"
 
-    prepared_ids = tokenizer.prepare_for_model(
-        ids=list(itertools.chain(*ids)),
-        return_tensors="pt",
-        model_max_length=tokenizer.model_max_length,
-        truncation=True,
-    )
+    model = BertModel.from_pretrained(MODEL_NAME, add_pooling_layer=False)
+    model.encoder.layer = model.encoder.layer[:ALIGN_LAYER]
+    model.config.num_hidden_layers = ALIGN_LAYER
+    model.to(device).eval()
 
-    return prepared_ids["input_ids"]
+    tokenizer = BertTokenizerFast.from_pretrained(MODEL_NAME)
 
+    return model, tokenizer, device
 
-def map_tokens_to_words(tokens: List[List[str]]) -> List[int]:
+
+def embed_sentences(
+    sentences: List[List[str]],
+    model: BertModel,
+    tokenizer: BertTokenizerFast,
+    device: str,
+    batch_size: int,
+) -> List[Tuple[torch.Tensor, torch.Tensor]]:
     """
-    Associate tokens to their respective words.
+    Compute the embeddings of the tokens of sentences, in padded batches.
 
     Args:
-        tokens (List[List[str]]): tokens to associate to their words
+        sentences (List[List[str]]): words of each sentence
+        model (BertModel): truncated model
+        tokenizer (BertTokenizerFast): tokenizer of the model
+        device (str): device of the model
+        batch_size (int): number of sentences per forward pass
 
     Returns:
-        List[int]: word index for which the token come from
+        List[Tuple[torch.Tensor, torch.Tensor]]: embeddings of the tokens of each sentence
+            and index of the word of each token, without the special tokens
     """
 
-    tok2word_map = []
+    embeddings = []
+
+    for start in range(0, len(sentences), batch_size):
+        batch = sentences[start : start + batch_size]
+
+        inputs = tokenizer(
+            batch,
+            is_split_into_words=True,
+            padding=True,
+            truncation=True,
+            return_tensors="pt",
+        )
+
+        with torch.no_grad():
+            hidden_states = model(**inputs.to(device)).last_hidden_state
+
+        for index in range(len(batch)):
+            word_ids = inputs.word_ids(index)
+            # the special and padding tokens don't belong to any word
+            positions = [
+                position for position, word in enumerate(word_ids) if word is not None
+            ]
 
-    for i, word_list in enumerate(tokens):
-        tok2word_map += [i] * len(word_list)
+            embeddings.append(
+                (
+                    hidden_states[index, positions],
+                    torch.tensor([word_ids[position] for position in positions]),
+                )
+            )
 
-    return tok2word_map
+    return embeddings
 
 
 def get_words_alignment(
     sentence_src: List[str],
     sentence_tgt: List[str],
-    tok2word_map_src: List[int],
-    tok2word_map_tgt: List[int],
-    softmax_inter: torch.Tensor,
+    embeddings_src: Tuple[torch.Tensor, torch.Tensor],
+    embeddings_tgt: Tuple[torch.Tensor, torch.Tensor],
+    threshold: float = THRESHOLD,
 ) -> List[dict]:
     """
-    Associate words from sentence_src to sentence_tgt
+    Associate words from sentence_src to sentence_tgt: two words are aligned
+    if two of their tokens are each other's most similar ones in both directions.
 
     Args:
         sentence_src (List[str]): sentence to associate from
         sentence_tgt (List[str]): sentence to associate to
-        tok2word_map_src (List[int]): word index for which the token come from. Map associating tokens to their words for source sentence
-        tok2word_map_tgt (List[int]): word index for which the token come from. Map associating tokens to their words for target sentence
-        softmax_inter (torch.Tensor): tensor containing the softmax alignment between words from sentence_src to sentence_tgt telling whether or to not add each word
+        embeddings_src (Tuple[torch.Tensor, torch.Tensor]): embeddings of the tokens of the source sentence and their word index
+        embeddings_tgt (Tuple[torch.Tensor, torch.Tensor]): embeddings of the tokens of the target sentence and their word index
+        threshold (float): minimum probability of a token alignment in both directions (default: 1e-3)
 
     Returns:
         List[dict]: word alignment from source to target
     """
 
-    align_words = set()
-    for i, j in torch.nonzero(softmax_inter, as_tuple=False):
-        align_words.add((tok2word_map_src[i], tok2word_map_tgt[j]))
+    (out_src, words_src), (out_tgt, words_tgt) = embeddings_src, embeddings_tgt
 
-    output = []
-    for i, j in sorted(align_words):
-        output.append({"source": sentence_src[i], "target": sentence_tgt[j]})
+    if len(words_src) == 0 or len(words_tgt) == 0:
+        return []
 
-    return output
+    dot_prod = torch.matmul(out_src, out_tgt.transpose(-1, -2))
+
+    aligned_tokens = (torch.softmax(dot_prod, dim=-1) > threshold) & (
+        torch.softmax(dot_prod, dim=-2) > threshold
+    )
+
+    token_pairs = aligned_tokens.nonzero().cpu()
+    # unique also sorts the word pairs
+    word_pairs = torch.unique(
+        torch.stack(
+            [words_src[token_pairs[:, 0]], words_tgt[token_pairs[:, 1]]], dim=-1
+        ),
+        dim=0,
+    )
+
+    return [
+        {"source": sentence_src[i], "target": sentence_tgt[j]}
+        for i, j in word_pairs.tolist()
+    ]
 
 
 def predict(
-    input_string_language_1: str, input_string_language_2: str
-) -> Dict[str, List[Dict[str, str]]]:
+    input_string_language_1: Union[str, List[str]],
+    input_string_language_2: Union[str, List[str]],
+    batch_size: int = 32,
+) -> Dict[str, Union[List[Dict[str, str]], List[List[Dict[str, str]]]]]:
     """
     Associated words from `input_string_language_1` to `input_string_language_2`.
+    Several sentence pairs (a parallel corpus) can be aligned at once as lists of sentences,
+    a string being aligned as a single sentence whatever its lines.
+    The word-alignment task sends single strings, the lists are left to the direct callers.
 
     Args:
-        input_string_language_1 (str): string to associate from
-        input_string_language_2 (str): string to associate to
+        input_string_language_1 (Union[str, List[str]]): string (or strings) to associate from
+        input_string_language_2 (Union[str, List[str]]): string (or strings) to associate to
+        batch_size (int): number of sentences per forward pass (default: 32)
 
     Returns:
-        Dict[str, List[Dict[str, str]]]: dictionary containing the word alignment from input_string_language_1 to input_string_language_2
+        Dict[str, Union[List[Dict[str, str]], List[List[Dict[str, str]]]]]: dictionary containing the word alignment
+            from input_string_language_1 to input_string_language_2, one alignment per sentence pair for a parallel corpus
     """
 
-    threshold = 1e-3
-    align_layer = 8
-    model_name = "bert-base-multilingual-cased"
-
-    model = BertModel.from_pretrained(model_name)
-    tokenizer = BertTokenizer.from_pretrained(model_name)
-
-    model.eval()
+    model, tokenizer, device = load_resident_model(MODEL_NAME, load_model)
 
-    sentence_src, tokens_src = get_tokens(input_string_language_1, tokenizer)
-    sentence_tgt, tokens_tgt = get_tokens(input_string_language_2, tokenizer)
-
-    tensor_src = tokens_to_tensor(tokens=tokens_src, tokenizer=tokenizer)
-    tensor_tgt = tokens_to_tensor(tokens=tokens_tgt, tokenizer=tokenizer)
-
-    tok2word_map_src = map_tokens_to_words(tokens_src)
-    tok2word_map_tgt = map_tokens_to_words(tokens_tgt)
-
-    with torch.no_grad():
-        out_src = model(tensor_src.unsqueeze(0), output_hidden_states=True)[2][
-            align_layer
-        ][0, 1:-1]
-        out_tgt = model(tensor_tgt.unsqueeze(0), output_hidden_states=True)[2][
-            align_layer
-        ][0, 1:-1]
+    lines_src = (
+        [input_string_language_1]
+        if isinstance(input_string_language_1, str)
+        else input_string_language_1
+    )
+    lines_tgt = (
+        [input_string_language_2]
+        if isinstance(input_string_language_2, str)
+        else input_string_language_2
+    )
 
-    del tensor_src, tensor_tgt
+    if len(lines_src) != len(lines_tgt):
+        raise ValueError(
+            f"The parallel corpus is not aligned: {len(lines_src)} source sentences for {len(lines_tgt)} target sentences"
+        )
 
-    dot_prod = torch.matmul(out_src, out_tgt.transpose(-1, -2))
+    sentences_src = [line.strip().split() for line in lines_src]
+    sentences_tgt = [line.strip().split() for line in lines_tgt]
 
-    softmax_inter = (torch.nn.Softmax(dim=-1)(dot_prod) > threshold) * (
-        torch.nn.Softmax(dim=-2)(dot_prod) > threshold
+    # both sides of every pair are encoded in the same batches
+    embeddings = embed_sentences(
+        sentences_src + sentences_tgt, model, tokenizer, device, batch_size
     )
 
-    result = get_words_alignment(
-        sentence_src=sentence_src,
-        sentence_tgt=sentence_tgt,
-        tok2word_map_src=tok2word_map_src,
-        tok2word_map_tgt=tok2word_map_tgt,
-        softmax_inter=softmax_inter,
-    )
+    result = [
+        get_words_alignment(
+            sentence_src=sentence_src,
+            sentence_tgt=sentence_tgt,
+            embeddings_src=embeddings[index],
+            embeddings_tgt=embeddings[len(sentences_src) + index],
+        )
+        for index, (sentence_src, sentence_tgt) in enumerate(
+            zip(sentences_src, sentences_tgt)
+        )
+    ]
+
+    if isinstance(input_string_language_1, str):
+        result = result[0]
 
     return {"prediction": result, "prediction_raw": result}
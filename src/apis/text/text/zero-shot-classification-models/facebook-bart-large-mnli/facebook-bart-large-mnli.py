@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, Union
+
+from gladia_api_utils.truecase_helper import get_true_cases
+from gladia_api_utils.zero_shot_helper import get_zero_shot_classifier
+
+CHECKPOINT = "facebook/bart-large-mnli"
+
+
+def predict(
+    text: Union[str, List[str]],
+    labels: Union[str, List[str]],
+    multi_label: bool = False,
+) -> Dict[str, Union[str, List[str], Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Classify a text (or several texts) into labels given at inference time.
+
+    Args:
+        text (Union[str, List[str]]): The text to classify, one per line (or a list) to classify several
+        labels (Union[str, List[str]]): The candidate labels, separated by commas (or a list)
+        multi_label (bool): Score each label independently instead of making the labels compete (default: False)
+
+    Returns:
+        Dict[str, Union[str, List[str], Dict[str, Any], List[Dict[str, Any]]]]: The most likely label and the score of every label (for each text).
+    """
+
+    texts = text.strip().split("\n") if isinstance(text, str) else text
+
+    if isinstance(labels, str):
+        labels = [label.strip() for label in labels.split(",") if label.strip()]
+
+    prediction_raw = get_zero_shot_classifier(CHECKPOINT).classify(
+        get_true_cases(texts), labels, multi_label=multi_label
+    )
+    prediction = [result["labels"][0] for result in prediction_raw]
+
+    if isinstance(text, str) and len(texts) == 1:
+        return {"prediction": prediction[0], "prediction_raw": prediction_raw[0]}
+
+    return {"prediction": prediction, "prediction_raw": prediction_raw}
@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from gladia_api_utils.submodules import TaskRouter
+
+router = APIRouter()
+
+inputs = [
+    {
+        "type": "string",
+        "name": "text",
+        "example": "I am going to Paris next week to visit the Louvre",
+        "placeholder": "Insert the text to classify, one per line to classify several",
+    },
+    {
+        "type": "string",
+        "name": "labels",
+        "example": "travel, cooking, dancing",
+        "placeholder": "Insert the candidate labels, separated by commas",
+    },
+    {
+        "type": "boolean",
+        "name": "multi_label",
+        "default": False,
+        "example": False,
+        "placeholder": "Score each label independently instead of making the labels compete",
+    },
+]
+
+output = {"name": "label", "type": "string", "example": "travel"}
+
+TaskRouter(
+    router=router,
+    input=inputs,
+    output=output,
+    default_model="facebook-bart-large-mnli",
+)
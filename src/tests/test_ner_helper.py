@@ -0,0 +1,229 @@
+import re
+from typing import Any, Dict, List
+
+import pytest
+from gladia_api_utils.ner_helper import group_entities, merge_windows, split_windows
+
+CITIES = ["Paris", "London", "Berlin", "Madrid", "Rome"]
+
+
+def find_cities(text: str) -> List[Dict[str, Any]]:
+    """
+    Recognize the cities of a text, like the model would on a window
+
+    Args:
+        text (str): text to recognize the cities of
+
+    Returns:
+        List[Dict[str, Any]]: the entities of the text
+    """
+
+    return [
+        {
+            "entity_group": "LOC",
+            "score": 0.9,
+            "word": match.group(),
+            "start": match.start(),
+            "end": match.end(),
+        }
+        for match in re.finditer("|".join(CITIES), text)
+    ]
+
+
+def token(entity: str, start: int, end: int, score: float = 0.9) -> Dict[str, Any]:
+    """
+    Build the prediction of a token
+
+    Args:
+        entity (str): B-/I- label of the token
+        start (int): first character of the token
+        end (int): character after the token
+        score (float): score of the token (default: 0.9)
+
+    Returns:
+        Dict[str, Any]: the prediction of the token
+    """
+
+    return {"entity": entity, "score": score, "start": start, "end": end}
+
+
+class TestWindows:
+    """
+    Class to test the split of the documents into windows and the merge of their entities
+    """
+
+    @pytest.mark.parametrize("window_size,overlap", [(40, 10), (60, 20), (100, 30)])
+    def test_entity_in_overlap_reported_once(
+        self, window_size: int, overlap: int
+    ) -> None:
+        """
+        Test that the entities seen by two windows are reported once, with the offsets of the document
+
+        Args:
+            window_size (int): maximum number of characters of a window
+            overlap (int): number of characters shared by two consecutive windows
+
+        Returns:
+            None
+        """
+
+        text = " ".join(
+            f"{CITIES[index % len(CITIES)]} is nice." for index in range(30)
+        )
+        windows = split_windows(text, window_size=window_size, overlap=overlap)
+
+        # some cities are seen by two windows
+        assert sum(len(find_cities(text[start:end])) for start, end in windows) > len(
+            find_cities(text)
+        )
+
+        entities = merge_windows(
+            windows, [find_cities(text[start:end]) for start, end in windows]
+        )
+
+        assert [(entity["start"], entity["end"]) for entity in entities] == [
+            (entity["start"], entity["end"]) for entity in find_cities(text)
+        ]
+        assert all(
+            text[entity["start"] : entity["end"]] in CITIES for entity in entities
+        )
+
+    def test_windows_cut_on_spaces(self) -> None:
+        """
+        Test that the windows cover the text, overlap and start and end on word boundaries
+
+        Returns:
+            None
+        """
+
+        text = " ".join(f"word{index}" for index in range(200))
+        windows = split_windows(text, window_size=100, overlap=30)
+
+        assert windows[0][0] == 0
+        assert windows[-1][1] == len(text)
+
+        for (start, end), (next_start, _) in zip(windows, windows[1:]):
+            assert end - start <= 100
+            assert start < next_start < end
+            assert text[end] == " "
+            assert text[next_start - 1] == " "
+
+    def test_text_without_spaces(self) -> None:
+        """
+        Test that a text without spaces is cut in the middle of its words and entirely covered
+
+        Returns:
+            None
+        """
+
+        text = "x" * 250
+        windows = split_windows(text, window_size=100, overlap=20)
+
+        assert windows[0][0] == 0
+        assert windows[-1][1] == len(text)
+        assert all(end - start <= 100 for start, end in windows)
+        assert all(
+            start < next_start <= end
+            for (start, end), (next_start, _) in zip(windows, windows[1:])
+        )
+
+    def test_empty_document(self) -> None:
+        """
+        Test that an empty document has a single empty window and no entities
+
+        Returns:
+            None
+        """
+
+        windows = split_windows("")
+
+        assert windows == [(0, 0)]
+        assert merge_windows(windows, [[]]) == []
+        assert group_entities([], "") == []
+
+    def test_windows_fit_in_the_tokens(self) -> None:
+        """
+        Test that the windows with more tokens than the model takes are shortened
+
+        Returns:
+            None
+        """
+
+        # one token per digit, so 100 characters make far more than 25 tokens
+        text = " ".join(["1234567890"] * 40)
+
+        def count_tokens(window: str) -> int:
+            return len(window.replace(" ", ""))
+
+        windows = split_windows(
+            text, window_size=100, overlap=20, count_tokens=count_tokens, max_tokens=25
+        )
+
+        assert windows[0][0] == 0
+        assert windows[-1][1] == len(text)
+        assert all(count_tokens(text[start:end]) <= 25 for start, end in windows)
+        assert all(
+            start < next_start < end
+            for (start, end), (next_start, _) in zip(windows, windows[1:])
+        )
+
+
+class TestGroupEntities:
+    """
+    Class to test the aggregation of the token predictions into entities
+    """
+
+    def test_group_b_i_tokens(self) -> None:
+        """
+        Test that the I- tokens continue the entity of the previous token and the B- tokens start a new one
+
+        Returns:
+            None
+        """
+
+        text = "John Smith visited New York with Mary Jane Doe"
+        tokens = [
+            token("B-PER", 0, 4, 0.8),
+            token("I-PER", 5, 10, 1.0),
+            token("O", 11, 18),
+            token("B-LOC", 19, 22),
+            token("I-LOC", 23, 27),
+            token("O", 28, 32),
+            token("B-PER", 33, 37),
+            token("B-PER", 38, 42),
+            token("I-PER", 43, 46),
+        ]
+
+        entities = group_entities(tokens[::-1], text)
+
+        assert [(entity["entity_group"], entity["word"]) for entity in entities] == [
+            ("PER", "John Smith"),
+            ("LOC", "New York"),
+            ("PER", "Mary"),
+            ("PER", "Jane Doe"),
+        ]
+        assert entities[0]["score"] == pytest.approx(0.9)
+        assert (entities[1]["start"], entities[1]["end"]) == (19, 27)
+
+    def test_types_and_subwords(self) -> None:
+        """
+        Test that the tokens of other types or separated by other characters start a new entity,
+        the subwords of a word being grouped
+
+        Returns:
+            None
+        """
+
+        text = "Gladiaio, Paris"
+        tokens = [
+            token("B-ORG", 0, 4),
+            token("I-ORG", 4, 8),
+            token("I-LOC", 10, 15),
+        ]
+
+        entities = group_entities(tokens, text)
+
+        assert [(entity["entity_group"], entity["word"]) for entity in entities] == [
+            ("ORG", "Gladiaio"),
+            ("LOC", "Paris"),
+        ]
@@ -0,0 +1,90 @@
+import pytest
+import truecase
+from gladia_api_utils.truecase_helper import Truecaser
+
+TEXTS = [
+    "i live in new york with john",
+    "the president obama said that he'll be in washington dc on monday",
+    "we cannot go, we wanna stay and we're gonna stay",
+    "hello world. how are you? i'm fine! thanks",
+    "apple is a company. ibm and nasa are too.\nmr smith works at ibm",
+    'she said "the united states of america" (usa) and left ; then came back -',
+    "the qwzxv flurbination of blorptastic zzyzx is unknown",
+    "in 2022 , 100 people visited paris , france",
+    "e.g. mr. smith vs. dr. jones at 3 p.m.",
+    "don't can't won't it's o'neill's",
+    "UPPER CASE TEXT STAYS TRUECASED",
+    "",
+    "   ",
+    "a",
+]
+
+
+@pytest.fixture(scope="module")
+def truecaser() -> Truecaser:
+    """
+    Load the truecaser once for the tests of the module
+
+    Returns:
+        Truecaser: the truecaser
+    """
+
+    return Truecaser(max_size=4)
+
+
+class TestTruecaser:
+    """
+    Class to test that the Truecaser gives the same results as truecase.get_true_case
+    """
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_same_as_truecase(self, truecaser: Truecaser, text: str) -> None:
+        """
+        Test that a text is truecased as truecase.get_true_case does
+
+        Args:
+            truecaser (Truecaser): the truecaser
+            text (str): text to truecase
+
+        Returns:
+            None
+        """
+
+        assert truecaser.get_true_cases([text]) == [truecase.get_true_case(text)]
+
+    def test_batch_and_memory(self, truecaser: Truecaser) -> None:
+        """
+        Test that truecasing the texts at once, with repetitions and more texts than
+        the memory can hold, gives the results of truecase.get_true_case
+
+        Args:
+            truecaser (Truecaser): the truecaser
+
+        Returns:
+            None
+        """
+
+        texts = TEXTS + TEXTS[::-1]
+
+        assert truecaser.get_true_cases(texts) == [
+            truecase.get_true_case(text) for text in texts
+        ]
+        assert len(truecaser.texts) <= 4
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_restore_case_keeps_offsets(self, truecaser: Truecaser, text: str) -> None:
+        """
+        Test that restore_case only changes the case of the characters of a text
+
+        Args:
+            truecaser (Truecaser): the truecaser
+            text (str): text to truecase
+
+        Returns:
+            None
+        """
+
+        result = truecaser.restore_case(text)
+
+        assert len(result) == len(text)
+        assert result.lower() == text.lower()
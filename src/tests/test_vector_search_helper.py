@@ -0,0 +1,192 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+from gladia_api_utils import vector_search_helper
+from gladia_api_utils.vector_search_helper import CollectionManager, normalize
+
+
+def clustered_vectors(count: int, dimension: int = 32, seed: int = 0) -> np.ndarray:
+    """
+    Generate vectors grouped around random centers, like embeddings of documents about a few topics
+
+    Args:
+        count (int): number of vectors
+        dimension (int): dimension of the vectors (default: 32)
+        seed (int): seed of the random generator (default: 0)
+
+    Returns:
+        np.ndarray: the vectors
+    """
+
+    random = np.random.default_rng(seed)
+    centers = random.normal(size=(64, dimension))
+
+    return (
+        centers[random.integers(0, len(centers), count)]
+        + 0.3 * random.normal(size=(count, dimension))
+    ).astype(np.float32)
+
+
+def documents(start: int, stop: int, prefix: str = "text") -> List[Dict[str, Any]]:
+    """
+    Generate documents with consecutive ids
+
+    Args:
+        start (int): first id
+        stop (int): id after the last one
+        prefix (str): beginning of the texts (default: "text")
+
+    Returns:
+        List[Dict[str, Any]]: the documents
+    """
+
+    return [
+        {"id": str(index), "text": f"{prefix} {index}", "metadata": {"index": index}}
+        for index in range(start, stop)
+    ]
+
+
+class TestCollection:
+    """
+    Class to test the persistence and the index of the semantic search collections
+    """
+
+    def test_ivf_recall(self, tmp_path, monkeypatch) -> None:
+        """
+        Test that the IVF index finds most of the exact nearest neighbours
+
+        Args:
+            tmp_path (Path): directory of the collections
+            monkeypatch (MonkeyPatch): pytest fixture lowering the size above which the index is used
+
+        Returns:
+            None
+        """
+
+        monkeypatch.setattr(vector_search_helper, "IVF_MIN_SIZE", 1000)
+
+        collection = CollectionManager(str(tmp_path)).create("recall", "model")
+        vectors = clustered_vectors(5000)
+
+        for start in range(0, len(vectors), 500):
+            collection.upsert(
+                documents(start, start + 500), vectors[start : start + 500]
+            )
+
+        assert collection.get_stats()["index"] == "ivf"
+
+        random = np.random.default_rng(1)
+        queries = vectors[random.integers(0, len(vectors), 50)]
+        queries = queries + 0.1 * random.normal(size=queries.shape)
+
+        normalized = normalize(vectors)
+        found = 0
+        for query in queries:
+            scores = normalized @ normalize(query[None])[0]
+            exact = {str(index) for index in np.argsort(-scores)[:10]}
+            found += len(
+                exact & {result["id"] for result in collection.query(query, 10)}
+            )
+
+        assert found / (10 * len(queries)) >= 0.9
+
+    def test_exhaustive_search(self, tmp_path) -> None:
+        """
+        Test that a small collection returns the exact nearest neighbours from the closest,
+        the replaced documents being returned once with their last text
+
+        Args:
+            tmp_path (Path): directory of the collections
+
+        Returns:
+            None
+        """
+
+        collection = CollectionManager(str(tmp_path)).create("exact", "model")
+        vectors = clustered_vectors(300)
+
+        collection.upsert(documents(0, 300), vectors)
+        collection.upsert(documents(0, 10, prefix="new"), vectors[:10])
+
+        results = collection.query(vectors[5], 20)
+        scores = [result["score"] for result in results]
+
+        assert len(collection) == 300
+        assert results[0] == {
+            "id": "5",
+            "text": "new 5",
+            "metadata": {"index": 5},
+            "score": pytest.approx(1.0, abs=1e-5),
+        }
+        assert scores == sorted(scores, reverse=True)
+        assert len({result["id"] for result in results}) == 20
+
+    def test_reload_across_instances(self, tmp_path) -> None:
+        """
+        Test that two managers of the same directory, like two processes of the server,
+        see the documents the other one upserted, appended to the same generation or in a new one
+
+        Args:
+            tmp_path (Path): directory of the collections
+
+        Returns:
+            None
+        """
+
+        first = CollectionManager(str(tmp_path))
+        second = CollectionManager(str(tmp_path))
+        vectors = clustered_vectors(3000)
+
+        first.create("shared", "model")
+        first.get("shared").upsert(documents(0, 100), vectors[:100])
+
+        collection = second.get("shared")
+        assert len(collection) == 100
+        assert collection.query(vectors[42], 1)[0]["id"] == "42"
+
+        # appended to the files of the current generation
+        generation = collection.generation
+        collection.upsert(documents(42, 43, prefix="replaced"), vectors[42:43])
+        collection.upsert(documents(100, 200), vectors[100:200])
+
+        assert first.get("shared").generation == generation
+        assert len(first.get("shared")) == 200
+        assert first.get("shared").query(vectors[42], 1)[0]["text"] == "replaced 42"
+        assert first.get("shared").query(vectors[150], 1)[0]["id"] == "150"
+
+        # more documents than the arrays of the generation can hold
+        first.get("shared").upsert(documents(200, 3000), vectors[200:3000])
+
+        assert second.get("shared").generation > generation
+        assert len(second.get("shared")) == 3000
+        assert second.get("shared").query(vectors[2500], 1)[0]["id"] == "2500"
+        assert second.get("shared").query(vectors[42], 1)[0]["text"] == "replaced 42"
+
+        first.delete("shared")
+
+        with pytest.raises(KeyError):
+            second.get("shared")
+
+    def test_invalid_names(self, tmp_path) -> None:
+        """
+        Test that the invalid and already used names are refused
+
+        Args:
+            tmp_path (Path): directory of the collections
+
+        Returns:
+            None
+        """
+
+        manager = CollectionManager(str(tmp_path))
+        manager.create("taken", "model")
+
+        with pytest.raises(ValueError):
+            manager.create("taken", "model")
+
+        with pytest.raises(ValueError):
+            manager.create("../escape", "model")
+
+        with pytest.raises(KeyError):
+            manager.get("missing")
@@ -0,0 +1,215 @@
+import os
+import threading
+from typing import List
+
+import pytest
+import torch
+from gladia_api_utils.zero_shot_helper import ZeroShotClassifier
+from transformers import (
+    BertConfig,
+    BertForSequenceClassification,
+    BertTokenizerFast,
+    pipeline,
+)
+
+WORDS = sorted(
+    set(
+        "i like to play football with my friends the weather is sunny today "
+        "this example is about sport politics cooking travel .".split()
+    )
+)
+
+TEXTS = [
+    "i like to play football with my friends",
+    "the weather is sunny today",
+    "today",
+]
+
+LABELS = ["sport", "politics", "cooking", "travel"]
+
+
+@pytest.fixture(scope="module")
+def checkpoint(tmp_path_factory) -> str:
+    """
+    Save a tiny randomly initialized NLI model and its tokenizer
+
+    Args:
+        tmp_path_factory (TempPathFactory): pytest fixture creating the directory of the model
+
+    Returns:
+        str: directory of the model
+    """
+
+    path = str(tmp_path_factory.mktemp("nli"))
+
+    with open(os.path.join(path, "vocab.txt"), "w") as vocab:
+        vocab.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+
+    tokenizer = BertTokenizerFast(os.path.join(path, "vocab.txt"), model_max_length=64)
+
+    torch.manual_seed(0)
+    model = BertForSequenceClassification(
+        BertConfig(
+            vocab_size=len(tokenizer),
+            hidden_size=32,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            intermediate_size=64,
+            num_labels=3,
+            id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+            label2id={"contradiction": 0, "neutral": 1, "entailment": 2},
+        )
+    )
+
+    tokenizer.save_pretrained(path)
+    model.save_pretrained(path)
+
+    return path
+
+
+@pytest.fixture(scope="module")
+def classifier(checkpoint: str) -> ZeroShotClassifier:
+    """
+    Load the zero-shot classifier of the tiny model
+
+    Args:
+        checkpoint (str): directory of the model
+
+    Returns:
+        ZeroShotClassifier: the zero-shot classifier
+    """
+
+    return ZeroShotClassifier(checkpoint, device="cpu", max_batch_size=5)
+
+
+class FailingModel(object):
+    """
+    Model raising an error at each forward pass
+    """
+
+    def __call__(self, **inputs) -> None:
+        """
+        Fail the forward pass
+
+        Args:
+            **inputs: the inputs of the model
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: always
+        """
+
+        raise RuntimeError("forward pass failed")
+
+
+class TestZeroShotClassifier:
+    """
+    Class to test that the ZeroShotClassifier gives the results of the zero-shot-classification pipeline
+    """
+
+    @pytest.mark.parametrize("multi_label", [False, True])
+    def test_same_as_pipeline(
+        self, checkpoint: str, classifier: ZeroShotClassifier, multi_label: bool
+    ) -> None:
+        """
+        Test that the labels and scores are the ones of the transformers pipeline
+
+        Args:
+            checkpoint (str): directory of the model
+            classifier (ZeroShotClassifier): the zero-shot classifier
+            multi_label (bool): whether the labels are scored independently
+
+        Returns:
+            None
+        """
+
+        zero_shot_pipeline = pipeline(
+            "zero-shot-classification", model=checkpoint, device=-1
+        )
+
+        predictions = classifier.classify(TEXTS, LABELS, multi_label=multi_label)
+
+        assert len(predictions) == len(TEXTS)
+
+        for text, prediction in zip(TEXTS, predictions):
+            expected = zero_shot_pipeline(text, LABELS, multi_label=multi_label)
+
+            assert prediction["sequence"] == text
+            assert sorted(prediction["labels"]) == sorted(LABELS)
+            assert dict(zip(prediction["labels"], prediction["scores"])) == {
+                label: pytest.approx(score, abs=1e-5)
+                for label, score in zip(expected["labels"], expected["scores"])
+            }
+            assert prediction["scores"] == sorted(prediction["scores"], reverse=True)
+
+            if not multi_label:
+                assert sum(prediction["scores"]) == pytest.approx(1.0)
+
+    def test_concurrent_requests(self, classifier: ZeroShotClassifier) -> None:
+        """
+        Test that requests classified at the same time, sharing forward passes,
+        get the results they would have alone
+
+        Args:
+            classifier (ZeroShotClassifier): the zero-shot classifier
+
+        Returns:
+            None
+        """
+
+        expected = [classifier.classify([text], LABELS)[0] for text in TEXTS]
+        results: List[dict] = [None] * len(TEXTS)
+
+        def classify(index: int) -> None:
+            results[index] = classifier.classify([TEXTS[index]], LABELS)[0]
+
+        threads = [
+            threading.Thread(target=classify, args=(index,))
+            for index in range(len(TEXTS))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for result, expected_result in zip(results, expected):
+            assert result["labels"] == expected_result["labels"]
+            assert result["scores"] == pytest.approx(expected_result["scores"])
+
+    def test_failed_batch(self, classifier: ZeroShotClassifier) -> None:
+        """
+        Test that a failed forward pass raises its error in every request of the batch,
+        the next requests being classified
+
+        Args:
+            classifier (ZeroShotClassifier): the zero-shot classifier
+
+        Returns:
+            None
+        """
+
+        hypotheses = [
+            classifier.encode_hypothesis("This example is {}.", label)
+            for label in LABELS[:2]
+        ]
+
+        model = classifier.model
+        classifier.model = FailingModel()
+
+        try:
+            # the scoring thread can't take the pairs before both requests are queued
+            with classifier.condition:
+                requests = [
+                    classifier.submit(classifier.encode_pairs(text, hypotheses))
+                    for text in TEXTS[:2]
+                ]
+
+            for request in requests:
+                with pytest.raises(RuntimeError, match="forward pass failed"):
+                    request.result()
+        finally:
+            classifier.model = model
+
+        assert len(classifier.classify(TEXTS, LABELS)) == len(TEXTS)